@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+import shutil
 
 import pytest
 
@@ -17,9 +18,19 @@ from reading.storage import Store
 
 
 @pytest.fixture(params=["small", "medium", "large"])
-def collection_path(request: pytest.FixtureRequest) -> Path:
-    """Return the path to each of the benchmark collections."""
-    return Path("benchmarks/data/collections", request.param)
+def collection_path(request: pytest.FixtureRequest, tmp_path: Path) -> Path:
+    """Return the path to a copy of each of the benchmark collections.
+
+    The collections are copied so that the caches created when they're loaded
+    don't end up alongside the checked-in data.
+    """
+    path = tmp_path / request.param
+    shutil.copytree(
+        Path("benchmarks/data/collections", request.param),
+        path,
+        ignore=shutil.ignore_patterns(".cache", "*.feather"),
+    )
+    return path
 
 
 @pytest.fixture()
@@ -14,15 +14,23 @@ from reading.collection import Collection
 ################################################################################
 
 
+@pytest.mark.parametrize("cache", (True, False), ids=lambda x: f"cache={x}")
 @pytest.mark.parametrize("fixes", (True, False), ids=lambda x: f"fixes={x}")
 @pytest.mark.parametrize("metadata", (True, False), ids=lambda x: f"metadata={x}")
-def perf_collection_creation(benchmark, collection_path: Path, metadata: bool, fixes: bool) -> None:
+def perf_collection_creation(
+    benchmark,
+    collection_path: Path,
+    metadata: bool,
+    fixes: bool,
+    cache: bool,
+) -> None:
     """Time required to create a collection."""
     benchmark(
         Collection.from_dir,
         collection_path,
         metadata=metadata,
         fixes=fixes,
+        cache=cache,
     )
 
 
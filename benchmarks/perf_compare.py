@@ -0,0 +1,21 @@
+# vim: ts=4 : sw=4 : et
+
+"""Benchmark comparing collections."""
+
+from __future__ import annotations
+
+from reading.collection import Collection
+from reading.compare import _compare
+
+
+################################################################################
+
+
+def perf_compare(benchmark, collection: Collection) -> None:
+    """Time required to compare a collection with a slightly modified copy of itself."""
+    df = collection.all
+    new = df.drop(df.index[::50]).copy()
+    new.loc[new.index[::20], "Title"] = "Changed"
+
+    c_old, c_new = Collection(df), Collection(new)
+    benchmark(lambda: list(_compare(c_old, c_new)))
@@ -0,0 +1,50 @@
+# vim: ts=4 : sw=4 : et
+
+"""Benchmark start-up time."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+
+################################################################################
+
+
+def _run(code: str) -> None:
+    """Run $code in a fresh interpreter."""
+    subprocess.run((sys.executable, "-c", code), check=True)
+
+
+@pytest.mark.parametrize(
+    "module",
+    ("reading.cmds", "reading.server", "reading.suggestions", "reading.metadata", "reading.update"),
+)
+def perf_import(benchmark, module: str) -> None:
+    """Time required to import $module from cold."""
+    benchmark.pedantic(_run, (f"import {module}",), rounds=5)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    (
+        ["config", "kindle.words_per_page"],
+        # with a daemon, which is faked
+        ["suggest"],
+    ),
+    ids=" ".join,
+)
+def perf_import_command(benchmark, argv: list[str]) -> None:
+    """Time required to start up $argv."""
+    code = f"""
+import sys
+import reading.server
+from reading.cmds import main
+
+reading.server.query = lambda *_: 0
+sys.argv = ["ook", *{argv!r}]
+main()
+"""
+    benchmark.pedantic(_run, (code,), rounds=5)
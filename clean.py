@@ -3,40 +3,16 @@
 # flake8: noqa
 # pylint: skip-file
 
-import glob
-import pipes  # used for shell escapes
+import shlex  # used for shell escapes
 
-kindle_dir = '/media/mlb/Kindle/documents/'
-
-dirs = [
-    '',
-    'articles/',
-    'books/',
-    'non-fiction/',
-    'short-stories/',
-]
-
-
-def clean_files(d):
-    for item in glob.glob(d + '*.sdr/'):
-        head, sep, tail = item.partition('.sdr/')
+from reading.kindle import KindleIndex
 
-        head = head.replace('[', '[[]')
-
-        cruft = True
-
-        for f in glob.glob(head + '.*'):
-            if f.endswith('.sdr'):
-                continue
-            else:
-                cruft = False
-
-        if cruft:
-            print('rm -r {}'.format(pipes.quote(item)))
+kindle_dir = '/media/mlb/Kindle/documents/'
 
 
-for d in dirs:
-    clean_files(kindle_dir + d)
+# sidecar directories whose ebooks have been removed
+for sidecar in KindleIndex.scan(kindle_dir).orphans():
+    print('rm -r {}'.format(shlex.quote(str(sidecar.path) + '/')))
 
 
 # vim: ts=4 : sw=4 : et
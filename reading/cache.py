@@ -0,0 +1,119 @@
+# vim: ts=4 : sw=4 : et
+
+"""A cache of API responses, kept in a single SQLite database."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Callable, Union
+import zlib
+
+import attr
+
+
+Key = Union[int, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID
+"""
+
+# stay well within SQLite's limit on the number of parameters
+_CHUNK_SIZE = 500
+
+################################################################################
+
+
+@attr.s
+class ResponseCache:
+    """Responses by kind and key, compressed and timestamped.
+
+    Entries older than the ttl given when reading them are treated as
+    missing, so they get refreshed.  prefetch() loads many entries with a
+    single query, so that later lookups don't need to go to the database.
+    It's safe to share between threads.
+    """
+
+    path: Path = attr.ib(converter=Path)
+    clock: Callable[[], float] = attr.ib(default=time.time, repr=False)
+
+    _db: sqlite3.Connection = attr.ib(init=False, repr=False)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+    # prefetched entries, by kind and key
+    _prefetched: dict[tuple[str, str], tuple[float, bytes]] = attr.ib(
+        factory=dict, init=False, repr=False
+    )
+
+    def __attrs_post_init__(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute(_SCHEMA)
+
+    def _fresh(self, fetched: float, ttl: float | None) -> bool:
+        return ttl is None or self.clock() - fetched <= ttl
+
+    def get(self, kind: str, key: Key, ttl: float | None = None) -> bytes | None:
+        """Return the cached response, or None if it's missing or older than $ttl seconds."""
+        with self._lock:
+            if (entry := self._prefetched.get((kind, str(key)))) is None:
+                entry = self._db.execute(
+                    "SELECT fetched, data FROM responses WHERE kind = ? AND key = ?",
+                    (kind, str(key)),
+                ).fetchone()
+
+        if entry is None or not self._fresh(entry[0], ttl):
+            return None
+        return zlib.decompress(entry[1])
+
+    def put(self, kind: str, key: Key, data: bytes, fetched: float | None = None) -> None:
+        """Store $data as the response for $key, fetched at $fetched (or now)."""
+        entry = (self.clock() if fetched is None else fetched, zlib.compress(data))
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (kind, str(key), *entry),
+            )
+            if (kind, str(key)) in self._prefetched:
+                self._prefetched[(kind, str(key))] = entry
+
+    def prefetch(self, kind: str, keys: Iterable[Key] | None = None) -> int:
+        """Load the cached responses for $keys (or all of $kind) in bulk.
+
+        Returns how many were found.
+        """
+        query = "SELECT key, fetched, data FROM responses WHERE kind = ?"
+        queries: list[tuple[str, tuple[str, ...]]] = []
+        if keys is None:
+            queries.append((query, (kind,)))
+        else:
+            names = [str(key) for key in keys]
+            queries.extend(
+                (f"{query} AND key IN ({', '.join('?' * len(chunk))})", (kind, *chunk))
+                for chunk in (
+                    names[start : start + _CHUNK_SIZE]
+                    for start in range(0, len(names), _CHUNK_SIZE)
+                )
+            )
+
+        found = 0
+        with self._lock:
+            for sql, params in queries:
+                for key, fetched, data in self._db.execute(sql, params):
+                    self._prefetched[(kind, key)] = (fetched, data)
+                    found += 1
+
+        return found
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
@@ -5,12 +5,28 @@
 from __future__ import annotations
 
 import argparse
-
-import pandas as pd
+from pathlib import Path
+import sys
 
 from .config import CATEGORIES, SHELVES, Config
 
 
+# the subcommands the daemon can answer
+SERVED_MODES = {"suggest", "scheduled", "batch", "lint", "reports"}
+
+
+def socket_path(args) -> Path:
+    """Return the path to the daemon's socket."""
+    return Path(args.socket or Path(args.data_dir, ".ook.sock"))
+
+
+# pandas is only imported if the date is actually needed
+def _timestamp(value: str):
+    import pandas as pd  # noqa: PLC0415
+
+    return pd.Timestamp(value)
+
+
 def _filter_parser():
     parser = argparse.ArgumentParser(add_help=False)
 
@@ -55,9 +71,11 @@ def arg_parser():
     parser = argparse.ArgumentParser()
 
     # common options
-    parser.add_argument("--date", type=pd.Timestamp, default=pd.Timestamp("today"))
+    parser.add_argument("--date", type=_timestamp, default="today")
     parser.add_argument("-f", "--force", action="store_true")
     parser.add_argument("--data-dir", type=str, default="data/")
+    parser.add_argument("--socket", type=str, default=None, help="the daemon's socket")
+    parser.add_argument("--no-daemon", action="store_true", help="don't use the daemon")
 
     # output options
 
@@ -67,10 +85,14 @@ def arg_parser():
     update = subparsers.add_parser("update")
     update.add_argument("-n", "--ignore-changes", action="store_false", dest="save")
     update.add_argument("--goodreads", action="store_true")
+    update.add_argument(
+        "--full", action="store_true", help="fetch all the goodreads books, not just changes"
+    )
     update.add_argument("--kindle", action="store_true")
     update.add_argument("--scrape", action="store_true")
     # FIXME split this into books and authors?
     update.add_argument("--metadata", action="store_true")
+    update.add_argument("--json", type=Path, help="also write the changes here, as JSON Lines")
 
     metadata = subparsers.add_parser("metadata")
     metadata.add_argument("-n", "--ignore-changes", action="store_false", dest="save")
@@ -90,6 +112,13 @@ def arg_parser():
         help="suggest books",
     )
 
+    batch = subparsers.add_parser(
+        "batch",
+        help="write several lists of suggestions at once",
+    )
+    batch.add_argument("spec", help="YAML file describing the lists to write")
+    batch.add_argument("--output-dir", type=str, default=".")
+
     lint = subparsers.add_parser("lint", help="report problems with the collection")
     lint.add_argument("pattern", nargs="?")
 
@@ -100,46 +129,86 @@ def arg_parser():
     reports.add_argument("names", nargs="*", help="the pre-configured report to generate")
     # FIXME support custom reports
 
+    subparsers.add_parser(
+        "serve",
+        help="keep the collection loaded and answer queries over a socket",
+    )
+
     config = subparsers.add_parser("config", help="display configuration options")
     config.add_argument("key")
 
     return parser
 
 
-def main():
-    """Parse the command-line arguments and dispatch appropriately."""
-    args = arg_parser().parse_args()
-    config = Config.from_file()
+def _set_display_options() -> None:
+    import pandas as pd  # noqa: PLC0415
+
+    pd.set_option("display.max_rows", None)
+    pd.set_option("display.width", None)
+
+
+def run(args, config: Config) -> int:
+    """Run the command described by $args."""
+    if args.mode != "config":
+        _set_display_options()
 
     if args.mode == "update":
-        import reading.update
+        import reading.update  # noqa: PLC0415
 
         reading.update.main(args, config)
     if args.mode == "metadata":
-        import reading.metadata
+        import reading.metadata  # noqa: PLC0415
 
         reading.metadata.main(args, config)
     if args.mode == "lint":
-        import reading.lint
+        import reading.lint  # noqa: PLC0415
 
         reading.lint.main(args, config)
     if args.mode == "graph":
-        import reading.graph
+        import reading.graph  # noqa: PLC0415
 
         reading.graph.main(args, config)
     if args.mode == "config":
         print(config(args.key))
     if args.mode == "scheduled":
-        import reading.suggestions
+        import reading.suggestions  # noqa: PLC0415
 
         reading.suggestions.scheduled(args, config)  # !
     if args.mode == "suggest":
-        import reading.suggestions
+        import reading.suggestions  # noqa: PLC0415
 
         reading.suggestions.main(args, config)
+    if args.mode == "batch":
+        import reading.suggestions  # noqa: PLC0415
+
+        reading.suggestions.batch(args, config)
     if args.mode == "reports":
-        import reading.reports
+        import reading.reports  # noqa: PLC0415
 
         reading.reports.main(args, config)
+    if args.mode == "serve":
+        import reading.server  # noqa: PLC0415
+
+        reading.server.serve(args)
 
     return 0
+
+
+def main():
+    """Parse the command-line arguments and dispatch appropriately."""
+    argv = sys.argv[1:]
+    # leave the date unset for now, since converting the default would mean
+    # importing pandas even if it isn't needed
+    args = arg_parser().parse_args(argv, namespace=argparse.Namespace(date=None))
+
+    # hand over to the daemon if there is one
+    if args.mode in SERVED_MODES and not args.no_daemon:
+        import reading.server  # noqa: PLC0415
+
+        if (status := reading.server.query(argv, socket_path(args))) is not None:
+            return status
+
+    if args.date is None and args.mode != "config":
+        args.date = _timestamp("today")
+
+    return run(args, Config.from_file())
@@ -4,25 +4,43 @@
 
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
 import datetime as dt
+import functools
+import hashlib
 from pathlib import Path
+import pickle
 import re
-from typing import Optional, Sequence
+from typing import Callable
 
 import attr
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 from typing_extensions import Self
 
 from .chain import Chain
 from .config import Config, merge_preferences
-from .storage import Store
+from .storage import Store, normalise_missing, set_dtypes
 
 
-pd.set_option("display.max_rows", None)
-pd.set_option("display.width", None)
+################################################################################
 
 
-################################################################################
+# separates the title and subtitle of an ebook
+_EBOOK_SUBTITLE = re.compile(r"(?: / |\s?[;:] )")
+
+# volume numbers in ebook titles.  these are searched for case-insensitively,
+# but only removed from the title if the case matches.
+_EBOOK_VOLUMES = (
+    r", Tome ([IV]+)\.",
+    r", Volume (\d+)(?: \(.+\))",
+    r", tome (\w+)",
+)
+
+# volume numbers in other titles
+_VOLUME = re.compile(r"^(?P<Title>.+?)(?: (?P<Volume>I+))?$")
 
 
 # split ebook titles into title, subtitle and volume parts, since they tend to
@@ -33,26 +51,50 @@ def _ebook_parse_title(title):
     t = title
     _s = v = None
 
-    m = re.search(r"(?: / |\s?[;:] )", title)
-    if m:
-        t, _s = re.split(r"(?: / |\s?[;:] )", title, maxsplit=1)
+    if _EBOOK_SUBTITLE.search(title):
+        t, _s = _EBOOK_SUBTITLE.split(title, maxsplit=1)
 
-    patterns = (
-        (r", Tome ([IV]+)\.", 1),
-        (r", Volume (\d+)(?: \(.+\))", 1),
-        (r", tome (\w+)", 1),
-    )
-
-    for pat, grp in patterns:
+    for pat in _EBOOK_VOLUMES:
         m = re.search(pat, title, re.IGNORECASE)
         if m:
             t = re.sub(pat, "", t)
-            v = m.group(grp)
+            v = m.group(1)
             break
 
     return pd.Series([t, v], index=["Title", "Volume"])
 
 
+def _ebook_split_titles(titles: pd.Series) -> pd.DataFrame:
+    """Return the Title and Volume of each of the ebook $titles.
+
+    Equivalent to applying _ebook_parse_title() to each one, but much faster.
+    """
+    titles = titles.str.strip().str.replace(r"\s+", " ", regex=True)
+
+    title = titles.str.split(_EBOOK_SUBTITLE, n=1, regex=True).str[0]
+    volume = pd.Series(None, index=titles.index, dtype=object)
+
+    # the first pattern that matches wins
+    for pat in _EBOOK_VOLUMES:
+        found = titles.str.extract(pat, flags=re.IGNORECASE, expand=False)
+        matched = (found.notna() & volume.isna()).to_numpy()
+        volume[matched] = found[matched]
+        title[matched] = title[matched].str.replace(pat, "", regex=True)
+
+    return pd.DataFrame({"Title": title, "Volume": volume})
+
+
+def _split_titles(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the canonical Title and Volume of each of the books in $df."""
+    kindle = (df.Shelf == "kindle").to_numpy()
+
+    split = pd.DataFrame(index=df.index, columns=["Title", "Volume"], dtype=object)
+    split[kindle] = _ebook_split_titles(df.Title[kindle]).to_numpy()
+    split[~kindle] = df.Title[~kindle].str.extract(_VOLUME).to_numpy()
+
+    return split
+
+
 # rearranges the fixes into something that DataFrame.update() can handle.
 # FIXME clean up this mess. and move into the config module?
 def _process_fixes(fixes):
@@ -89,6 +131,94 @@ def expand_ebooks(ebooks, words_per_page):
     )
 
 
+################################################################################
+
+# the modules that assemble the dataframe (including the column dtypes in
+# config.py).  snapshots are only valid for the code that created them, so any
+# change to these means they're ignored.
+_SNAPSHOT_SOURCES = [
+    Path(__file__),
+    Path(__file__).with_name("storage.py"),
+    Path(__file__).with_name("config.py"),
+]
+
+# columns which change too often to be interesting, and are left out of the
+# row hashes
+VOLATILE_COLUMNS = [
+    "AvgRating",
+    "Updated",
+]
+
+
+# where to keep the snapshot for a collection loaded with $options
+def _snapshot_path(csv_dir: Path, **options: bool) -> Path:
+    flags = "".join(f"-{name}" for name, value in sorted(options.items()) if value)
+    return csv_dir / ".cache" / f"collection{flags}.pickle"
+
+
+@functools.cache
+def _code_version() -> str:
+    """Return a hash of the code that assembles the dataframe."""
+    h = hashlib.sha1()
+    for path in _SNAPSHOT_SOURCES:
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _fingerprint(csv_dir: Path) -> str:
+    """Return a key identifying the current contents of $csv_dir."""
+    h = hashlib.sha1(_code_version().encode())
+
+    for path in sorted(csv_dir.glob("*.csv")) + [csv_dir / "config.yml"]:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        h.update(f"|{path.name}:{st.st_size}:{st.st_mtime_ns}".encode())
+
+    return h.hexdigest()
+
+
+def _load_snapshot(path: Path, key: str) -> tuple[pd.DataFrame, pd.Series] | None:
+    """Return the dataframe and row hashes snapshotted at $path, if they're still valid for $key."""
+    try:
+        with open(path, "rb") as fh:
+            snapshot_key, df, hashes = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+        # missing, or from an incompatible version of pandas
+        return None
+
+    # NaN isn't a singleton after unpickling
+    return (normalise_missing(df), hashes) if snapshot_key == key else None
+
+
+# dataframes already assembled by this process, by snapshot path, along with
+# their key and row hashes.  this means long-running processes only have to
+# reload when the files change.
+_RESIDENT: dict[Path, tuple[str, pd.DataFrame, pd.DataFrame, pd.Series]] = {}
+
+
+def _save_snapshot(path: Path, key: str, df: pd.DataFrame, hashes: pd.Series) -> None:
+    """Save a snapshot of $df and its row $hashes at $path, if possible."""
+    try:
+        path.parent.mkdir(exist_ok=True)
+        with open(path, "wb") as fh:
+            pickle.dump((key, df, hashes), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        # probably a read-only or missing directory
+        pass
+
+
+def _row_hashes(df: pd.DataFrame) -> pd.Series:
+    """Return a hash of the contents of each book in $df.
+
+    Volatile and calculated columns are ignored, and the columns are hashed in
+    a fixed order so the result doesn't depend on how $df is laid out.
+    """
+    ignore = [*VOLATILE_COLUMNS, "Duration", "Rate", "_Mask"]
+    return pd.util.hash_pandas_object(df[sorted(df.columns.difference(ignore))], index=False)
+
+
 ################################################################################
 
 
@@ -109,38 +239,168 @@ def read_nationalities(c):
 ################################################################################
 
 
-def _merge_id(book):
-    """Generate a merge key for $book."""
+# the columns used to work out how to merge books
+_MERGE_INPUTS = ["Author", "Title", "Shelf", "Category"]
+_MERGE_OUTPUTS = ["Volume", "MergeId", "MergedTitle"]
+
+
+def _merge_info(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the Volume, MergeId and canonical MergedTitle for each of the books in $df."""
     # groups share the same author and title, but have distinct, non-null volumes.
     # FIXME want to work **without** metadata or the ebook titles will be broken.
-    # FIXME generate these as part of metadata.rebuild()? would also solve the
-    # problem above if we extract the volume/title at the same time...
-    if book.Shelf == "kindle":
-        cleaned = _ebook_parse_title(book.Title)
-        title = cleaned.Title
-        volume = cleaned.Volume
-    else:
-        title, volume = re.match("(?P<Title>.+?)(?: (?P<Volume>I+))?$", book.Title).groups()
+    split = _split_titles(df)
+    has_volume = split.Volume.notna()
+    articles = (df.Shelf == "kindle") & (df.Category == "articles")
+
+    return pd.DataFrame(
+        {
+            "Volume": split.Volume,
+            # [author, canonical title], but only if there's a volume number.
+            "MergeId": (df.Author.astype(str) + "|" + split.Title.astype(str)).where(has_volume),
+            # articles are left alone
+            "MergedTitle": split.Title.where(~articles, df.Title),
+        },
+        columns=_MERGE_OUTPUTS,
+    )
+
+
+# shelves in order of preference when choosing which copy of a book to keep
+_SHELF_PRIORITY = [
+    "currently-reading",
+    "read",
+    "pending",
+    "elsewhere",
+    "library",
+    "ebooks",
+    "kindle",
+    "to-read",
+]
+
+
+def _normalise(s: pd.Series) -> pd.Series:
+    """Return $s casefolded, with punctuation and extra whitespace removed."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # only need to normalise each distinct value once
+        categories = _normalise(pd.Series(s.cat.categories)).to_numpy()
+        codes = s.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, categories[codes], ""), index=s.index)
+
+    return (
+        s.fillna("").astype(str).str.casefold().str.replace(r"[\W_]+", " ", regex=True).str.strip()
+    )
+
+
+def _dedup_keys(df: pd.DataFrame) -> npt.NDArray[np.uint64]:
+    """Return a hash identifying the work each of the books in $df is a copy of.
+
+    Books are the same work if they share a Work ID, or failing that, the same
+    (normalised) author and title.
+    """
+    author, title = _normalise(df.Author), _normalise(df.Title)
+    names = (author + "|" + title).where((author != "") & (title != ""))
+
+    # books without a Work pick it up from any other copy with the same name
+    has_work = df.Work.notna()
+    works = pd.Series(df.Work[has_work].to_numpy(), index=names[has_work])
+    works = works[works.index.notna() & ~works.index.duplicated()]
+    work = df.Work.where(has_work, names.map(works))
+
+    keys = np.where(
+        work.notna(),
+        "w:" + work.astype(str),
+        np.where(names.notna(), "n:" + names.astype(str), "i:" + df.index.astype(str)),
+    )
+    hashes: npt.NDArray[np.uint64] = pd.util.hash_array(keys.astype(object))
+    return hashes
+
+
+def _dedup(df: pd.DataFrame) -> npt.NDArray[np.intp]:
+    """Return the (sorted) positions of the books in $df to keep after deduplication.
+
+    Entries on the read shelves are always kept, since they're a record of a
+    reading rather than a copy.  Of the rest, only the copy on the most
+    preferred shelf is kept, and only if the work hasn't been read.
+    """
+    keys = _dedup_keys(df)
+    priority = pd.Categorical(df.Shelf, categories=_SHELF_PRIORITY).codes
+    priority = np.where(priority < 0, len(_SHELF_PRIORITY), priority).astype(np.int8)
 
-    # [author, canonical title], but only if there's a volume number.
-    return f"{book.Author}|{title}" if volume else book.name
+    # stable, so copies on the same shelf keep their order
+    order = np.argsort(priority, kind="stable")
+    first = ~pd.Series(keys[order]).duplicated().to_numpy()
+    read = df.Shelf.isin(["read", "currently-reading"]).to_numpy()[order]
 
+    return np.sort(order[first | read])
 
-def _merged_title(book):
-    """Return the canonical title for $book."""
-    if book.Shelf == "kindle":
-        return _ebook_parse_title(book.Title).Title if book.Category != "articles" else book.Title
-    else:
-        return re.match("(?P<Title>.+?)(?: (?P<Volume>I+))?$", book.Title).group("Title")
+
+# a filter over the (unmerged) books, returning a boolean mask
+Predicate = Callable[[pd.DataFrame], pd.Series]
+
+
+class _Filters(ABC):
+    """Filtering methods shared by Collection and View.
+
+    Each filter is expressed as a predicate, and subclasses decide what
+    $_filter does with it.
+    """
+
+    @abstractmethod
+    def _filter(self, predicate: Predicate) -> Self:
+        """Select only the books for which $predicate is true."""
+
+    def _filter_list(self, col: str, selection: Sequence[str], exclude: bool) -> Self:
+        if not selection:
+            return self
+        return self._filter(lambda df: df[col].isin(selection) ^ exclude)
+
+    def shelves(self, *selection: str, exclude: bool = False) -> Self:
+        """Filter the collection by shelf."""
+        return self._filter_list("Shelf", selection, exclude)
+
+    def languages(self, *selection: str, exclude: bool = False) -> Self:
+        """Filter the collection by language."""
+        return self._filter_list("Language", selection, exclude)
+
+    def categories(self, *selection: str, exclude: bool = False) -> Self:
+        """Filter the collection by category."""
+        return self._filter_list("Category", selection, exclude)
+
+    def borrowed(self, state: bool | None = None) -> Self:
+        """Filter the collection by borrowed status."""
+        # FIXME None so the caller doesn't have to care if it was actually set
+        if state is None:
+            return self
+        return self._filter(lambda df: df.Borrowed == state)
+
+    def scheduled(self, *, exclude: bool = False) -> Self:
+        """Filter the collection by scheduled status."""
+        return self._filter(lambda df: df.Scheduled.notna() ^ exclude)
+
+    def scheduled_at(self, date: dt.date) -> Self:
+        """Select only books scheduled to be read at $date."""
+        return self._filter(lambda df: (df.Scheduled.dt.year == date.year) & (df.Scheduled <= date))
 
 
 @attr.s
-class Collection:
+class Collection(_Filters):
     """A collection of books."""
 
     _df = attr.ib(repr=lambda df: f"[{len(df)} books]")
     merge = attr.ib(default=False, kw_only=True)
     dedup = attr.ib(default=False, kw_only=True)
+    # the merged books (without _Mask), and the index of the merged book for
+    # each book in _df
+    _merge_cache: tuple[pd.DataFrame, npt.NDArray[np.intp]] | None = attr.ib(
+        default=None, init=False, repr=False, eq=False
+    )
+    # the positions of the merged books that survive deduplication
+    _dedup_cache: npt.NDArray[np.intp] | None = attr.ib(
+        default=None, init=False, repr=False, eq=False
+    )
+    # previously-calculated merge information, as returned by merge_info()
+    _volumes: pd.DataFrame | None = attr.ib(default=None, kw_only=True, repr=False, eq=False)
+    # previously-calculated row hashes, as returned by hashes()
+    _hashes: pd.Series | None = attr.ib(default=None, kw_only=True, repr=False, eq=False)
 
     @dedup.validator
     def _validate_dedup_has_merge(self, _attribute, _value) -> None:
@@ -163,19 +423,45 @@ class Collection:
     @classmethod
     def from_dir(
         cls,
-        csv_dir: str = "data",
+        csv_dir: str | Path = "data",
         fixes: bool = True,
         metadata: bool = True,
+        cache: bool = True,
         **kwargs,
     ) -> Self:
-        """Create a collection from the contents of $csv_dir."""
-        return cls.from_store(
-            store=Store(csv_dir),
-            config=Config.from_file(Path(csv_dir, "config.yml")),
-            fixes=fixes,
-            metadata=metadata,
-            **kwargs,
-        )
+        """Create a collection from the contents of $csv_dir.
+
+        If $cache is set, the assembled dataframe is snapshotted in $csv_dir
+        and kept in memory, and reused until any of the files it was created
+        from change.  Otherwise nothing is written to $csv_dir, not even the
+        columnar copies of the CSVs.
+        """
+        store = Store(csv_dir, columnar=cache)
+        path = _snapshot_path(Path(csv_dir).resolve(), fixes=fixes, metadata=metadata)
+        key = _fingerprint(Path(csv_dir))
+
+        if cache and (resident := _RESIDENT.get(path)) and resident[0] == key:
+            _, df, volumes, hashes = resident
+            return cls(df, volumes=volumes, hashes=hashes, **kwargs)
+
+        snapshot = _load_snapshot(path, key) if cache else None
+        if snapshot is None:
+            df = cls._assemble(
+                store=store,
+                config=Config.from_file(Path(csv_dir, "config.yml")),
+                fixes=fixes,
+                metadata=metadata,
+            )
+            hashes = _row_hashes(df)
+            if cache:
+                _save_snapshot(path, key, df, hashes)
+        else:
+            df, hashes = snapshot
+
+        if cache:
+            _RESIDENT[path] = (key, df, store.volumes, hashes)
+
+        return cls(df, volumes=store.volumes, hashes=hashes, **kwargs)
 
     @classmethod
     def from_store(
@@ -187,6 +473,15 @@ class Collection:
         **kwargs,
     ) -> Self:
         """Create a Collection from a Store object."""
+        return cls(
+            cls._assemble(store, config, fixes=fixes, metadata=metadata),
+            volumes=store.volumes,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _assemble(store: Store, config: Config, fixes: bool, metadata: bool) -> pd.DataFrame:
+        """Combine the tables in $store into a single dataframe."""
         gr_df = store.goodreads
         ebooks_df = expand_ebooks(store.ebooks, words_per_page=config("kindle.words_per_page"))
 
@@ -208,29 +503,98 @@ class Collection:
             df.update(store.scraped)
             df.update(_process_fixes(config("fixes")))
 
-        return cls(df, **kwargs)
+        return set_dtypes(df)
 
     def reset(self) -> Self:
         """Reset the state of the collection."""
         self._df["_Mask"] = True
+        self._merge_cache = None
+        self._dedup_cache = None
         return self
 
+    def hashes(self) -> pd.Series:
+        """Return a hash of the contents of each (unmerged) book.
+
+        Volatile columns aren't included, so books whose hashes match can be
+        assumed not to have changed in any interesting way.
+        """
+        if self._hashes is None:
+            self._hashes = _row_hashes(self._df)
+        return self._hashes
+
     ### Merging/dedup ##########################################################
 
+    def merge_info(self) -> pd.DataFrame:
+        """Return the information needed to merge the books, suitable for storing.
+
+        Stored information is reused for any books whose details haven't changed.
+        The BookIds are converted to strings, since they are a mixture of
+        goodreads IDs and ebook paths.
+        """
+        df = self._df
+        keys = df.index.astype(str)
+        info = pd.DataFrame(index=df.index, columns=_MERGE_OUTPUTS, dtype=object)
+        stale = np.ones(len(df), dtype=bool)
+
+        if self._volumes is not None and not self._volumes.empty:
+            volumes = self._volumes
+            stored = volumes.index.astype(str)
+            known = volumes.set_axis(stored).reindex(keys).set_axis(df.index)
+            # empty strings are missing once they've been saved and loaded again
+            old = known[_MERGE_INPUTS].astype(object).fillna("")
+            new = df[_MERGE_INPUTS].astype(object).fillna("")
+            same = (old == new).all(axis="columns").to_numpy() & keys.isin(stored)
+            info[same] = known.loc[same, _MERGE_OUTPUTS].to_numpy()
+            stale = ~same
+
+        if stale.any():
+            info[stale] = _merge_info(df[stale]).to_numpy()
+
+        return pd.concat([df[_MERGE_INPUTS], info], axis="columns").set_axis(keys)
+
+    def _merge(self) -> tuple[pd.DataFrame, npt.NDArray[np.intp]]:
+        """Merge the books, or return the cached results if they're still valid."""
+        if self._merge_cache is None:
+            info = self.merge_info()
+            df = self._df.drop(columns="_Mask").assign(
+                MergeId=np.where(info.MergeId.notna(), info.MergeId, self._df.index),
+                Title=info.MergedTitle.to_numpy(),
+            )
+            groups = df.groupby("MergeId", sort=False).ngroup().to_numpy()
+
+            # the mask is dealt with separately so filtering doesn't require re-merging
+            preferences = merge_preferences()
+            del preferences["_Mask"]
+
+            merged = (
+                df.reset_index()
+                .groupby("MergeId", as_index=False, sort=False)
+                .aggregate(preferences)
+                .set_index("BookId")
+                .assign(Entry=None)  # FIXME do something about Entry?
+            )
+            self._merge_cache = (merged, groups)
+
+        return self._merge_cache
+
+    def _merged_mask(self, mask: npt.NDArray[np.bool_] | None = None) -> npt.NDArray[np.bool_]:
+        """Return the mask for the merged books: selected if any of their volumes are."""
+        if mask is None:
+            mask = self._df["_Mask"].to_numpy()
+        merged, groups = self._merge()
+        selected = np.bincount(groups, weights=mask, minlength=len(merged))
+        return selected > 0
+
+    def _deduped(self) -> npt.NDArray[np.intp]:
+        """Return the positions of the merged books to keep when deduplicating."""
+        if self._dedup_cache is None:
+            self._dedup_cache = _dedup(self._merge()[0])
+        return self._dedup_cache
+
     def _merged(self):
         """Return all the books, merged."""
-        df = self._df.assign(
-            MergeId=self._df.apply(_merge_id, axis="columns"),
-            Title=self._df.apply(_merged_title, axis="columns"),
-        )
-
-        return (
-            df.reset_index()
-            .groupby("MergeId", as_index=False, sort=False)
-            .aggregate(merge_preferences())
-            .set_index("BookId")
-            .assign(Entry=None)  # FIXME do something about Entry?
-        )
+        merged, _ = self._merge()
+        return merged.assign(_Mask=self._merged_mask())
 
     ### Scheduling #############################################################
 
@@ -265,6 +629,9 @@ class Collection:
                 # FIXME warn
                 sched = sched[~sched.index.duplicated(keep="last")]
             self._df.update(sched)
+            self._merge_cache = None
+            self._dedup_cache = None
+            self._hashes = None
 
         return self
 
@@ -273,65 +640,118 @@ class Collection:
     @property
     def all(self):
         """Return a dataframe of all books in this collection."""
-        # FIXME handle dedup
-        df = self._merged() if self.merge else self._df
-        return df.drop("_Mask", axis="columns")
+        if self.merge:
+            merged, _ = self._merge()
+            if self.dedup:
+                return merged.iloc[self._deduped()]
+            return merged.copy()
+        return self._df.drop("_Mask", axis="columns")
 
     # FIXME rename to something better?
     @property
     def df(self):
         """Return a dataframe of all selected books."""
-        # FIXME handle dedup
-        df = self._merged() if self.merge else self._df
-        return df[df["_Mask"]].drop("_Mask", axis="columns")
+        return self._select(self._df["_Mask"].to_numpy())
+
+    def _select(self, mask: npt.NDArray[np.bool_]) -> pd.DataFrame:
+        """Return the books selected by $mask, which applies to the unmerged books.
+
+        When deduplicating, the copies to keep are chosen from the whole
+        collection before $mask is applied, so filtering never brings back a
+        copy that was removed: selecting the shelf of a less preferred copy
+        (or an unread copy of a book that's been read) won't include it.
+        """
+        if self.merge:
+            merged, _ = self._merge()
+            selected = self._merged_mask(mask)
+            # copied so that changes to the result don't reach the cached books
+            if self.dedup:
+                kept = self._deduped()
+                return merged.iloc[kept[selected[kept]]].copy()
+            return merged[selected].copy()
+        return self._df[mask].drop("_Mask", axis="columns")
 
     @property
     def read(self):
         """Return a dataframe of books that have been read or are currently being read."""
         # FIXME this would include merge and dedup, but do we want this?
-        return self.all[self.all.Shelf.isin(["read", "currently-reading"])]
+        df = self.all
+        return df[df.Shelf.isin(["read", "currently-reading"])]
 
     ### Filtering ##############################################################
 
-    def _filter_list(self, col: str, selection: Sequence[str], exclude: bool) -> Self:
-        if selection:
-            self._df["_Mask"] &= self._df[col].isin(selection) ^ exclude
+    def _filter(self, predicate: Predicate) -> Self:
+        self._df["_Mask"] &= np.asarray(predicate(self._df), dtype=bool)
         return self
 
-    def shelves(self, *selection: str, exclude: bool = False) -> Self:
-        """Filter the collection by shelf."""
-        return self._filter_list("Shelf", selection, exclude)
+    def view(self) -> View:
+        """Return an immutable view of the currently-selected books.
 
-    def languages(self, *selection: str, exclude: bool = False) -> Self:
-        """Filter the collection by language."""
-        return self._filter_list("Language", selection, exclude)
+        The selection is fixed when the view is created, so later filtering
+        of the collection doesn't affect it.
+        """
+        return View(self, self._df["_Mask"].to_numpy(copy=True))
 
-    def categories(self, *selection: str, exclude: bool = False) -> Self:
-        """Filter the collection by category."""
-        return self._filter_list("Category", selection, exclude)
 
-    def borrowed(self, state: Optional[bool] = None) -> Self:
-        """Filter the collection by borrowed status."""
-        # FIXME None so the caller doesn't have to care if it was actually set
-        if state is not None:
-            self._df["_Mask"] &= self._df.Borrowed == state
-        return self
+@attr.s(frozen=True)
+class View(_Filters):
+    """An immutable, lazily-evaluated selection of the books in a collection.
 
-    def scheduled(self, *, exclude: bool = False) -> Self:
-        """Filter the collection by scheduled status."""
-        self._df["_Mask"] &= self._df.Scheduled.notna() ^ exclude
-        return self
+    Filters return a new view rather than changing this one, so views are
+    cheap to fork and can share a single base collection.  The predicates
+    are only evaluated when the books are accessed.
+    """
 
-    def scheduled_at(self, date: dt.date) -> Self:
-        """Select only books scheduled to be read at $date."""
-        self._df["_Mask"] &= (self._df.Scheduled.dt.year == date.year) & (
-            self._df.Scheduled <= date
-        )
-        return self
+    collection: Collection = attr.ib()
+    # the books that were selected in the collection when the view was created
+    _base: npt.NDArray[np.bool_] = attr.ib(repr=False, eq=False)
+    _predicates: tuple[Predicate, ...] = attr.ib(
+        default=(), repr=lambda predicates: str(len(predicates))
+    )
+
+    def _filter(self, predicate: Predicate) -> Self:
+        return attr.evolve(self, predicates=(*self._predicates, predicate))
+
+    def _apply(self, mask: npt.NDArray[np.bool_]) -> npt.NDArray[np.bool_]:
+        """Return $mask with the predicates of this view applied."""
+        df = self.collection._df  # pylint: disable=protected-access  # noqa: SLF001
+        for predicate in self._predicates:
+            mask &= np.asarray(predicate(df), dtype=bool)
+        return mask
+
+    def mask(self) -> npt.NDArray[np.bool_]:
+        """Return the mask of the selected books in the (unmerged) collection."""
+        return self._apply(self._base.copy())
+
+    @property
+    def all(self):
+        """Return a dataframe of all books in the underlying collection."""
+        return self.collection.all
+
+    @property
+    def df(self):
+        """Return a dataframe of all selected books."""
+        collection = self.collection
+        return collection._select(self.mask())  # pylint: disable=protected-access  # noqa: SLF001
+
+    @property
+    def read(self):
+        """Return a dataframe of books that have been read or are currently being read.
+
+        Like Collection.read, this ignores the selection the view was created
+        from, but the filters applied to the view itself are respected.
+        """
+        collection = self.collection
+        mask = self._apply(np.ones(len(self._base), dtype=bool))
+        df = collection._select(mask)  # pylint: disable=protected-access  # noqa: SLF001
+        return df[df.Shelf.isin(["read", "currently-reading"])]
 
 
 ################################################################################
 
 if __name__ == "__main__":
+    pd.set_option("display.max_rows", None)
+    pd.set_option("display.width", None)
+
     print(Collection.from_dir().df.drop("AvgRating", axis="columns"))
     print(Collection.from_dir().df.dtypes)
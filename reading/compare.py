@@ -4,22 +4,29 @@
 
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterable, Mapping, Sequence
+import contextlib
+import datetime as dt
 from enum import Enum
+import json
+from pathlib import Path
 from string import Formatter
-from typing import Any, Iterable, Optional, Union
+import sys
+from typing import Any, Callable, TextIO
 
-from attr import define
+from attr import define, field
 from jinja2 import Template
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
 from typing_extensions import Self
 
-from .collection import Collection
+from .collection import VOLATILE_COLUMNS, Collection
 
 
-IGNORE_COLUMNS = [
-    "AvgRating",
-]
+# these are also left out of the row hashes, so books which only differ in
+# them can be skipped without being compared
+IGNORE_COLUMNS = VOLATILE_COLUMNS
 
 ################################################################################
 
@@ -74,8 +81,10 @@ class ChangeEvent(Enum):
 class Change:
     """A change between two (hopefully equivalent) book entries."""
 
-    old: Optional[pd.Series]
-    new: Optional[pd.Series]
+    old: pd.Series | None
+    new: pd.Series | None
+    # the type of change, if it's already been worked out
+    _event: ChangeEvent | None = field(default=None, kw_only=True, eq=False, repr=False)
 
     def change(self, field: str) -> ChangedField:
         """Return an object representing the change of column $field."""
@@ -121,6 +130,8 @@ class Change:
     @property
     def event(self) -> ChangeEvent:
         """Return an enum indicating what sort of change is involved."""
+        if self._event is not None:
+            return self._event
         return (
             ChangeEvent.STARTED
             if self.is_started
@@ -148,6 +159,44 @@ class Change:
         assert (book := self.new if self.new is not None else self.old) is not None
         return book
 
+    def asdict(self, ignore_columns: Sequence[str] = ()) -> dict[str, Any]:
+        """Return a JSON-compatible description of this change.
+
+        Added and removed books include all their fields, and modified books
+        the fields that have changed, except for those in $ignore_columns.
+
+        The Id is the book's BookId, unless it was matched on its Work instead
+        (as added and removed books are, so different editions of the same
+        work count as a change), in which case it's the Work ID.
+        """
+        book = self.book
+        record = {
+            "event": self.event.value,
+            "Id": _jsonable(book.name),
+            "Author": _jsonable(book.Author),
+            "Title": _jsonable(book.Title),
+        }
+        if self.is_added or self.is_removed:
+            record["book"] = {field: _jsonable(value) for field, value in book.items()}
+        else:
+            record["changes"] = {
+                change.name: [_jsonable(change.old), _jsonable(change.new)]
+                for change in self.changes()
+                if change.name not in ignore_columns
+            }
+        return record
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert $value to something that can be serialised as JSON."""
+    if pd.api.types.is_scalar(value) and pd.isna(value):
+        return None
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
 
 ################################################################################
 
@@ -207,7 +256,7 @@ class BookFormatter(Formatter):
 
     def get_value(
         self,
-        key: Union[int, str],
+        key: int | str,
         args: Sequence[Any],
         kwargs: Mapping[str, FormattedValue],
     ) -> FormattedValue:
@@ -350,15 +399,15 @@ class ChangeStyler:
         lines = [self._header(change)]
 
         # statements
-        for field in statements:
+        for column in statements:
             # special-case for SeriesEntry: it falls back to plain Series if
             # Entry is null, and is skipped altogther if Series is also missing
-            if field == "SeriesEntry":
+            if column == "SeriesEntry":
                 if pd.isna(book.Series):
                     continue
                 if pd.isna(book.Entry):
-                    field = "Series"
-            lines.append(self.style.prefix + self._statement(book, field))
+                    column = "Series"
+            lines.append(self.style.prefix + self._statement(book, column))
 
         # these changes are implied by starting/finishing
         if change.is_started or change.is_finished:
@@ -393,14 +442,96 @@ class ChangeStyler:
 
         return "\n".join(lines)
 
+    def render_json(self, change: Change) -> str:
+        """Return $change as a line of JSON."""
+        return json.dumps(change.asdict(self.ignore_columns), ensure_ascii=False)
+
+
+def write_changes(
+    changes: Iterable[Change],
+    *renderers: tuple[Callable[[Change], str], TextIO],
+) -> int:
+    """Write each of $changes as soon as it's available, and return how many there were.
+
+    Each change is rendered and written by each of the (render, file) pairs in
+    $renderers, so the comparison only needs to be run once however many
+    formats are wanted.
+    """
+    count = 0
+    for change in changes:
+        for render, file in renderers:
+            print(render(change), file=file, flush=True)
+        count += 1
+    return count
+
 
 ################################################################################
 
 
+def _changed_fields(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Return a mask of the fields that differ between $old and $new, which must be aligned."""
+    # categoricals can only be compared if they have the same categories, and
+    # columns whose dtypes differ (eg. one that's entirely null on one side)
+    # can't be compared directly either
+    mismatched = [
+        col
+        for col in new.columns
+        if old[col].dtype != new[col].dtype
+        or isinstance(old[col].dtype, pd.CategoricalDtype)
+        or isinstance(new[col].dtype, pd.CategoricalDtype)
+    ]
+    old = old.astype(dict.fromkeys(mismatched, object))
+    new = new.astype(dict.fromkeys(mismatched, object))
+
+    return ~((old == new).fillna(False) | (old.isna() & new.isna()))
+
+
+def _events(old: pd.Series | None, new: pd.Series | None) -> npt.NDArray[np.object_]:
+    """Return the ChangeEvent for each book moving from shelf $old to shelf $new.
+
+    Either can be None for books that have been added or removed.  The books
+    are assumed to have changed.
+    """
+    if new is None:
+        assert old is not None
+        return np.full(len(old), ChangeEvent.REMOVED, dtype=object)
+
+    moved = np.ones(len(new), dtype=bool) if old is None else (old != new).fillna(True).to_numpy()
+    shelf = new.astype(object).to_numpy()
+
+    events = np.full(
+        len(new), ChangeEvent.ADDED if old is None else ChangeEvent.MODIFIED, dtype=object
+    )
+    events[moved & (shelf == "currently-reading")] = ChangeEvent.STARTED
+    events[moved & (shelf == "read")] = ChangeEvent.FINISHED
+    return events
+
+
+def _unchanged(c_old: Collection, c_new: Collection) -> pd.Index:
+    """Return the books which can be seen from their hashes not to have changed."""
+    if c_old.merge or c_new.merge:
+        # the hashes are of the unmerged books
+        return pd.Index([])
+
+    old, new = c_old.hashes(), c_new.hashes()
+    common = old.index.intersection(new.index)
+    return common[old.loc[common].to_numpy() == new.loc[common].to_numpy()]
+
+
+def _distinct(books: pd.DataFrame, works: pd.Index) -> pd.DataFrame:
+    """Return the distinct $books with the given $works, in the same order as $works.
+
+    $books is indexed by Work, which may not be unique.
+    """
+    books = books.iloc[books.index.get_indexer_for(works)]
+    return books[~books.duplicated().to_numpy()]
+
+
 # actually perform the comparison
 def _compare(c_old: Collection, c_new: Collection) -> Iterable[Change]:
-    old = c_old.all.convert_dtypes()
-    new = c_new.all.convert_dtypes()
+    unchanged = _unchanged(c_old, c_new)
+    old = c_old.all.drop(unchanged).convert_dtypes()
+    new = c_new.all.drop(unchanged).convert_dtypes()
 
     # FIXME
     old = old.reindex(columns=new.columns)
@@ -409,13 +540,20 @@ def _compare(c_old: Collection, c_new: Collection) -> Iterable[Change]:
     new_indices = new.index.difference(old.index)
     old_indices = old.index.difference(new.index)
 
-    # changed
-    for index in common_indices:
-        change = Change(old.loc[index], new.loc[index])
-        # FIXME
-        mask = change._change_mask  # pylint: disable=protected-access  # noqa: SLF001
-        if change.is_modified and mask.drop(IGNORE_COLUMNS).any():
-            yield change
+    # changed, ignoring books where only unimportant columns have changed
+    before, after = old.loc[common_indices], new.loc[common_indices]
+    changed = (
+        _changed_fields(before, after)
+        .drop(columns=IGNORE_COLUMNS, errors="ignore")
+        .any(axis="columns")
+    )
+    before, after = before[changed.to_numpy(dtype=bool)], after[changed.to_numpy(dtype=bool)]
+    for (_, book_old), (_, book_new), event in zip(
+        before.iterrows(),
+        after.iterrows(),
+        _events(before.Shelf, after.Shelf),
+    ):
+        yield Change(book_old, book_new, event=event)
 
     # added/removed/changed edition
 
@@ -429,39 +567,58 @@ def _compare(c_old: Collection, c_new: Collection) -> Iterable[Change]:
     old_indices = old.index.difference(new.index)
 
     # added
-    added = new.loc[new_indices].drop_duplicates()
-    yield from (Change(None, book) for _, book in added.iterrows())
+    added = _distinct(new, new_indices)
+    yield from (
+        Change(None, book, event=event)
+        for (_, book), event in zip(added.iterrows(), _events(None, added.Shelf))
+    )
 
     # removed
-    removed = old.loc[old_indices].drop_duplicates()
-    yield from (Change(book, None) for _, book in removed.iterrows())
+    removed = _distinct(old, old_indices)
+    yield from (
+        Change(book, None, event=event)
+        for (_, book), event in zip(removed.iterrows(), _events(removed.Shelf, None))
+    )
 
     # general changes
     for index in set(common_indices):
         yield Change(old.loc[index], new.loc[index])
 
 
-def compare(old: Collection, new: Collection) -> None:  # pragma: no cover
-    """Compare two Collections and print the formatted results."""
+def compare(
+    old: Collection,
+    new: Collection,
+    json_path: Path | None = None,
+) -> None:  # pragma: no cover
+    """Compare two Collections and print the formatted results.
+
+    If $json_path is given, the changes are also written there as JSON Lines.
+    """
     # FIXME customise this using the config
     styler = ChangeStyler(BookFormatter(new.df.dtypes, ValueFormats()))
 
-    try:
-        changes = list(_compare(old, new))
-    except Exception:  # pylint: disable=broad-except
-        import traceback
+    with contextlib.ExitStack() as stack:
+        renderers = [(styler.render, sys.stdout)]
+        if json_path:
+            renderers.append(
+                (styler.render_json, stack.enter_context(open(json_path, "w", encoding="utf-8")))
+            )
 
-        print(traceback.format_exc())
-        changes = []
+        try:
+            count = write_changes(_compare(old, new), *renderers)
+        except Exception:  # pylint: disable=broad-except
+            import traceback
 
-    if changes:
-        print("\n".join(styler.render(change) for change in changes))
+            print(traceback.format_exc())
+            count = 0
+
+    if count:
         print("----")
 
     changes = list(
         _compare_with_work(
-            old.all.fillna(""),
-            new.all.fillna(""),
+            old.all.astype(object).fillna(""),
+            new.all.astype(object).fillna(""),
         )
     )
     if changes:
@@ -650,6 +807,7 @@ def main() -> None:  # pragma: no cover
     parser = argparse.ArgumentParser()
     parser.add_argument("--goodreads")
     parser.add_argument("--ebooks")
+    parser.add_argument("--json", type=Path)
 
     args = parser.parse_args()
 
@@ -664,6 +822,7 @@ def main() -> None:  # pragma: no cover
     compare(
         old=Collection.from_store(store, config),
         new=Collection.from_dir(),
+        json_path=args.json,
     )
 
 
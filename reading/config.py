@@ -42,32 +42,37 @@ _COLUMNS: list[Column] = [
     },
     {
         "name": "Author",
-        "store": ["goodreads", "ebooks", "books", "authors"],
+        "store": ["goodreads", "ebooks", "books", "authors", "volumes"],
+        "type": "category",
         "merge": "first",
     },
     {
         "name": "AuthorId",
         "store": ["goodreads", "books"],
+        "type": "int",
         "merge": "first",
     },
     {
         "name": "Title",
-        "store": ["goodreads", "ebooks", "books"],
+        "store": ["goodreads", "ebooks", "books", "volumes"],
         "merge": "first",
     },
     {
         "name": "Work",
         "store": ["goodreads", "books"],
+        "type": "int",
         "merge": "first",
     },
     {
         "name": "Shelf",
-        "store": ["goodreads"],
+        "store": ["goodreads", "volumes"],
+        "type": "category",
         "merge": "first",
     },
     {
         "name": "Category",
-        "store": ["goodreads", "ebooks", "books"],
+        "store": ["goodreads", "ebooks", "books", "volumes"],
+        "type": "category",
         "merge": "first",
     },
     {
@@ -79,16 +84,19 @@ _COLUMNS: list[Column] = [
     {
         "name": "Borrowed",
         "store": ["goodreads"],
+        "type": "bool",
         "merge": "first",
     },
     {
         "name": "Series",
         "store": ["goodreads", "books"],
+        "type": "category",
         "merge": "first",
     },
     {
         "name": "SeriesId",
         "store": ["goodreads", "books"],
+        "type": "int",
         "merge": "first",
     },
     {
@@ -98,6 +106,7 @@ _COLUMNS: list[Column] = [
     {
         "name": "Binding",
         "store": ["goodreads", "scraped"],
+        "type": "category",
         "merge": "first",
     },
     {
@@ -109,6 +118,7 @@ _COLUMNS: list[Column] = [
     {
         "name": "Language",
         "store": ["goodreads", "ebooks"],
+        "type": "category",
         "merge": "first",
     },
     {
@@ -149,20 +159,39 @@ _COLUMNS: list[Column] = [
         "store": ["goodreads"],
         "merge": "first",
     },
+    {
+        "name": "Updated",
+        "store": ["goodreads"],
+        "type": "date",
+    },
     {
         "name": "Gender",
         "store": ["authors"],
+        "type": "category",
         "merge": "first",
     },
     {
         "name": "Nationality",
         "store": ["authors"],
+        "type": "category",
         "merge": "first",
     },
     {
         "name": "Description",
         "store": ["authors"],
     },
+    {
+        "name": "Volume",
+        "store": ["volumes"],
+    },
+    {
+        "name": "MergeId",
+        "store": ["volumes"],
+    },
+    {
+        "name": "MergedTitle",
+        "store": ["volumes"],
+    },
     {
         "name": "_Mask",
         "store": [],
@@ -182,6 +211,23 @@ def date_columns(store: str) -> list[str]:
     return [col["name"] for col in _COLUMNS if store in col["store"] and col.get("type") == "date"]
 
 
+# pandas dtypes for each of the column types, apart from dates
+_DTYPES = {
+    "category": "category",
+    "int": "Int64",
+    "bool": "boolean",
+}
+
+
+def column_dtypes(store: str | None = None) -> dict[str, str]:
+    """Return the dtypes of the (non-date) columns in $store, or in all stores."""
+    return {
+        col["name"]: _DTYPES[col["type"]]
+        for col in _COLUMNS
+        if col.get("type") in _DTYPES and (store is None or store in col["store"])
+    }
+
+
 def merge_preferences() -> dict[str, str]:
     """Return a dict specifying how volumes of the same book should be merged."""
     return {"BookId": "first"} | {col["name"]: col["merge"] for col in _COLUMNS if "merge" in col}
@@ -248,6 +294,10 @@ def category_patterns() -> tuple[list[list[str]], list[list[str]]]:
 ################################################################################
 
 _DEFAULTS = {
+    "goodreads.cache": "tmp_cache/goodreads.sqlite",
+    "goodreads.rate": 1,
+    "goodreads.workers": 4,
+    "kindle.cache": "tmp_cache/ebooks.sqlite",
     "kindle.words_per_page": 390,
     "scheduled": [],
 }
@@ -0,0 +1,305 @@
+# vim: ts=4 : sw=4 : et
+
+"""Reading the title, authors and language of ebooks, without calibre.
+
+These only parse the metadata rather than the whole ebook, so they're much
+quicker than calibre, but they only know about the formats that end up on the
+Kindle: MOBI/AZW3, EPUB, PDF and plain text.
+"""
+
+from __future__ import annotations
+
+import codecs
+from pathlib import Path
+import re
+import struct
+from typing import Any, Callable
+from xml.etree import ElementTree
+import zipfile
+
+
+# languages for the Windows locale IDs in MOBI headers, by primary language
+_MOBI_LANGUAGES = {
+    0x01: "ar",
+    0x04: "zh",
+    0x05: "cs",
+    0x06: "da",
+    0x07: "de",
+    0x08: "el",
+    0x09: "en",
+    0x0A: "es",
+    0x0B: "fi",
+    0x0C: "fr",
+    0x0D: "he",
+    0x0E: "hu",
+    0x10: "it",
+    0x11: "ja",
+    0x12: "ko",
+    0x13: "nl",
+    0x14: "no",
+    0x15: "pl",
+    0x16: "pt",
+    0x19: "ru",
+    0x1D: "sv",
+    0x1F: "tr",
+}
+
+# EXTH record types
+_EXTH_AUTHOR = 100
+_EXTH_TITLE = 503
+_EXTH_LANGUAGE = 524
+
+_NS = {
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf",
+    "dc": "http://purl.org/dc/elements/1.1/",
+}
+
+# name suffixes, which shouldn't be mistaken for forenames
+_SUFFIXES = {"jr", "jr.", "sr", "sr.", "ii", "iii", "iv", "père", "fils"}
+
+_PDF_ESCAPES = {
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"(": b"(",
+    b")": b")",
+    b"\\": b"\\",
+    b"\n": b"",
+    b"\r": b"",
+}
+
+################################################################################
+
+
+def placeholder(path: Path) -> dict[str, Any]:
+    """Return the metadata to use for $path when none can be found."""
+    return {"Title": path.stem, "Authors": ["Unknown"], "Languages": []}
+
+
+def _complete(path: Path, metadata: dict[str, Any]) -> dict[str, Any]:
+    """Fill in anything missing from $metadata."""
+    return {key: metadata.get(key) or default for key, default in placeholder(path).items()}
+
+
+def _author(name: str) -> str:
+    """Return $name with the forename first, if it's given as "Surname, Forename"."""
+    match = re.fullmatch(r"([^,]+?)\s*,\s+([^,]+)", name.strip())
+    if match and match[2].lower() not in _SUFFIXES:
+        return f"{match[2]} {match[1]}"
+    return name.strip()
+
+
+def _authors(names: list[str]) -> list[str]:
+    """Return the authors in $names, where each may list several separated by "&"."""
+    return [_author(author) for name in names for author in name.split("&") if author.strip()]
+
+
+################################################################################
+
+
+def _mobi(path: Path) -> dict[str, Any] | None:
+    """Read the MOBI header and EXTH records of $path (which might be AZW3)."""
+    with open(path, "rb") as fh:
+        header = fh.read(78)
+        if header[60:68] != b"BOOKMOBI":
+            return None
+        (count,) = struct.unpack_from(">H", header, 76)
+        offsets = struct.unpack(f">{count * 2}I", fh.read(8 * count))[::2]
+        fh.seek(offsets[0])
+        record = fh.read(offsets[1] - offsets[0] if count > 1 else -1)
+
+    if record[16:20] != b"MOBI":
+        return None
+    (length, encoding) = struct.unpack_from(">I4xI", record, 20)
+    (name_offset, name_length, locale) = struct.unpack_from(">III", record, 0x54)
+    (flags,) = struct.unpack_from(">I", record, 0x80)
+    charset = "utf-8" if encoding == 65001 else "cp1252"
+
+    exth: dict[int, list[str]] = {}
+    start = 16 + length
+    if flags & 0x40 and record[start : start + 4] == b"EXTH":
+        (entries,) = struct.unpack_from(">I", record, start + 8)
+        pos = start + 12
+        for _ in range(entries):
+            (kind, size) = struct.unpack_from(">II", record, pos)
+            data = record[pos + 8 : pos + size]
+            exth.setdefault(kind, []).append(data.decode(charset, errors="replace"))
+            pos += size
+
+    name = record[name_offset : name_offset + name_length].decode(charset, errors="replace")
+    language = _MOBI_LANGUAGES.get(locale & 0xFF)
+    return {
+        "Title": exth.get(_EXTH_TITLE, [name])[0],
+        "Authors": _authors(exth.get(_EXTH_AUTHOR, [])),
+        "Languages": exth.get(_EXTH_LANGUAGE) or ([language] if language else []),
+    }
+
+
+def _epub(path: Path) -> dict[str, Any] | None:
+    """Read the OPF package document of $path."""
+    with zipfile.ZipFile(path) as epub:
+        container = ElementTree.fromstring(epub.read("META-INF/container.xml"))
+        rootfile = container.find("container:rootfiles/container:rootfile", _NS)
+        if rootfile is None:
+            return None
+        opf = ElementTree.fromstring(epub.read(rootfile.attrib["full-path"]))
+
+    metadata = opf.find("opf:metadata", _NS)
+    if metadata is None:
+        return None
+
+    def text(tag: str, keep: Callable[[ElementTree.Element], bool] = lambda _: True) -> list[str]:
+        return [el.text.strip() for el in metadata.iterfind(tag, _NS) if el.text and keep(el)]
+
+    role = f"{{{_NS['opf']}}}role"
+    return {
+        "Title": next(iter(text("dc:title")), None),
+        # EPUB2 marks the role of each creator, and only the authors are wanted
+        "Authors": text("dc:creator", lambda el: el.get(role, "aut") == "aut"),
+        "Languages": text("dc:language"),
+    }
+
+
+def _pdf_string(data: bytes, pos: int) -> bytes | None:
+    """Return the string starting at $pos in $data, if there is one."""
+    if data[pos : pos + 1] == b"<":
+        end = data.index(b">", pos)
+        digits = re.sub(rb"\s", b"", data[pos + 1 : end])
+        return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+    if data[pos : pos + 1] != b"(":
+        return None
+
+    string = bytearray()
+    depth = 0
+    pos += 1
+    while True:
+        char = data[pos : pos + 1]
+        if not char:
+            raise ValueError("Unterminated string")
+        if char == b"\\":
+            escaped = data[pos + 1 : pos + 2]
+            if octal := re.match(rb"[0-7]{1,3}", data[pos + 1 : pos + 4]):
+                string.append(int(octal[0], 8) & 0xFF)
+                pos += 1 + len(octal[0])
+                continue
+            string += _PDF_ESCAPES.get(escaped, escaped)
+            pos += 2
+            continue
+        if char == b"(":
+            depth += 1
+        elif char == b")":
+            if not depth:
+                return bytes(string)
+            depth -= 1
+        string += char
+        pos += 1
+
+
+def _pdf_text(string: bytes) -> str:
+    """Decode a PDF text $string."""
+    if string.startswith(codecs.BOM_UTF16_BE):
+        return string[2:].decode("utf-16-be", errors="replace")
+    if string.startswith(codecs.BOM_UTF8):
+        return string[3:].decode("utf-8", errors="replace")
+    # near enough to PDFDocEncoding
+    return string.decode("latin-1")
+
+
+def _pdf_object(data: bytes, ref: re.Match[bytes] | None) -> bytes | None:
+    """Return the contents of the indirect object referred to by $ref."""
+    if ref is None:
+        return None
+    # the last definition wins, since it comes from the latest update
+    matches = re.findall(
+        rb"(?<![0-9])%s\s+%s\s+obj\b(.*?)endobj" % (ref[1], ref[2]), data, flags=re.DOTALL
+    )
+    return matches[-1] if matches else None
+
+
+def _pdf_value(data: bytes, obj: bytes | None, key: bytes) -> str | None:
+    """Return the string for $key in the dictionary $obj, which is from $data."""
+    if obj is None or not (match := re.search(rb"/%s\s*" % key, obj)):
+        return None
+    pos = match.end()
+    if ref := re.match(rb"(\d+)\s+(\d+)\s+R", obj[pos:]):
+        # stored in another object
+        obj = _pdf_object(data, ref)
+        if obj is None:
+            return None
+        pos = len(obj) - len(obj.lstrip())
+    string = _pdf_string(obj, pos)
+    return _pdf_text(string).strip() if string is not None else None
+
+
+def _last_ref(data: bytes, key: bytes) -> re.Match[bytes] | None:
+    """Return the last reference to $key in $data, which is the current one."""
+    refs = list(re.finditer(rb"/%s\s+(\d+)\s+(\d+)\s+R" % key, data))
+    return refs[-1] if refs else None
+
+
+def _pdf(path: Path) -> dict[str, Any] | None:
+    """Read the Info dictionary (and the language of the catalog) of $path."""
+    data = path.read_bytes()
+    if not data.startswith(b"%PDF") or re.search(rb"/Encrypt\b", data):
+        return None
+
+    info_ref = _last_ref(data, b"Info")
+    info = _pdf_object(data, info_ref)
+    if info_ref is not None and info is None:
+        # it's probably in a compressed object stream
+        return None
+    catalog = _pdf_object(data, _last_ref(data, b"Root"))
+    author = _pdf_value(data, info, b"Author")
+    language = _pdf_value(data, catalog, b"Lang")
+    return {
+        "Title": _pdf_value(data, info, b"Title"),
+        "Authors": _authors([author]) if author else [],
+        "Languages": [language] if language else [],
+    }
+
+
+def _txt(path: Path) -> dict[str, Any] | None:
+    """Text files don't have any metadata."""
+    return {}
+
+
+_READERS: dict[str, Callable[[Path], dict[str, Any] | None]] = {
+    ".azw": _mobi,
+    ".azw3": _mobi,
+    ".mobi": _mobi,
+    ".prc": _mobi,
+    ".epub": _epub,
+    ".pdf": _pdf,
+    ".txt": _txt,
+}
+
+################################################################################
+
+
+def read_metadata(path: Path) -> dict[str, Any] | None:
+    """Return the Title, Authors and Languages of the ebook at $path.
+
+    Returns None if its format isn't supported, or it couldn't be read.
+    """
+    reader = _READERS.get(path.suffix.lower())
+    if reader is None:
+        return None
+
+    try:
+        metadata = reader(path)
+    except (
+        OSError,
+        ValueError,
+        KeyError,
+        IndexError,
+        struct.error,
+        zipfile.BadZipFile,
+        ElementTree.ParseError,
+    ) as e:
+        print(f"Couldn't read the metadata from {path}: {e}")
+        return None
+
+    return _complete(path, metadata) if metadata is not None else None
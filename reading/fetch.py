@@ -0,0 +1,143 @@
+# vim: ts=4 : sw=4 : et
+
+"""Fetching from rate-limited HTTP APIs."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+import attr
+import requests
+from requests.adapters import HTTPAdapter
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# statuses that are worth retrying after a pause
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# errors that are worth retrying after a pause
+_RETRY_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    # goodreads sometimes gets stuck in redirect loops
+    requests.exceptions.TooManyRedirects,
+)
+
+################################################################################
+
+
+@attr.s
+class TokenBucket:
+    """Limit the rate of requests, while allowing short bursts.
+
+    Tokens are added at $rate per second, up to $capacity, and each request
+    uses one of them.  It's safe to share between threads.
+    """
+
+    rate: float = attr.ib()
+    capacity: float = attr.ib(default=1)
+    clock: Callable[[], float] = attr.ib(default=time.monotonic, repr=False)
+    sleep: Callable[[float], None] = attr.ib(default=time.sleep, repr=False)
+
+    _tokens: float = attr.ib(init=False, repr=False)
+    _updated: float = attr.ib(init=False, repr=False)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    def __attrs_post_init__(self) -> None:
+        self._tokens = self.capacity
+        self._updated = self.clock()
+
+    def acquire(self) -> None:
+        """Wait until a token is available, and use it."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # borrow against the future, so waiting threads are served in turn
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            self.sleep(wait)
+
+
+@attr.s
+class Fetcher:
+    """Fetch URLs over a shared session, at a limited rate and with retries.
+
+    Failed requests are retried up to $retries times, waiting $backoff seconds
+    before the first retry and doubling each time after that (or waiting as
+    long as the server asks).  map() runs a function over many items using a
+    pool of $workers threads, which is useful when each item needs several
+    requests.
+    """
+
+    rate: float = attr.ib(default=1)
+    burst: float = attr.ib(default=1)
+    workers: int = attr.ib(default=4)
+    retries: int = attr.ib(default=3)
+    backoff: float = attr.ib(default=1)
+    timeout: float = attr.ib(default=30)
+    sleep: Callable[[float], None] = attr.ib(default=time.sleep, repr=False)
+
+    bucket: TokenBucket = attr.ib(init=False, repr=False)
+    session: requests.Session = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self) -> None:
+        self.bucket = TokenBucket(self.rate, self.burst, sleep=self.sleep)
+        self.session = requests.Session()
+        # one pooled connection per worker
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _delay(self, attempt: int, response: requests.Response | None = None) -> float:
+        """Return how long to wait before retry number $attempt."""
+        if response is not None:
+            try:
+                return float(response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                pass
+        return self.backoff * 2.0**attempt
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Return the response from GETting $url, retrying if necessary."""
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.retries):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(url, **kwargs)
+            except _RETRY_ERRORS:
+                self.sleep(self._delay(attempt))
+                continue
+
+            if response.status_code not in _RETRY_STATUSES:
+                return response
+            self.sleep(self._delay(attempt, response))
+
+        # the last attempt, which gives up if it fails too
+        self.bucket.acquire()
+        response = self.session.get(url, **kwargs)
+        if response.status_code in _RETRY_STATUSES:
+            response.raise_for_status()
+        return response
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """Return the results of $fn for each of $items, in order.
+
+        Exceptions raised by $fn are raised when their result is reached.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            yield from pool.map(fn, items)
+
+    def close(self) -> None:
+        """Close the session's connections."""
+        self.session.close()
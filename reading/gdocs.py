@@ -158,7 +158,7 @@ def changes(rev_id, got, offsets, expected):
 
 
 def _display_report(df):
-    g = df.sort_values(["Author", "Title"]).groupby("Author")
+    g = df.sort_values(["Author", "Title"]).groupby("Author", observed=True)
     for author, books in g:
         yield "{}\n".format(author)
         for book in books.itertuples():
@@ -4,68 +4,304 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Future
+import functools
 from functools import reduce
+import io
+from itertools import takewhile
 import operator
+from pathlib import Path
 import re
-import time
-from typing import List, Mapping
+import threading
+from typing import Any, Callable
 from xml.etree import ElementTree
 
+import attr
 from dateutil.parser import parse
+import numpy as np
 import pandas as pd
 import requests
 
-from reading.config import category_patterns
+from reading.cache import ResponseCache
+from reading.config import Config, category_patterns, df_columns
+from reading.fetch import Fetcher
 
 
-def get_books(user_id, api_key, start_date, ignore_series):
-    """Get all the books on the user's goodreads shelves."""
-    del user_id  # unused argument
+# how long cached responses are used before being refreshed, in seconds
+_TTL = {
+    "book": 30 * 24 * 60 * 60,
+    "series": 30 * 24 * 60 * 60,
+    "reviews": 60 * 60,
+}
 
-    page = 1
-    books = []
 
-    start_date = pd.Timestamp(start_date)
+@functools.cache
+def _default_fetcher() -> Fetcher:
+    """Return the Fetcher used when none is given."""
+    return Fetcher()
+
+
+@functools.cache
+def _default_cache() -> ResponseCache:
+    """Return the ResponseCache used when none is given."""
+    return ResponseCache(Config.from_file()("goodreads.cache"))
+
+
+class _Discard:
+    """A parser target that ignores everything, for checking XML is well-formed."""
+
+    def close(self) -> None:
+        pass
+
+
+def _well_formed(xml: bytes) -> None:
+    """Raise ElementTree.ParseError if $xml isn't well-formed, without building a tree."""
+    parser = ElementTree.XMLParser(target=_Discard())
+    parser.feed(xml)
+    parser.close()
+
+
+def _get_response(
+    kind: str,
+    key: Any,
+    url: str,
+    params: dict[str, Any],
+    fetcher: Fetcher,
+    cache: ResponseCache,
+    legacy: Path | None = None,
+    check: Callable[[bytes], Any] = _well_formed,
+    cached: bool = True,
+) -> bytes:
+    """Return the response for $key, from the cache if it's fresh enough, or from $url.
+
+    Responses are only cached if they pass $check, which by default makes sure
+    they parse.  Responses that were previously cached in their own file at
+    $legacy are moved into the cache, keeping the file's modification time as
+    when they were fetched so they don't all expire at once.  If $cached is
+    unset, the response is always fetched (but still checked).
+    """
+    if not cached:
+        content: bytes = fetcher.get(url, params=params).content
+        check(content)
+        return content
+
+    xml = cache.get(kind, key, ttl=_TTL[kind])
+
+    if xml is None and legacy and legacy.exists() and cache.get(kind, key) is None:
+        cache.put(kind, key, legacy.read_bytes(), fetched=legacy.stat().st_mtime)
+        xml = cache.get(kind, key, ttl=_TTL[kind])
+
+    if xml is None:
+        xml = fetcher.get(url, params=params).content
+        check(xml)
+        cache.put(kind, key, xml)
+
+    return xml
+
+
+def _get_xml(*args, **kwargs) -> ElementTree.Element:
+    """Return the parsed response for $key, as with _get_response()."""
+    return ElementTree.fromstring(_get_response(*args, **kwargs))
+
+
+################################################################################
+
+
+@attr.s
+class SeriesMemo:
+    """Parsed series by SeriesId, so each is only fetched and parsed once per run.
+
+    If several threads want the same series at once, only one of them loads
+    it while the others wait.
+    """
+
+    _series: dict[int, Future[dict[str, Any]]] = attr.ib(factory=dict, init=False, repr=False)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    def get(self, series_id: int, load: Callable[[int], dict[str, Any]]) -> dict[str, Any]:
+        """Return the series $series_id, calling $load to get it if necessary."""
+        with self._lock:
+            future = self._series.get(series_id)
+            loading = future is None
+            if future is None:
+                future = self._series[series_id] = Future()
+
+        if loading:
+            try:
+                future.set_result(load(series_id))
+            except Exception as e:  # noqa: BLE001
+                # don't remember failures, so later books can try again
+                with self._lock:
+                    del self._series[series_id]
+                future.set_exception(e)
+
+        return future.result()
+
+
+@attr.s
+class _ColumnBuilder:
+    """Build a dataframe a row at a time, storing the rows column by column."""
+
+    _columns: dict[str, list[Any]] = attr.ib(factory=dict)
+    _length: int = attr.ib(default=0)
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        """Add $row, which needn't have all the columns."""
+        for column, value in row.items():
+            if column not in self._columns:
+                self._columns[column] = [np.nan] * self._length
+            self._columns[column].append(value)
+
+        self._length += 1
+        for values in self._columns.values():
+            if len(values) < self._length:
+                values.append(np.nan)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def frame(self) -> pd.DataFrame:
+        """Return the rows as a dataframe."""
+        return pd.DataFrame(self._columns)
+
+
+def _iter_reviews(xml: bytes, page: dict[str, int]) -> Iterator[dict[str, Any]]:
+    """Yield each of the reviews in a page of $xml, as processed by process_review().
+
+    The reviews are parsed incrementally and discarded once processed, so the
+    page is never built into a whole tree.  That's all it saves, though: the
+    page itself is still in memory (it's cached as a whole), and get_books()
+    collects a page of reviews at a time.  The page's start, end and total
+    attributes are stored in $page.
+    """
+    depth = 0
+    reviews = None
+
+    for event, elem in ElementTree.iterparse(io.BytesIO(xml), events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if elem.tag == "reviews" and reviews is None:
+                reviews = (elem, depth)
+                page.update({k: int(v) for k, v in elem.attrib.items()})
+            continue
+
+        depth -= 1
+        if reviews and elem.tag == "review" and depth == reviews[1]:
+            yield process_review(elem)
+            # the review has been dealt with, so it can go
+            reviews[0].remove(elem)
+
+
+def _review_pages(
+    user_id,
+    api_key,
+    fetcher: Fetcher,
+    cache: ResponseCache,
+    by_update: bool,
+) -> Iterator[Iterator[dict[str, Any]]]:
+    """Yield the reviews on each page of the shelves, most recently updated first if $by_update."""
+    page = 1
+    params: dict[str, Any] = {"key": api_key, "v": 2, "per_page": 100}
+    if by_update:
+        params |= {"sort": "date_updated", "order": "d"}
 
     while True:
-        # url = f"https://www.goodreads.com/review/list/{user_id}.xml"
-        # r = requests.get(
-        #    url,
-        #    params={
-        #        "key": api_key,
-        #        "v": 2,
-        #        "per_page": 100,
-        #        "page": page,
-        #    },
-        # )
-        # with open(f"data/cache/reviews-{page:02d}.xml", "wb") as fh:
-        #    fh.write(r.content)
-        #
-        # x = ElementTree.fromstring(r.content)
-
-        from pathlib import Path
-
-        reviews_file = Path(f"tmp_cache/reviews/{page:03d}.xml")
-        x = ElementTree.fromstring(reviews_file.read_text())
-
-        for r in x.findall("reviews/"):
-            book = process_review(r)
-
-            if book["Read"] < start_date:
-                continue
-
-            api_book = fetch_book(book["BookId"], api_key, ignore_series)
+        xml = _get_response(
+            "reviews",
+            f"{user_id}/{page}",
+            f"https://www.goodreads.com/review/list/{user_id}.xml",
+            params | {"page": page},
+            fetcher,
+            cache,
+            legacy=Path(f"tmp_cache/reviews/{page:03d}.xml"),
+            # the most recently updated reviews are the ones most likely to
+            # have changed, so there's no point caching them
+            cached=not by_update,
+        )
+
+        info: dict[str, int] = {}
+        yield _iter_reviews(xml, info)
+
+        if info["end"] >= info["total"]:
+            break
+        page += 1
+
+
+def get_books(
+    user_id,
+    api_key,
+    start_date,
+    ignore_series,
+    fetcher: Fetcher | None = None,
+    cache: ResponseCache | None = None,
+    series: SeriesMemo | None = None,
+    since: pd.Timestamp | None = None,
+):
+    """Get all the books on the user's goodreads shelves.
+
+    If $since is given, only books whose reviews have been updated since then
+    are returned, and paging stops as soon as an older review is reached.
+    """
+    fetcher = fetcher or _default_fetcher()
+    cache = cache or _default_cache()
+    series = series if series is not None else SeriesMemo()
+    books = _ColumnBuilder()
+
+    start_date = pd.Timestamp(start_date)
+    cache.prefetch("series")
+
+    for page in _review_pages(user_id, api_key, fetcher, cache, by_update=since is not None):
+        # the whole page is needed to fetch its books together
+        reviews = list(page)
+
+        # take reviews until reaching the ones that have already been seen
+        seen = False
+        if since is not None:
+            unseen = list(takewhile(lambda book: not book["Updated"] < since, reviews))
+            seen = len(unseen) < len(reviews)
+            reviews = unseen
+
+        reviews = [book for book in reviews if not book["Read"] < start_date]
+
+        def fetch(book: dict[str, Any]) -> dict[str, Any]:
+            try:
+                api_book: dict[str, Any] = fetch_book(
+                    book["BookId"], api_key, ignore_series, fetcher, cache, series
+                )
+                return api_book
+            except (ElementTree.ParseError, requests.exceptions.RequestException) as e:
+                # make do with what's in the review
+                print(f"Error fetching {book['BookId']} from the API: {e}")
+                return {}
+
+        # fetch the API data for the whole page at once
+        cache.prefetch("book", (book["BookId"] for book in reviews))
+        api_books = fetcher.map(fetch, reviews)
+        for book, api_book in zip(reviews, api_books):
             books.append({**api_book, **book})
 
-        r = x.find("reviews")
-        if int(r.get("end")) >= int(r.get("total")):
+        # all the rest are older
+        if seen:
             break
 
-        page += 1
+    if not len(books):
+        return pd.DataFrame(columns=df_columns("goodreads"), index=pd.Index([], name="BookId"))
+    return books.frame().set_index("BookId")
 
-        time.sleep(1)
 
-    return pd.DataFrame(data=books).set_index("BookId")
+def high_water_mark(books: pd.DataFrame) -> pd.Timestamp | None:
+    """Return the date of the most recently updated review in $books, if known."""
+    if "Updated" not in books or books.Updated.isna().all():
+        return None
+    return books.Updated.max()
+
+
+def merge_books(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Return $old with the books in $new added, replacing any previous versions of them."""
+    if new.empty:
+        return old
+    return pd.concat([old[~old.index.isin(new.index)], new])
 
 
 # extract a (possibly missing) date.
@@ -91,6 +327,7 @@ def process_review(r):
         "AuthorId": int(r.find("book/authors/author/id").text),
         "Title": r.find("book/title_without_series").text,
         "Added": _get_date(r, "date_added"),
+        "Updated": _get_date(r, "date_updated"),
         "Started": started,
         "Read": _get_date(r, "read_at"),
         "AvgRating": float(r.find("book/average_rating").text),
@@ -108,25 +345,35 @@ def process_review(r):
 
 
 # information that's only available through the book-specific endpoints.
-def fetch_book(book_id, api_key, ignore_series):
+def fetch_book(
+    book_id,
+    api_key,
+    ignore_series,
+    fetcher: Fetcher | None = None,
+    cache: ResponseCache | None = None,
+    series_memo: SeriesMemo | None = None,
+):
     """Extract the information that's only available through the book-specific endpoints."""
-    try:
-        api_book = _fetch_book_api(book_id, api_key)
-    except requests.exceptions.TooManyRedirects:
-        print(f"Retrying {book_id}")
-        api_book = _fetch_book_api(book_id, api_key)
+    fetcher = fetcher or _default_fetcher()
+    cache = cache or _default_cache()
+    api_book = _fetch_book_api(book_id, api_key, fetcher, cache)
 
     book = _parse_book_api(api_book)
 
     # fetch series information
     series_info = _parse_book_series(api_book, ignore_series)
     if series_info:
-        series = _parse_series(
-            _fetch_series(
+        try:
+            series = _get_series(
                 series_info["SeriesId"],
                 api_key,
+                fetcher,
+                cache,
+                series_memo if series_memo is not None else SeriesMemo(),
             )
-        )
+        except (ElementTree.ParseError, requests.exceptions.RequestException) as e:
+            print(f"Error fetching series {series_info['SeriesId']} from the API: {e}")
+            return book
 
         # set it from the series API if it's missing from the book API. sigh.
         if not series_info["Entry"]:
@@ -138,27 +385,17 @@ def fetch_book(book_id, api_key, ignore_series):
     return book
 
 
-def _fetch_book_api(book_id, api_key):
-    fname = "data/cache/book/{}.xml".format(book_id)
-    fname = f"tmp_cache/books/{book_id}.xml"
-    try:
-        with open(fname) as fh:
-            xml = fh.read()
-    except FileNotFoundError:
-        xml = requests.get(
-            "https://www.goodreads.com/book/show/{}.xml".format(book_id),
-            params={
-                "key": api_key,
-            },
-        ).content
-
-        # test it actually parses before saving...
-        _parse_book_api(ElementTree.fromstring(xml))
-
-        with open(fname, "wb") as fh:
-            fh.write(xml)
-        time.sleep(10)
-    return ElementTree.fromstring(xml)
+def _fetch_book_api(book_id, api_key, fetcher: Fetcher, cache: ResponseCache):
+    return _get_xml(
+        "book",
+        book_id,
+        "https://www.goodreads.com/book/show/{}.xml".format(book_id),
+        {"key": api_key},
+        fetcher,
+        cache,
+        legacy=Path(f"tmp_cache/books/{book_id}.xml"),
+        check=lambda xml: _parse_book_api(ElementTree.fromstring(xml)),
+    )
 
 
 def _parse_book_api(xml):
@@ -208,59 +445,125 @@ def interesting(entry, series):
 ################################################################################
 
 
-def _refresh_books(books: pd.DataFrame, api_key: str, ignore_series: List[int]) -> pd.DataFrame:
-    new = {}
-
-    for book in books.itertuples():
+def _refresh_books(
+    books: pd.DataFrame,
+    api_key: str,
+    ignore_series: list[int],
+    fetcher: Fetcher,
+    cache: ResponseCache,
+    series: SeriesMemo,
+) -> pd.DataFrame:
+    def refresh(book):
         try:
-            new_book = fetch_book(
+            return fetch_book(
                 book.BookId,
                 api_key,
                 ignore_series,
+                fetcher,
+                cache,
+                series,
             )
         except ElementTree.ParseError:
             # when the book_id is no longer valid, it simply...returns the HTML
             # page instead. there is no way to recover from just the work ID, however
             print(f"Error fetching {book.BookId} from the API.")
-            continue
-        except requests.exceptions.TooManyRedirects:
-            # boring temporary error that can be ignored
-            continue
+        except requests.exceptions.RequestException as e:
+            # temporary error that persisted through the retries
+            print(f"Error fetching {book.BookId} from the API: {e}")
+        return None
 
-        new[book.Index] = new_book
+    cache.prefetch("book", books.BookId)
+    cache.prefetch("series")
+    prefetch_series(
+        set(books.SeriesId.dropna().astype(int)) - set(ignore_series or ()),
+        api_key,
+        fetcher,
+        cache,
+        series,
+    )
+
+    books = list(books.itertuples())
+    new = {
+        book.Index: new_book
+        for book, new_book in zip(books, fetcher.map(refresh, books))
+        if new_book is not None
+    }
 
     return pd.DataFrame.from_dict(new, orient="index")
 
 
 def update_books(
-    books: pd.DataFrame, ebooks: pd.DataFrame, api_key: str, ignore_series: List[int]
+    books: pd.DataFrame,
+    ebooks: pd.DataFrame,
+    api_key: str,
+    ignore_series: list[int],
+    fetcher: Fetcher | None = None,
+    cache: ResponseCache | None = None,
+    series: SeriesMemo | None = None,
 ) -> pd.DataFrame:
     """Fetch the latest API data for all the books in $books that are also in $ebooks."""
     # remove books that are no longer being tracked
     books = books.loc[books.index & ebooks.index]
-    books.update(_refresh_books(books, api_key, ignore_series))
+    books.update(
+        _refresh_books(
+            books,
+            api_key,
+            ignore_series,
+            fetcher or _default_fetcher(),
+            cache or _default_cache(),
+            series if series is not None else SeriesMemo(),
+        )
+    )
     return books
 
 
 ################################################################################
 
 
-def _fetch_series(series_id, api_key):
-    fname = "data/cache/series/{}.xml".format(series_id)
-    fname = f"tmp_cache/series/{series_id}.xml"
-    try:
-        with open(fname) as fh:
-            xml = fh.read()
-    except FileNotFoundError:
-        xml = requests.get(
-            f"https://www.goodreads.com/series/show/{series_id}.xml",
-            params={
-                "key": api_key,
-            },
-        ).content
-        with open(fname, "wb") as fh:
-            fh.write(xml)
-    return ElementTree.fromstring(xml)
+def _get_series(
+    series_id: int,
+    api_key,
+    fetcher: Fetcher,
+    cache: ResponseCache,
+    memo: SeriesMemo,
+) -> dict[str, Any]:
+    """Return the parsed series $series_id, fetching it only if it's not in $memo."""
+    return memo.get(
+        series_id,
+        lambda series_id: _parse_series(_fetch_series(series_id, api_key, fetcher, cache)),
+    )
+
+
+def prefetch_series(
+    series_ids: Iterable[int],
+    api_key,
+    fetcher: Fetcher,
+    cache: ResponseCache,
+    memo: SeriesMemo,
+) -> None:
+    """Fetch and parse all of $series_ids into $memo, in parallel."""
+
+    def fetch(series_id: int) -> None:
+        try:
+            _get_series(series_id, api_key, fetcher, cache, memo)
+        except (ElementTree.ParseError, requests.exceptions.RequestException):
+            # it'll be tried again if a book needs it
+            pass
+
+    for _ in fetcher.map(fetch, series_ids):
+        pass
+
+
+def _fetch_series(series_id, api_key, fetcher: Fetcher, cache: ResponseCache):
+    return _get_xml(
+        "series",
+        series_id,
+        f"https://www.goodreads.com/series/show/{series_id}.xml",
+        {"key": api_key},
+        fetcher,
+        cache,
+        legacy=Path(f"tmp_cache/series/{series_id}.xml"),
+    )
 
 
 def _parse_series(xml):
@@ -343,9 +646,9 @@ def _get_category(shelves):
 ################################################################################
 
 
-def search_title(term, api_key):
+def search_title(term, api_key, fetcher: Fetcher | None = None):
     """Search goodreads by title."""
-    r = requests.get(
+    r = (fetcher or _default_fetcher()).get(
         "https://www.goodreads.com/search/index.xml",
         params={
             "key": api_key,
@@ -357,13 +660,13 @@ def search_title(term, api_key):
     xml = ElementTree.fromstring(r.content)
     return [
         {
-            "Title": x.find("best_book/title").text,
-            "BookId": int(x.find("best_book/id").text),
-            "Work": int(x.find("id").text),
-            "AuthorId": x.find("best_book/author/id").text,
-            "Author": x.find("best_book/author/name").text,
-            "Published": x.find("original_publication_year").text,
-            "Ratings": int(x.find("ratings_count").text),
+            "Title": x.findtext("best_book/title"),
+            "BookId": int(x.findtext("best_book/id", "")),
+            "Work": int(x.findtext("id", "")),
+            "AuthorId": x.findtext("best_book/author/id"),
+            "Author": x.findtext("best_book/author/name"),
+            "Published": x.findtext("original_publication_year"),
+            "Ratings": int(x.findtext("ratings_count", "")),
         }
         for x in xml.findall("search/results/work")
     ]
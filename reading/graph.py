@@ -18,7 +18,10 @@ from .config import Config
 # the cutoff year before which books are considered "old".
 thresh = 1940
 
-ix = pd.date_range(start="2016-01-01", end="today", freq="D")
+
+# every day covered by the graphs
+def _days() -> pd.DatetimeIndex:
+    return pd.date_range(start="2016-01-01", end="today", freq="D")
 
 
 ################################################################################
@@ -44,7 +47,7 @@ def _pages_changed(df: pd.DataFrame, shelf: str, direction: Literal["Added", "Re
         .set_index([direction])
         .Pages.resample("D")
         .sum()
-        .reindex(index=ix)
+        .reindex(index=_days())
         .fillna(0)
     )
 
@@ -92,7 +95,7 @@ def backlog() -> None:
             "pending": _pages_added(df, "currently-reading") + _pages_added(df, "pending"),
             "read": _pages_added(df, "read") - _pages_read(df),
         },
-        index=ix,
+        index=_days(),
         columns=["read", "pending", "ebooks", "elsewhere", "library"],
     )
 
@@ -121,7 +124,7 @@ def increase() -> None:
             "pending": _pages_added(df, "currently-reading") + _pages_added(df, "pending"),
             "read": -_pages_read(df),
         },
-        index=ix,
+        index=_days(),
         columns=["read", "pending", "ebooks", "elsewhere", "library"],
     )
 
@@ -140,7 +143,7 @@ def increase() -> None:
 def new_authors() -> None:
     authors = Collection.from_dir().shelves("read").df
     first = authors.set_index("Read").sort_index().Author.drop_duplicates()
-    first = first.resample("D").count().reindex(ix).fillna(0)
+    first = first.resample("D").count().reindex(_days()).fillna(0)
     first.rolling(window=365, min_periods=0).sum().plot()
 
     # force the bottom of the graph to zero
@@ -167,7 +170,7 @@ def median_date() -> None:
     read = read.set_index("Read").Published.resample("D").mean()
 
     read.rolling(window=365, min_periods=0).median().rolling(window=30).mean().reindex(
-        ix
+        _days()
     ).ffill().loc["2016":].plot()
 
     # set the top of the graph to the current year
@@ -186,7 +189,7 @@ def median_date() -> None:
 def length() -> None:
     read = Collection.from_dir().shelves("read").df
     read = read.set_index("Read").Pages.resample("D").mean()
-    read.rolling(window=365, min_periods=0).mean().reindex(ix).ffill().loc["2016":].plot()
+    read.rolling(window=365, min_periods=0).mean().reindex(_days()).ffill().loc["2016":].plot()
 
     # prettify and save
     name = "length"
@@ -213,7 +216,7 @@ def oldness() -> None:
         .set_index("Read")
         .resample("D")
         .sum()
-        .reindex(ix)
+        .reindex(_days())
         .fillna(0)
     )
 
@@ -236,7 +239,7 @@ def oldness() -> None:
 @graph
 def gender() -> None:
     df = Collection.from_dir().shelves("read").df
-    df.Gender = df.Gender.fillna("missing")
+    df.Gender = df.Gender.astype(object).fillna("missing")
 
     df = (
         df.pivot_table(
@@ -266,7 +269,7 @@ def gender() -> None:
 def language() -> None:
     df = Collection.from_dir().shelves("read").df
 
-    df.Language = df.Language.fillna("unknown")
+    df.Language = df.Language.astype(object).fillna("unknown")
     df = (
         df.pivot_table(
             values="Pages",
@@ -294,7 +297,7 @@ def language() -> None:
 def category() -> None:
     df = Collection.from_dir().shelves("read").df
 
-    df.Category = df.Category.fillna("unknown")
+    df.Category = df.Category.astype(object).fillna("unknown")
     df = (
         df.pivot_table(
             values="Pages",
@@ -322,23 +325,24 @@ def category() -> None:
 @graph
 def nationality() -> None:
     df = Collection.from_dir().shelves("read").df
+    days = _days()
 
     # how many new nationalities a year
     authors = df.set_index("Read").sort_index()
     first = authors.Nationality.drop_duplicates()
-    first = first.resample("D").count().reindex(ix, fill_value=0)
+    first = first.resample("D").count().reindex(days, fill_value=0)
 
     # total number of distinct nationalities
     # FIXME use rolling apply?
     values = []
-    for date in ix:
+    for date in days:
         start = (date - pd.Timedelta("365 days")).strftime("%F")
         end = date.strftime("%F")
         values.append(len(set(authors.loc[start:end].Nationality.values)))
 
     pd.DataFrame(
         {
-            "Distinct": pd.Series(data=values, index=ix),
+            "Distinct": pd.Series(data=values, index=days),
             "New": first.rolling(window=365).sum(),
         }
     ).plot()
@@ -393,7 +397,8 @@ def rate_area() -> None:
 
     df["ppd"] = df.Pages / ((df.Read - df.Started).dt.days + 1)
 
-    g = pd.DataFrame(index=ix)
+    days = _days()
+    g = pd.DataFrame(index=days)
 
     for ii, row in df.sort_values(["Started"]).iterrows():
         g[ii] = pd.Series(
@@ -401,7 +406,7 @@ def rate_area() -> None:
                 row.Started: row["ppd"],
                 row.Read: 0,
             },
-            index=ix,
+            index=days,
         ).ffill()
 
     g.plot(title="Reading rate", kind="area", lw=0)
@@ -0,0 +1,131 @@
+# vim: ts=4 : sw=4 : et
+
+"""An index of the ebooks (and other files) on a Kindle."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterator
+import os
+from pathlib import Path
+
+import attr
+
+
+# the directories that are scanned, and the category of the ebooks in each
+_CATEGORIES = {
+    "articles": "articles",
+    "short-stories": "short-stories",
+    "books": "novels",
+    "non-fiction": "non-fiction",
+    "": "articles",
+}
+
+_IGNORE_NAMES = {"My Clippings.txt"}
+_IGNORE_SUFFIXES = {".kfx"}
+
+# the suffix of the directories the Kindle keeps each ebook's state in
+_SIDECAR = ".sdr"
+
+################################################################################
+
+
+@attr.s(frozen=True)
+class Entry:
+    """A file or directory on the Kindle, as it was when it was scanned."""
+
+    path: Path = attr.ib()
+    is_dir: bool = attr.ib()
+    # these are zero for directories
+    size: int = attr.ib(default=0)
+    mtime_ns: int = attr.ib(default=0)
+
+    @property
+    def name(self) -> str:
+        """Return the filename of the entry."""
+        return self.path.name
+
+    @property
+    def ignored(self) -> bool:
+        """Return whether this isn't an ebook."""
+        return (
+            self.is_dir
+            or self.name.startswith(".")
+            or self.name in _IGNORE_NAMES
+            or self.path.suffix in _IGNORE_SUFFIXES
+        )
+
+
+@attr.s
+class KindleIndex:
+    """The contents of each of the directories on a Kindle, from a single scan.
+
+    The index is built by scanning each directory once, and everything else is
+    worked out from that, rather than by looking at the filesystem again.
+    """
+
+    root: Path = attr.ib(converter=Path)
+    # the entries in each directory, by its path relative to $root
+    entries: dict[str, list[Entry]] = attr.ib(factory=dict)
+
+    @classmethod
+    def scan(cls, root: str | Path) -> KindleIndex:
+        """Return an index of the directories in $root.
+
+        Raises FileNotFoundError if $root doesn't exist (eg if the Kindle isn't
+        mounted), but any of the directories in it may be missing.
+        """
+        index = cls(root)
+        if not index.root.is_dir():
+            raise FileNotFoundError(f"No such directory: {index.root}")
+
+        for directory in _CATEGORIES:
+            path = index.root / directory
+            index.entries[directory] = _scan_dir(path) if path.is_dir() else []
+
+        return index
+
+    def ebooks(self) -> Iterator[tuple[str, Entry, str]]:
+        """Yield the category, entry and name of each of the ebooks."""
+        for directory, category in _CATEGORIES.items():
+            for entry in self.entries[directory]:
+                if not entry.ignored:
+                    yield (category, entry, f"{category}/{entry.name}")
+
+    def orphans(self) -> Iterator[Entry]:
+        """Yield the sidecar directories whose ebooks have been removed.
+
+        An ebook's sidecar is named after it, so it's an orphan if nothing
+        else in the directory has the same name (apart from the extension).
+        """
+        for entries in self.entries.values():
+            names = sorted(entry.name for entry in entries if not entry.name.endswith(_SIDECAR))
+            for entry in entries:
+                if not entry.is_dir or not entry.name.endswith(_SIDECAR) or entry.name[0] == ".":
+                    continue
+                prefix = entry.name[: -len(_SIDECAR)] + "."
+                i = bisect_left(names, prefix)
+                if i == len(names) or not names[i].startswith(prefix):
+                    yield entry
+
+
+def _scan_dir(path: Path) -> list[Entry]:
+    """Return the entries in the directory $path."""
+    entries = []
+    with os.scandir(path) as it:
+        for item in it:
+            try:
+                entries.append(_entry(item))
+            except FileNotFoundError:  # noqa: PERF203
+                # a broken symlink, or it's just been removed
+                pass
+    return entries
+
+
+def _entry(item: os.DirEntry[str]) -> Entry:
+    """Return an Entry for the directory entry $item."""
+    if item.is_dir():
+        return Entry(Path(item.path), is_dir=True)
+
+    stat = item.stat()
+    return Entry(Path(item.path), is_dir=False, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
@@ -9,7 +9,7 @@ import datetime as dt
 from jinja2 import Template
 import pandas as pd
 
-from .collection import Collection, _process_fixes
+from .collection import Collection, _dedup_keys, _process_fixes
 from .config import Config
 
 
@@ -239,36 +239,18 @@ def lint_duplicates():
     ]
 
     df = Collection.from_dir(merge=True).df
+    df = df.assign(Copy=_dedup_keys(df))
 
-    # FIXME move this into the Collection and make it non-manky
-    df = df.groupby("Work", as_index=False).filter(lambda x: len(x) > 1)
-    df = df.groupby("Work", as_index=False).aggregate(
+    df = df[df.duplicated(subset=["Copy"], keep=False)]
+    df = df.groupby("Copy", sort=False).aggregate(
         {
             "Author": "first",
             "Title": "first",
             "Work": "first",
-            "Shelf": lambda x: ", ".join(list(x)),
+            "Shelf": ", ".join,
         }
     )
-    df = df.groupby("Work").filter(lambda x: ~x.Shelf.isin(acceptable))
-
-    # deduplicate first and try again...
-    _df = Collection.from_dir(merge=True).df
-    _df = _df[_df.duplicated(subset=["Work"], keep=False)]
-    _df = _df.groupby("Work", as_index=False).aggregate(
-        {
-            "Author": "first",
-            "Title": "first",
-            "Work": "first",
-            "Shelf": lambda x: ", ".join(list(x)),
-        }
-    )
-    _df = _df.groupby("Work").filter(lambda x: ~x.Shelf.isin(acceptable))
-
-    if not df.equals(_df):
-        print("duplicates:")
-        print(f"old={df}")
-        print(f"new={_df}")
+    df = df[~df.Shelf.isin(acceptable)]
 
     return {
         "df": df,
@@ -305,7 +287,7 @@ def lint_binding():
     return {
         "df": c.df[~(c.df.Binding.isin(good_bindings) | c.df.Binding.isnull())],
         "template": """
-{%- for binding, books in df.groupby('Binding') %}
+{%- for binding, books in df.groupby('Binding', observed=True) %}
 {{binding}}:
   {%- for entry in books.itertuples() %}
   * {{entry.Author}}, {{entry.Title}}
@@ -11,9 +11,7 @@ import pandas as pd
 from .collection import Collection, _ebook_parse_title
 from .compare import compare
 from .config import Config
-from .goodreads import fetch_book, search_title
-from .storage import Store, load_df, save_df
-from .wikidata import entity, wd_search
+from .storage import Store, same_contents
 
 
 ################################################################################
@@ -129,6 +127,8 @@ Q - exit without saving
 
 
 def lookup_work_id(book, author_ids, work_ids, config):
+    from .goodreads import search_title  # noqa: PLC0415
+
     print("\033[1mSearching for '{}' by '{}'\033[0m".format(book.Title, book.Author))
 
     title = _ebook_parse_title(book.Title).Title
@@ -151,6 +151,8 @@ def lookup_work_id(book, author_ids, work_ids, config):
 
 # associates an AuthorId with a Wikidata QID
 def lookup_author(author):
+    from .wikidata import wd_search  # noqa: PLC0415
+
     (width, _) = shutil.get_terminal_size()
     print(
         Template(
@@ -198,9 +200,9 @@ def confirm_author(e):
 ################################################################################
 
 
-def find(what, config):
-    books = load_df("books")
-    authors = load_df("authors")
+def find(what, config, store):
+    books = store.books
+    authors = store.authors
 
     try:
         if "books" in what:
@@ -211,15 +213,22 @@ def find(what, config):
     except SaveExit:
         pass
     except FullExit:
+        store.invalidate("books", "authors")
         return
 
-    save_df("books", books)
-    save_df("authors", authors)
+    store.books = books
+    store.authors = authors
+    # the results of the (slow, interactive) search are always kept, even if
+    # the other changes are being ignored
+    store.save(store.directory)
 
 
 # associate WorkIds with book IDs
 def find_books(books, config):
+    from .goodreads import SeriesMemo, fetch_book  # noqa: PLC0415
+
     df = Collection.from_dir().categories("articles", exclude=True).df  # include metadata
+    series = SeriesMemo()
 
     author_ids = set(df.AuthorId.dropna().astype(int))
     work_ids = set(df.Work.dropna().astype(int))
@@ -240,6 +249,7 @@ def find_books(books, config):
                 resp["BookId"],
                 config("goodreads.key"),
                 config("series.ignore"),
+                series_memo=series,
             )
         )
         books.loc[book_id, "Work"] = resp["Work"]
@@ -248,6 +258,8 @@ def find_books(books, config):
 
 # associate Wikidata QIDs with AuthorIds
 def find_authors(authors):
+    from .wikidata import entity  # noqa: PLC0415
+
     df = Collection.from_dir().df
     df = (
         df[~df.AuthorId.isin(authors.index)]
@@ -277,14 +289,21 @@ def main(args, config: Config) -> None:
     """Interactively search for metadata, and optionally save the results."""
     store = Store()
 
-    # FIXME pass in the Store so find_authors can include those of the newly-found books
+    # FIXME pass the Store to find_authors so it can include those of the newly-found books
     # FIXME do this check in cmds.py
     if args.find:
-        find(args.find, config)
+        find(args.find, config, store)
+
+    new = Collection.from_store(store, config)
+
+    # work out how to merge the books now, rather than every time they're used
+    volumes = new.merge_info()
+    if not same_contents(volumes, store.volumes):
+        store.volumes = volumes
 
     compare(
         old=Collection.from_dir(),
-        new=Collection.from_store(store, config),
+        new=new,
     )
 
     if args.save:
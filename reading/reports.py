@@ -57,7 +57,7 @@ def prefix(book):
 
 
 def _display_report(df):
-    g = df.sort_values(["Author", "Title"]).groupby("Author")
+    g = df.sort_values(["Author", "Title"]).groupby("Author", observed=True)
 
     print(
         Template(
@@ -0,0 +1,144 @@
+# vim: ts=4 : sw=4 : et
+
+"""A daemon that keeps the collection loaded, and a client to query it."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+from pathlib import Path
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from typing import Any
+
+from .cmds import SERVED_MODES, arg_parser, run, socket_path
+from .config import Config
+
+
+# the protocol is a single line of JSON in each direction: the request has the
+# client's working directory and command-line arguments, and the response has
+# the exit status and anything written to stdout and stderr.
+
+################################################################################
+
+
+def query(argv: list[str], path: Path) -> int | None:
+    """Run the command in $argv using the daemon listening at $path.
+
+    Returns the exit status, or None if there's no daemon.
+    """
+    request = {"cwd": os.getcwd(), "argv": argv}
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(path))
+            with sock.makefile("rwb") as fh:
+                fh.write(json.dumps(request).encode() + b"\n")
+                fh.flush()
+                response = json.loads(fh.readline())
+    except (OSError, ValueError):
+        # not running, or went away
+        return None
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    status: int = response["status"]
+    return status
+
+
+################################################################################
+
+
+# configs by path, along with their mtime
+_CONFIGS: dict[Path, tuple[int, Config]] = {}
+
+
+def _config(path: Path) -> Config:
+    """Return the config at $path, reloading it only if it has changed."""
+    path = path.resolve()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = 0
+
+    if (cached := _CONFIGS.get(path)) is None or cached[0] != mtime:
+        cached = _CONFIGS[path] = (mtime, Config.from_file(path))
+
+    return cached[1]
+
+
+def handle(request: dict[str, Any]) -> dict[str, Any]:
+    """Run the command described by $request, and return the response."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    cwd = os.getcwd()
+
+    try:
+        # relative paths are relative to the client
+        os.chdir(request["cwd"])
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            args = arg_parser().parse_args(request["argv"])
+            if args.mode in SERVED_MODES:
+                status = run(args, _config(Path("data/config.yml")))
+            else:
+                # the others are slow, interactive or would block the daemon
+                print(f"ook: {args.mode} isn't available from the daemon", file=sys.stderr)
+                status = 2
+    except SystemExit as e:
+        status = 0 if e.code is None else e.code if isinstance(e.code, int) else 1
+    except Exception:  # noqa: BLE001 # pylint: disable=broad-except
+        stderr.write(traceback.format_exc())
+        status = 1
+    finally:
+        os.chdir(cwd)
+
+    return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        self.wfile.write(json.dumps(handle(request)).encode() + b"\n")
+
+
+def server(path: Path) -> socketserver.UnixStreamServer:
+    """Return a server listening at $path.
+
+    Requests are handled one at a time, since each of them changes the working
+    directory and redirects the output.
+    """
+    if path.is_socket():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(path))
+            except OSError:
+                # left behind by a daemon that didn't exit cleanly
+                path.unlink()
+            else:
+                raise RuntimeError(f"Already being served at {path}")
+
+    return socketserver.UnixStreamServer(str(path), _Handler)
+
+
+def serve(args) -> None:
+    """Answer queries until interrupted."""
+    path = socket_path(args)
+
+    # exit cleanly, removing the socket, when killed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    with server(path) as srv:
+        print(f"Listening on {path}")
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
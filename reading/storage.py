@@ -6,42 +6,152 @@ from __future__ import annotations
 
 from functools import partial
 from pathlib import Path
-from typing import Dict, Optional, Union
 
 import attr
+import numpy as np
 import pandas as pd
 
-from .config import date_columns, df_columns
+from .config import column_dtypes, date_columns, df_columns
 
 
 def _load_csv(
     name: str,
     columns: list[str],
-    parse_dates: Union[bool, list[str]] = False,
+    parse_dates: bool | list[str] = False,
 ) -> pd.DataFrame:
     try:
         return pd.read_csv(name, index_col=0, parse_dates=parse_dates)
     except FileNotFoundError:
         return pd.DataFrame(columns=columns)
+    except ValueError:
+        if not isinstance(parse_dates, list):
+            raise
+        # some of the columns were added to the schema since the file was
+        # written.  that's rare, so it's fine to read the file again.
+        present = set(pd.read_csv(name, nrows=0).columns)
+        parse_dates = [col for col in parse_dates if col in present]
+        return pd.read_csv(name, index_col=0, parse_dates=parse_dates)
+
+
+def normalise_missing(df: pd.DataFrame) -> pd.DataFrame:
+    """Use NaN for all missing values in object columns, as read_csv() does."""
+    for column in df.columns[df.dtypes == object]:
+        df.loc[df[column].isna(), column] = np.nan
+    return df
+
+
+def same_contents(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Return whether $a and $b would be saved as the same CSV.
+
+    The order of the rows and the dtypes don't matter, and neither does how
+    missing values are represented, or whether they're empty strings.
+    """
+
+    def normalised(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.sort_index().astype(object)
+        return df.where(df.notna() & (df != ""), None)
+
+    return bool(normalised(a).equals(normalised(b)))
+
+
+def set_dtypes(
+    df: pd.DataFrame,
+    store: str | None = None,
+    categorical: bool = True,
+) -> pd.DataFrame:
+    """Convert the columns of $df to the dtypes given by the schema for $store.
+
+    New values can't be assigned to categorical columns, so unset $categorical
+    to leave them as strings if $df is going to be edited.
+    """
+    dtypes = {
+        col: dtype
+        for col, dtype in column_dtypes(store).items()
+        if col in df.columns and (categorical or dtype != "category")
+    }
+    return df.astype(dtypes) if dtypes else df
+
+
+# the columnar copy of the CSV at $fname, which is kept in the cache directory
+# alongside it rather than with the data
+def _columnar_path(fname: Path | str) -> Path:
+    path = Path(fname)
+    return path.parent / ".cache" / path.with_suffix(".feather").name
+
+
+def _load_columnar(fname: Path | str) -> pd.DataFrame | None:
+    """Load the columnar copy of $fname, if it exists and is up-to-date."""
+    path = _columnar_path(fname)
+
+    try:
+        # the CSV is authoritative, so ignore the copy if it's been edited since
+        if path.stat().st_mtime < Path(fname).stat().st_mtime:
+            return None
+
+        from pyarrow import feather  # type: ignore[import-untyped]  # noqa: PLC0415
 
+        df = feather.read_table(path).to_pandas()
+    except (ImportError, OSError, ValueError):
+        return None
 
-def load_df(name: str, fname: Optional[str] = None, dirname: Optional[str] = None) -> pd.DataFrame:
-    """Load and return a dataframe of type $name, creating it if necessary."""
+    # arrow uses None for missing strings
+    return normalise_missing(df)
+
+
+def _save_columnar(df: pd.DataFrame, fname: Path | str) -> None:
+    """Save a columnar copy of $df for $fname, if possible."""
+    path = _columnar_path(fname)
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+        from pyarrow import feather  # noqa: PLC0415
+
+        path.parent.mkdir(exist_ok=True)
+        feather.write_feather(pa.Table.from_pandas(df), path)
+    except (ImportError, OSError, TypeError, ValueError):
+        # pyarrow isn't available, the directory isn't writable, or the data
+        # has mixed types that arrow can't represent: just use the CSV.
+        pass
+
+
+def load_df(
+    name: str,
+    fname: str | None = None,
+    dirname: str | None = None,
+    columnar: bool = True,
+) -> pd.DataFrame:
+    """Load and return a dataframe of type $name, creating it if necessary.
+
+    If $columnar is set, a typed copy of the CSV is kept in the .cache
+    directory next to it and used instead, as long as it is newer than the CSV.
+    """
     if dirname:
         fname = f"{dirname}/{name}.csv"
-
-    return _load_csv(
-        fname or f"data/{name}.csv",
-        columns=df_columns(name),
-        parse_dates=date_columns(name),
+    fname = fname or f"data/{name}.csv"
+
+    if columnar and (df := _load_columnar(fname)) is not None:
+        return set_dtypes(df, name, categorical=False)
+
+    df = set_dtypes(
+        _load_csv(
+            fname,
+            columns=df_columns(name),
+            parse_dates=date_columns(name),
+        ),
+        name,
+        categorical=False,
     )
 
+    if columnar and Path(fname).is_file():
+        _save_columnar(df, fname)
+
+    return df
+
 
-def save_df(name: str, df: pd.DataFrame, fname: Optional[Path] = None) -> None:
+def save_df(name: str, df: pd.DataFrame, fname: Path | str | None = None) -> None:
     """Save a dataframe of type $name in an aesthetic format."""
-    df.sort_index().to_csv(
+    # columns that are missing (eg from older files) are left empty
+    df.sort_index().reindex(columns=df_columns(name)).to_csv(
         fname or f"data/{name}.csv",
-        columns=df_columns(name),
         float_format="%.20g",
     )
 
@@ -51,18 +161,32 @@ def save_df(name: str, df: pd.DataFrame, fname: Optional[Path] = None) -> None:
 
 @attr.s
 class Store:
-    """Load and store data."""
+    """Load and store data.
+
+    Tables are loaded from disk the first time they are accessed, and cached
+    from then on.  Tables that are assigned to are marked as changed, and only
+    those are written out by save().
+    """
 
     directory: Path = attr.ib(default=Path("data"), converter=Path, repr=str)
-    _tables: Dict[str, pd.DataFrame] = attr.ib(factory=dict, init=False, repr=False)
+    columnar: bool = attr.ib(default=True, kw_only=True, repr=False)
+    _tables: dict[str, pd.DataFrame] = attr.ib(factory=dict, init=False, repr=False)
+    _changed: set[str] = attr.ib(factory=set, init=False, repr=False)
 
     def _getter(self, name: str) -> pd.DataFrame:
-        kind = name.split("-")[0]
-        return self._tables.get(name, load_df(kind, fname=f"{self.directory}/{name}.csv"))
+        if name not in self._tables:
+            kind = name.split("-")[0]
+            self._tables[name] = load_df(
+                kind,
+                fname=f"{self.directory}/{name}.csv",
+                columnar=self.columnar,
+            )
+        return self._tables[name]
 
     # the arguments have to be in a strange order or partial does weird things with them
     def _setter(self, value: pd.DataFrame, name: str) -> None:
         self._tables[name] = value
+        self._changed.add(name)
 
     goodreads = property(
         partial(_getter, name="goodreads"),
@@ -84,9 +208,28 @@ class Store:
         partial(_getter, name="books"),
         partial(_setter, name="books"),
     )
+    volumes = property(
+        partial(_getter, name="volumes"),
+        partial(_setter, name="volumes"),
+    )
+
+    @property
+    def changed(self) -> set[str]:
+        """Return the names of the tables that have been changed since they were loaded."""
+        return set(self._changed)
 
-    def save(self, directory: Union[Path, str]) -> None:
-        """Save the tables to $directory."""
-        for name, table in self._tables.items():
+    def invalidate(self, *names: str) -> None:
+        """Discard the cached copies of tables $names (default all), and any changes to them."""
+        for name in names or list(self._tables):
+            self._tables.pop(name, None)
+            self._changed.discard(name)
+
+    def save(self, directory: Path | str, everything: bool = False) -> None:
+        """Save the changed tables to $directory, or all the loaded ones if $everything."""
+        for name in sorted(self._tables if everything else self._changed):
             kind = name.split("-")[0]
-            save_df(kind, table, f"{directory}/{name}.csv")
+            save_df(kind, self._tables[name], f"{directory}/{name}.csv")
+
+        # the tables now match what's on disk
+        if Path(directory) == self.directory:
+            self._changed.clear()
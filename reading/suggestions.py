@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import argparse
+from pathlib import Path
 from textwrap import fill
+from typing import Any, TextIO
 
 import pandas as pd
+import yaml
 
-from .collection import Collection, read_authorids, read_nationalities
+from .cmds import _filter_parser
+from .collection import Collection, View, read_authorids, read_nationalities
 from .config import Config
 
 
@@ -27,41 +32,33 @@ def _recent_author_ids(c: Collection, date: pd.Timestamp) -> list[int]:
 ################################################################################
 
 
-def scheduled(args, config: Config) -> None:
-    c = (
-        Collection.from_dir(args.data_dir, merge=True)
-        .set_schedules(config("scheduled"))
+def _load(args, config: Config) -> Collection:
+    return Collection.from_dir(args.data_dir, merge=True).set_schedules(config("scheduled"))
+
+
+def _select(c: Collection, args) -> View:
+    return (
+        c.view()
         .shelves(*args.shelves)
         .languages(*args.languages)
         .categories(*args.categories)
         .borrowed(args.borrowed)
-        .scheduled_at(args.date)
     )
 
+
+def _scheduled(c: Collection, args) -> pd.DataFrame:
     args.all = True  # no display limit on scheduled books
 
-    df = c.df
+    df = _select(c, args).scheduled_at(args.date).df
 
     df = _filter(df, args, c)
     df = _sort(df, args)
-    df = _reduce(df, args)
-    _display(df, args)
+    return _reduce(df, args)
 
 
-# suggestions
-def main(args, config: Config) -> None:
-    c = (
-        Collection.from_dir(args.data_dir, merge=True)
-        .set_schedules(config("scheduled"))
-        .shelves(*args.shelves)
-        .languages(*args.languages)
-        .categories(*args.categories)
-        .borrowed(args.borrowed)
-        # filter out scheduled books
-        .scheduled(exclude=True)
-    )
-
-    df = c.df
+def _suggestions(c: Collection, args) -> pd.DataFrame:
+    # filter out scheduled books
+    df = _select(c, args).scheduled(exclude=True).df
 
     # filter out recently-read
     df = df[~df.AuthorId.isin(_recent_author_ids(c, args.date))]
@@ -73,8 +70,58 @@ def main(args, config: Config) -> None:
 
     df = _filter(df, args, c)
     df = _sort(df, args)
-    df = _reduce(df, args)
-    _display(df, args)
+    return _reduce(df, args)
+
+
+def scheduled(args, config: Config) -> None:
+    _display(_scheduled(_load(args, config), args), args)
+
+
+# suggestions
+def main(args, config: Config) -> None:
+    _display(_suggestions(_load(args, config), args), args)
+
+
+_MODES = {
+    "scheduled": _scheduled,
+    "suggest": _suggestions,
+}
+
+
+# convert a mapping of options from a batch spec into command-line arguments
+def _spec_args(options: dict[str, Any]) -> list[str]:
+    argv = []
+    for name, value in options.items():
+        if value is False or value is None:
+            continue
+        argv.append(f"--{name.replace('_', '-')}")
+        if isinstance(value, (list, tuple)):
+            argv.extend(str(v) for v in value)
+        elif value is not True:
+            argv.append(str(value))
+    return argv
+
+
+# several lists of suggestions, all from the same collection
+def batch(args, config: Config) -> None:
+    with open(args.spec) as fh:
+        spec = yaml.load(fh, Loader=yaml.CSafeLoader)
+
+    c = _load(args, config)
+    parser = _filter_parser()
+    output_dir = Path(args.output_dir)
+
+    for fname, lists in spec["files"].items():
+        with open(output_dir / fname, "w") as fh:
+            for i, entry in enumerate(lists):
+                if i:
+                    print("----", file=fh)
+                print(entry["name"], end="\n\n", file=fh)
+
+                options = parser.parse_args(_spec_args(entry.get("options", {})))
+                list_args = argparse.Namespace(**(vars(args) | vars(options)))
+                mode = _MODES[entry.get("mode", "suggest")]
+                _display(mode(c, list_args), list_args, file=fh)
 
 
 # do more filtering
@@ -116,7 +163,7 @@ def _reduce(df: pd.DataFrame, args) -> pd.DataFrame:
 
 
 # print out the suggestions
-def _display(df: pd.DataFrame, args) -> None:
+def _display(df: pd.DataFrame, args, file: TextIO | None = None) -> None:
     if args.words:
         fmt = "{Words:4.0f}  {Title} ({Author})"
     else:
@@ -126,4 +173,4 @@ def _display(df: pd.DataFrame, args) -> None:
         out = fmt.format(**book)
         if args.width:
             out = fill(out, width=args.width, subsequent_indent="      ")
-        print(out)
+        print(out, file=file)
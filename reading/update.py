@@ -6,14 +6,11 @@ from __future__ import annotations
 
 import pandas as pd
 
+from .cache import ResponseCache
 from .collection import Collection
 from .compare import compare
 from .config import Config
-from .goodreads import get_books, update_books
-from .scrape import scrape
-from .storage import Store
-from .wikidata import fetch_entities
-from .wordcounts import process
+from .storage import Store, same_contents
 
 
 # FIXME improve this signature?
@@ -21,23 +18,53 @@ def main(args, config: Config) -> None:
     """Update the store from various sources, and optionally save."""
     store = Store()
 
+    # only import what's needed for the requested updates, since some of these
+    # are slow to import
+
+    if args.goodreads or args.metadata:
+        from .fetch import Fetcher  # noqa: PLC0415
+        from .goodreads import SeriesMemo  # noqa: PLC0415
+
+        # shared between all the goodreads requests, to keep within the rate limit
+        # and only fetch each series once
+        fetcher = Fetcher(rate=config("goodreads.rate"), workers=config("goodreads.workers"))
+        cache = ResponseCache(config("goodreads.cache"))
+        series = SeriesMemo()
+
     if args.goodreads:
-        store.goodreads = get_books(
+        from .goodreads import get_books, high_water_mark, merge_books  # noqa: PLC0415
+
+        # only fetch the books that have changed since the last update, unless
+        # asked to (or it's not known when that was)
+        since = None if args.full else high_water_mark(store.goodreads)
+
+        books = get_books(
             user_id=config("goodreads.user"),
             api_key=config("goodreads.key"),
             start_date=config("goodreads.start"),
             ignore_series=config("series.ignore"),
+            fetcher=fetcher,
+            cache=cache,
+            series=series,
+            since=since,
         )
+        store.goodreads = books if since is None else merge_books(store.goodreads, books)
         # FIXME update series
 
     if args.kindle:
+        from .wordcounts import process  # noqa: PLC0415
+
         store.ebooks = process(
             store.ebooks,
             config("kindle.directory"),
             force=args.force,
+            workers=config("kindle.workers"),
+            cache=ResponseCache(config("kindle.cache")),
         )
 
     if args.scrape:
+        from .scrape import scrape  # noqa: PLC0415
+
         store.scraped = scrape(
             config("goodreads.html"),
             store.scraped,
@@ -45,21 +72,36 @@ def main(args, config: Config) -> None:
         )
 
     if args.metadata:
+        from .goodreads import update_books  # noqa: PLC0415
+        from .wikidata import fetch_entities  # noqa: PLC0415
+
         store.books = update_books(
             store.books,
             store.ebooks,
             api_key=config("goodreads.key"),
             ignore_series=config("series.ignore"),
+            fetcher=fetcher,
+            cache=cache,
+            series=series,
         )
         authors = store.authors
         authors.update(pd.DataFrame(fetch_entities(authors.QID)).set_index("AuthorId"))
         store.authors = authors
 
+    new = Collection.from_store(store, config)
+
+    # work out how to merge the books now, rather than every time they're used
+    volumes = new.merge_info()
+    if not same_contents(volumes, store.volumes):
+        store.volumes = volumes
+
     compare(
-        new=Collection.from_store(store, config),
+        new=new,
         old=Collection.from_dir(),
+        json_path=args.json,
     )
 
+    # a copy of everything, for debugging
+    store.save("blah", everything=True)
     if args.save:
         store.save("data")
-    store.save("blah")
@@ -4,55 +4,133 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import functools
+import hashlib
+import json
+import os
 from pathlib import Path
-from subprocess import CalledProcessError, run
+from subprocess import PIPE, CalledProcessError, Popen, run
 import sys
-from tempfile import NamedTemporaryFile
+from tempfile import TemporaryDirectory, TemporaryFile
+from typing import Any, Callable, TypeVar
 
 import attr
 import pandas as pd
 
+from reading.cache import ResponseCache
+from reading.config import Config
+from reading.ebookmeta import placeholder, read_metadata
+from reading.kindle import Entry, KindleIndex
 
-# return a file (which may be the original) containing the contents of $path
-# as text
-def _as_text(path):
-    if path.suffix == ".txt":
-        return path.read_bytes()
 
-    cmd = "pdftotext" if path.suffix == ".pdf" else "ebook-convert"
+T = TypeVar("T")
+
+# the details of an ebook that depend only on its contents
+_CONTENT_COLUMNS = ["Author", "Title", "Language", "Words"]
+
+# how much text to read at a time
+_CHUNK_SIZE = 1 << 16
+
 
-    tmpfile = NamedTemporaryFile(suffix=".txt")
+# yields chunks of $fh until it's exhausted
+def _read_chunks(fh) -> Iterator[bytes]:
+    while chunk := fh.read(_CHUNK_SIZE):
+        yield chunk
 
+
+# yields the contents of $path as text, a chunk at a time.  raises OSError if
+# the converter doesn't exist, or CalledProcessError if it fails.
+def _text_chunks(path: Path) -> Iterator[bytes]:
+    if path.suffix == ".txt":
+        with open(path, "rb") as fh:
+            yield from _read_chunks(fh)
+    elif path.suffix == ".pdf":
+        # pdftotext can write to a pipe, so the text never has to be stored
+        # (but stderr goes to a file, so it can't fill up and block it)
+        cmd = ["pdftotext", str(path), "-"]
+        with TemporaryFile() as stderr:
+            with Popen(cmd, stdout=PIPE, stderr=stderr) as proc:
+                yield from _read_chunks(proc.stdout)
+            if proc.returncode:
+                stderr.seek(0)
+                raise CalledProcessError(proc.returncode, cmd, stderr=stderr.read())
+    else:
+        # ebook-convert needs a filename with the right extension
+        with TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir, "ebook.txt")
+            run(["ebook-convert", str(path), str(output)], capture_output=True, check=True)
+            with open(output, "rb") as fh:
+                yield from _read_chunks(fh)
+
+
+# returns the result of $consume on the chunks of text from $path, or None if
+# it couldn't be converted
+def _converted(path: Path, consume: Callable[[Iterator[bytes]], T]) -> T | None:
     try:
-        run([cmd, str(path), tmpfile.name], capture_output=True, check=True)
+        return consume(_text_chunks(path))
     except OSError:
         # ebook-convert probably doesn't exist
         return None
     except CalledProcessError as e:
         # it fell over
         print(e)
+        if e.stderr:
+            print(e.stderr.decode(errors="replace").rstrip())
         return None
 
-    return tmpfile.read()
 
+# counts the words in $chunks of text, without joining them together.  FIXME
+# trim standard headers/footers?
+def _count_chunk_words(chunks: Iterable[bytes]) -> int:
+    words = 0
+    # whether the previous chunk ended part-way through a word
+    in_word = False
+    for chunk in chunks:
+        words += len(chunk.split())
+        if in_word and not chunk[:1].isspace():
+            # the word continued from the previous chunk
+            words -= 1
+        in_word = not chunk[-1:].isspace()
+    return words
 
-# counts the words in $textfile. FIXME trim standard headers/footers?
-def _count_words(textfile):
-    return len(textfile.split()) if textfile is not None else None
 
+# counts the words in $path, or None if it couldn't be converted
+def _word_count(path: Path) -> int | None:
+    return _converted(path, _count_chunk_words)
 
-# gathers metadata from the ebook.  annoyingly, calibre doesn't support
-# Python3, and there aren't many other easy options...
-def _read_metadata(path) -> dict[str, str]:
+
+# returns calibre's get_metadata(), or None if it isn't installed.  annoyingly,
+# calibre isn't packaged as a library, so it needs some setting up first.
+@functools.cache
+def _calibre() -> Any:
     sys.path.insert(0, "/usr/lib/calibre")
     sys.resources_location = "/usr/share/calibre"  # type: ignore[attr-defined]
     sys.extensions_location = "/usr/lib/calibre/calibre/plugins"  # type: ignore[attr-defined]
 
-    from calibre.ebooks.metadata.meta import get_metadata
+    try:
+        from calibre.ebooks.metadata.meta import get_metadata
+    except ModuleNotFoundError:
+        return None
+    return get_metadata
+
+
+# gathers metadata from the ebook.  the common formats are read directly, and
+# calibre is only used for the rest (or if that fails).
+def _read_metadata(path) -> dict[str, str]:
+    metadata = read_metadata(path)
+    if metadata is not None:
+        return metadata
+
+    get_metadata = _calibre()
+    if get_metadata is None:
+        return placeholder(path)
 
     ext = path.suffix[1:]
     ext = ext if ext in ["txt", "pdf"] else "mobi"
-    mi = get_metadata(open(path, "r+b"), ext, force_read_metadata=True)
+    with open(path, "rb") as fh:
+        mi = get_metadata(fh, ext, force_read_metadata=True)
     return {
         "Title": mi.get("title"),
         "Authors": mi.get("authors"),
@@ -84,59 +162,171 @@ class Metadata:
             return "en"
 
 
-def _ignore_item(path):
-    ignore_fname = ["My Clippings.txt"]
-    ignore_ext = [".kfx"]
-
-    return (
-        not path.is_file()
-        or path.name[0] == "."
-        or path.name in ignore_fname
-        or path.suffix in ignore_ext
-    )
-
-
 def get_ebooks(kindle_dir):
     """Find all the interesting-looking files in $kindle_dir."""
-    for d in "articles", "short-stories", "books", "non-fiction":
-        category = "novels" if d == "books" else d
-        for f in (kindle_dir / d).iterdir():
-            if _ignore_item(f):
+    for category, entry, name in KindleIndex.scan(kindle_dir).ebooks():
+        yield (category, entry.path, name)
+
+
+# gets the metadata and wordcount of the ebook at $path.  this is run in a
+# worker process, so everything has to be picklable.
+def _scan(path):
+    return (_read_metadata(path), _word_count(path))
+
+
+# yields the position and result of _scan() for each of the files in
+# $entries, as each one finishes, using up to $workers processes (by default,
+# one per CPU).  if any of them fail, the first error is raised once all the
+# others have finished.
+def _scan_all(entries, workers=None):
+    # convert the largest files first, so they don't hold up the end
+    order = sorted(range(len(entries)), key=lambda i: entries[i].size, reverse=True)
+    # no point starting processes that won't have anything to do
+    workers = min(workers or os.cpu_count() or 1, len(entries))
+
+    if workers <= 1:
+        for i in order:
+            yield (i, _scan(entries[i].path))
+        return
+
+    error = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_scan, entries[i].path): i for i in order}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # noqa: BLE001
+                error = error or e
                 continue
-            yield (category, f, str(Path(category, f.name)))
+            yield (futures[future], result)
 
-    for f in kindle_dir.iterdir():
-        if _ignore_item(f):
-            continue
-        yield ("articles", f, str(Path("articles", f.name)))
+    if error is not None:
+        raise error
 
 
-def process(df, kindle_dir, force=False):
-    kindle_dir = Path(kindle_dir)
+@functools.cache
+def _default_cache() -> ResponseCache:
+    """Return the ResponseCache used when none is given."""
+    return ResponseCache(Config.from_file()("kindle.cache"))
 
-    ebooks = []
 
-    for category, path, name in get_ebooks(kindle_dir):
-        if not force and name in df.index:
-            ebook = df.loc[name].to_dict()
-            ebook["BookId"] = name
-            ebooks.append(ebook)
+def _digest(path: Path) -> str:
+    """Return a hash of the contents of $path."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@attr.s
+class Fingerprints:
+    """The contents of ebooks, and what was found in them, by name and by hash.
+
+    Each name maps to the size, mtime and hash of the file when it was last
+    seen, so unchanged files don't need hashing again.  Each hash maps to the
+    content columns and when it was added, so files are only converted when
+    their contents are new: an ebook that's been renamed or moved to another
+    category is recognised by its hash.
+    """
+
+    cache: ResponseCache = attr.ib()
+
+    def digest(self, name: str, entry: Entry) -> tuple[str, bool]:
+        """Return the hash of the file $entry, and whether $name has been seen before."""
+        seen = self.cache.get("ebook-file", name)
+        if seen is not None:
+            size, mtime, digest = json.loads(seen)
+            if (size, mtime) == (entry.size, entry.mtime_ns):
+                return (digest, True)
+
+        digest = _digest(entry.path)
+        self.cache.put(
+            "ebook-file", name, json.dumps([entry.size, entry.mtime_ns, digest]).encode()
+        )
+        return (digest, seen is not None)
+
+    def get(self, digest: str) -> dict[str, Any] | None:
+        """Return the content columns and Added of the ebook with hash $digest, if known."""
+        data = self.cache.get("ebook", digest)
+        if data is None:
+            return None
+        content: dict[str, Any] = json.loads(data)
+        content["Added"] = pd.Timestamp(content.get("Added"))
+        return content
+
+    def put(self, digest: str, ebook: dict[str, Any]) -> None:
+        """Remember the content columns and Added of $ebook, whose hash is $digest."""
+        content = {
+            col: None if pd.isna(ebook[col]) else ebook[col] for col in [*_CONTENT_COLUMNS, "Added"]
+        }
+        if content["Words"] is None:
+            # try again next time, in case it was a temporary problem
+            return
+        content["Words"] = int(content["Words"])
+        if content["Added"] is not None:
+            content["Added"] = content["Added"].isoformat()
+        self.cache.put("ebook", digest, json.dumps(content).encode())
+
+
+def process(df, kindle_dir, force=False, workers=None, cache=None):
+    """Return the ebooks in $kindle_dir, with their metadata and length.
+
+    Ebooks are recognised by their contents, using the fingerprints in
+    $cache, so only new or changed files are converted (or all of them if
+    $force is set).  Those are converted in parallel, using up to $workers
+    processes (by default, one per CPU).  Files that the cache doesn't know
+    about yet but which are already in $df are assumed to be unchanged.
+
+    Ebooks keep the date they were added: from $df if it has them already,
+    or from the fingerprints if they've been moved.  Otherwise it's the date
+    they were last modified.
+    """
+    fingerprints = Fingerprints(cache or _default_cache())
+    fingerprints.cache.prefetch("ebook-file")
+    fingerprints.cache.prefetch("ebook")
+
+    ebooks = []
+    new = []
+
+    for category, entry, name in KindleIndex.scan(kindle_dir).ebooks():
+        added = df.loc[name, "Added"] if name in df.index else pd.NaT
+        ebook = {"BookId": name, "Category": category}
+        ebooks.append(ebook)
+
+        digest, seen = fingerprints.digest(name, entry)
+        content = fingerprints.get(digest)
+        if content is None and not seen and name in df.index:
+            # from before the fingerprints were kept
+            content = {col: df.loc[name, col] for col in ["Added", *_CONTENT_COLUMNS]}
+            fingerprints.put(digest, content)
+
+        if pd.isna(added) and content is not None:
+            added = content["Added"]
+        if pd.isna(added):
+            added = pd.Timestamp(entry.mtime_ns, unit="ns").floor("D")
+        ebook["Added"] = added
+
+        if content is not None and not force:
+            ebook.update({col: content[col] for col in _CONTENT_COLUMNS})
             continue
 
-        # get the metadata and wordcount
-        metadata = Metadata(_read_metadata(path))
-        words = _count_words(_as_text(path))
+        # filled in as the new ebooks are scanned
+        new.append((ebook, entry, digest))
 
-        ebooks.append(
+    # remember each one as soon as it's done, in case any of the others fail
+    for i, (metadata, words) in _scan_all([entry for _, entry, _ in new], workers):
+        ebook, _, digest = new[i]
+        metadata = Metadata(metadata)
+        ebook.update(
             {
-                "BookId": name,
                 "Author": metadata.author,
                 "Title": metadata.title,
-                "Category": category,
                 "Language": metadata.language,
-                "Added": pd.Timestamp(path.stat().st_mtime, unit="s").floor("D"),
                 "Words": words,
             }
         )
+        fingerprints.put(digest, ebook)
 
-    return pd.DataFrame(ebooks).set_index("BookId")
+    columns = ["BookId", "Author", "Title", "Category", "Language", "Added", "Words"]
+    return pd.DataFrame(ebooks, columns=columns).set_index("BookId")
@@ -4,6 +4,9 @@
 
 from __future__ import annotations
 
+from pathlib import Path
+import shutil
+
 import pytest
 
 
@@ -23,3 +26,11 @@ def pytest_collection_modifyitems(config, items) -> None:
     for item in items:
         if "slow" in item.keywords:
             item.add_marker(skip_slow)
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    """Return a copy of the test collection, which can be written to (eg. by caching)."""
+    path = tmp_path / "data"
+    shutil.copytree("t/data/2019-12-04", path, ignore=shutil.ignore_patterns(".cache"))
+    return path
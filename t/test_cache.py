@@ -0,0 +1,51 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+
+from reading.cache import ResponseCache
+
+
+def test_cache(tmp_path: Path) -> None:
+    now = [1000.0]
+    cache = ResponseCache(tmp_path / "cache.sqlite", clock=lambda: now[0])
+
+    assert cache.get("book", 1) is None, "Missing"
+
+    data = b"<book>" + b"blah " * 1000 + b"</book>"
+    cache.put("book", 1, data)
+    assert cache.get("book", 1) == data
+    assert cache.get("book", "1") == data, "Keys are strings"
+    assert cache.get("series", 1) is None, "Each kind is separate"
+
+    (stored,) = sqlite3.connect(tmp_path / "cache.sqlite").execute("SELECT data FROM responses")
+    assert len(stored[0]) < len(data), "Stored compressed"
+
+    now[0] += 100
+    assert cache.get("book", 1, ttl=100) == data, "Still fresh"
+    assert cache.get("book", 1, ttl=99) is None, "Stale"
+
+    cache.put("book", 2, data, fetched=0)
+    assert cache.get("book", 2, ttl=100) is None, "Given an earlier fetch time"
+
+    cache.close()
+    assert ResponseCache(tmp_path / "cache.sqlite").get("book", 1) == data, "Persisted"
+
+
+def test_cache_prefetch(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    for key in range(1200):
+        cache.put("book", key, str(key).encode())
+    cache.put("series", 1, b"series")
+
+    assert cache.prefetch("book", [1, 2, 1199, 5000]) == 3, "Only the cached ones were found"
+    assert cache.prefetch("book", range(1200)) == 1200, "Lots of keys at once"
+    assert cache.prefetch("series") == 1, "All of a kind"
+
+    # prefetched entries don't need the database
+    cache.put("book", 2, b"updated")
+    cache.close()
+    assert cache.get("book", 1199) == b"1199"
+    assert cache.get("book", 2) == b"updated", "Prefetched entries are kept up to date"
@@ -18,7 +18,7 @@ from reading.collection import Collection
 
 def test_chain() -> None:
     """General tests."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain(df=c.all)
 
@@ -32,7 +32,7 @@ def test_chain() -> None:
 
 
 def test_from_series_id() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_series_id(c.all, 49118)
     assert s, "Created a Chain from a SeriesId"
@@ -41,7 +41,7 @@ def test_from_series_id() -> None:
 
 
 def test_from_series_name() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_series_name(c.all, "Culture")
     assert s, "Created a Chain from a series name"
@@ -52,7 +52,7 @@ def test_from_series_name() -> None:
 
 
 def test_from_author_id() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_author_id(c.all, 3354)
     assert s, "Created a Chain from an AuthorId"
@@ -61,7 +61,7 @@ def test_from_author_id() -> None:
 
 
 def test_from_author_name() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_author_name(c.all, "Murakami")
     assert s, "Created a Chain from an author name"
@@ -72,7 +72,7 @@ def test_from_author_name() -> None:
 
 
 def test_chain_options() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_series_id(c.all, 49118, order=Order.PUBLISHED)
     assert s.order == Order.PUBLISHED, "Can override the order of series"
@@ -84,7 +84,7 @@ def test_chain_options() -> None:
 
 
 def test_read() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_author_name(c.all, "Murakami")
     assert list(s.read.Title) == [
@@ -100,7 +100,7 @@ def test_read() -> None:
 
 
 def test_currently_reading() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_author_name(c.all, "Vonnegut")
     assert s.currently_reading, "currently reading Vonnegut"
@@ -113,7 +113,7 @@ def test_currently_reading() -> None:
 
 
 def test_last_read() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_author_name(c.all, "Gaston Leroux")
     assert s.last_read is None, "Never read"
@@ -129,7 +129,7 @@ def test_last_read() -> None:
 
 
 def test_sort() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     # shuffle them up a bit
     books = c.df[c.df.Series.str.contains("Culture", na=False)].sort_values("Title")
@@ -149,7 +149,7 @@ def test_sort() -> None:
 
 def test_numeric_sort() -> None:
     """Ensure the entries are sorted numerically rather than as alphabetically."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     s = Chain.from_series_name(c.df, "Rougon-Macquart")
     assert list(s.sort()._df.Entry) == [str(x + 1) for x in range(20)]
@@ -159,7 +159,7 @@ def test_numeric_sort() -> None:
 
 
 def test_remaining() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     # shuffle them up a bit
     books = c.df
@@ -457,7 +457,7 @@ def _format_schedule(
 
 # FIXME probably not needed once there's type annotations
 def test_scheduling_raw_output() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     df = c.df[c.df.SeriesId == 49118]
     chain = Chain(df=df)
 
@@ -472,7 +472,7 @@ def test_scheduling_raw_output() -> None:
 
 
 def test_scheduling() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     df = c.df[c.df.SeriesId == 49118]
     chain = Chain(df=df)
 
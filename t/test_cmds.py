@@ -67,6 +67,17 @@ def test_arg_parser() -> None:
     assert "articles" not in args.categories
 
 
+def test_batch_args() -> None:
+    _parse_bad_cmdline("ook batch")
+
+    args = _parse_cmdline("ook batch suggestions.yml")
+    assert args.spec == "suggestions.yml"
+    assert args.output_dir == ".", "Writes to the current directory by default"
+
+    args = _parse_cmdline("ook batch suggestions.yml --output-dir /tmp")
+    assert args.output_dir == "/tmp"
+
+
 def test_update_args() -> None:
     args = _parse_cmdline("ook update")
     assert args, "Doesn't do very much, but it works"
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import math
+from pathlib import Path
+import shutil
 import textwrap
 
 import numpy as np
@@ -11,16 +13,27 @@ from pandas.testing import assert_frame_equal
 import pytest
 import yaml
 
-from reading.collection import Collection, _process_fixes, read_authorids, read_nationalities
-from reading.config import Config
-from reading.storage import Store
+import reading.collection
+from reading.collection import (
+    _RESIDENT,
+    Collection,
+    _dedup_keys,
+    _ebook_parse_title,
+    _ebook_split_titles,
+    _fingerprint,
+    _process_fixes,
+    read_authorids,
+    read_nationalities,
+)
+from reading.config import Config, df_columns
+from reading.storage import Store, load_df, same_contents, save_df
 
 
 ################################################################################
 
 
 def test_read_authorids() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     assert read_authorids(c) == {
         1654,
@@ -39,7 +52,7 @@ def test_read_authorids() -> None:
 
 
 def test_read_nationalities() -> None:
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     assert read_nationalities(c) == {"fr", "us", "jp", "gb"}
 
@@ -57,16 +70,93 @@ def test_collection() -> None:
         repr(c) == "Collection(_df=[0 books], merge=False, dedup=False)"
     ), "Legible __repr__ for an empty collection"
 
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     assert c, "Created a collection from a directory"
     assert (
         repr(c) == "Collection(_df=[157 books], merge=False, dedup=False)"
     ), "Legible __repr__ for a collection with books"
 
 
+def test_collection_snapshot(tmp_path: Path) -> None:
+    """Collections are snapshotted and reused until the data changes."""
+    data_dir = tmp_path / "data"
+    shutil.copytree("t/data/2019-12-04", data_dir, ignore=shutil.ignore_patterns(".cache"))
+
+    uncached = Collection.from_dir(data_dir, cache=False)
+    assert not list(data_dir.glob(".cache/*.pickle")), "No snapshot without caching"
+
+    assert_frame_equal(Collection.from_dir(data_dir).all, uncached.all)
+    assert list(data_dir.glob(".cache/*.pickle")), "A snapshot was created"
+    assert_frame_equal(Collection.from_dir(data_dir).all, uncached.all)  # from the snapshot
+
+    c = Collection.from_dir(data_dir, fixes=False, metadata=False)
+    assert not c.all.equals(uncached.all), "Different options use a different snapshot"
+
+    # changing a file makes the snapshot stale
+    (data_dir / "config.yml").write_text("kindle:\n  words_per_page: 300\n")
+    c = Collection.from_dir(data_dir)
+    assert_frame_equal(c.all, Collection.from_dir(data_dir, cache=False).all)
+    assert not c.all.equals(uncached.all), "The snapshot was rebuilt"
+
+
+def test__fingerprint(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    shutil.copytree("t/data/2019-12-04", tmp_path, dirs_exist_ok=True)
+    key = _fingerprint(tmp_path)
+    assert _fingerprint(tmp_path) == key
+
+    (tmp_path / "ebooks.csv").write_text("")
+    assert _fingerprint(tmp_path) != key, "A file changed"
+    key = _fingerprint(tmp_path)
+
+    monkeypatch.setattr(reading.collection, "_code_version", lambda: "changed")
+    assert _fingerprint(tmp_path) != key, "The code changed"
+
+
+def test_collection_resident(tmp_path: Path) -> None:
+    """Collections are kept in memory between loads, until the files change."""
+    shutil.copytree("t/data/2019-12-04", tmp_path, dirs_exist_ok=True)
+
+    c1 = Collection.from_dir(tmp_path)
+    (tmp_path / ".cache").rename(tmp_path / "old-cache")  # so the snapshot isn't used
+    c2 = Collection.from_dir(tmp_path)
+    assert_frame_equal(c1.all, c2.all)
+    assert not (tmp_path / ".cache").exists(), "Reused the in-memory copy"
+
+    (tmp_path / "goodreads.csv").write_text(
+        "".join((tmp_path / "goodreads.csv").read_text().splitlines(keepends=True)[:3])
+    )
+    assert len(Collection.from_dir(tmp_path).all) < len(c1.all), "Reloaded after changes"
+
+
+def test_collection_hashes(tmp_path: Path) -> None:
+    """Row hashes change only when a book's interesting fields do."""
+    shutil.copytree("t/data/2019-12-04", tmp_path, dirs_exist_ok=True)
+    c = Collection.from_dir(tmp_path, cache=False)
+    hashes = c.hashes()
+
+    assert hashes.index.equals(c.all.index)
+    assert hashes.is_unique, "Each book has a different hash"
+
+    df = c.all
+    assert Collection(df[sorted(df.columns)]).hashes().equals(hashes), "Column order is ignored"
+
+    df = c.all.astype({"Title": object, "Author": object})
+    df.loc[9556, "Title"] = "One Of Our Elephants Is Missing"
+    df["AvgRating"] = 1.0
+    changed = Collection(df).hashes() != hashes
+    assert list(changed[changed].index) == [9556], "Only the modified book has a new hash"
+
+    # the hashes are snapshotted along with the books
+    Collection.from_dir(tmp_path)
+    _RESIDENT.clear()  # so the snapshot is used
+    c = Collection.from_dir(tmp_path)
+    assert c._hashes is not None  # pylint: disable=protected-access
+    assert c.hashes().equals(hashes)
+
+
 def test_kindle_books() -> None:
     """Tests specific to ebooks."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     df = c.all
     df = df[df.Shelf == "kindle"]
 
@@ -109,16 +199,16 @@ def test_collection_columns() -> None:
         "_Mask",  # FIXME
     ]
 
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     assert list(c._df.columns) == columns, "All the columns are there"
 
-    c = Collection.from_dir("t/data/2019-12-04", metadata=False)
+    c = Collection.from_dir("t/data/2019-12-04", metadata=False, cache=False)
     assert list(c._df.columns) == columns, "All the columns are still there when metadata is off"
 
 
 def test_column_contents() -> None:
     """Test the columns have reasonable dtypes."""
-    df = Collection.from_dir("t/data/2019-12-04")._df
+    df = Collection.from_dir("t/data/2019-12-04", cache=False)._df
     b = df.loc[2366570]  # Les Chouans
 
     # timestamp columns are ok
@@ -134,7 +224,12 @@ def test_column_contents() -> None:
     # missing publication year
     assert np.isnan(b.Published)
 
-    c = Collection.from_dir("t/data/2019-12-04", fixes=False)
+    # compact dtypes
+    assert isinstance(df.Shelf.dtype, pd.CategoricalDtype), "Repeated strings are categorical"
+    assert df.AuthorId.dtype == "Int64", "IDs are integers, despite missing values"
+    assert df.Borrowed.dtype == "boolean"
+
+    c = Collection.from_dir("t/data/2019-12-04", fixes=False, cache=False)
     assert set(c._df.Category) == {
         "articles",
         "novels",
@@ -147,8 +242,8 @@ def test_column_contents() -> None:
 
 def test_reset() -> None:
     """Test the reset() method."""
-    c1 = Collection.from_dir("t/data/2019-12-04")
-    c2 = Collection.from_dir("t/data/2019-12-04")
+    c1 = Collection.from_dir("t/data/2019-12-04", cache=False)
+    c2 = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     assert_frame_equal(c1.df, c2.df)  # Identical dataframes are the same
 
@@ -175,7 +270,7 @@ def _stringify_df(df: pd.DataFrame) -> str:
 
 @pytest.mark.xfail()
 def test_ebook_metadata_overlay() -> None:
-    store = Store("t/data/overlays/")
+    store = Store("t/data/overlays/", columnar=False)
 
     got = _stringify_df(_ebook_metadata_overlay(store.ebooks, store.books))  # noqa: F821
     print(got)
@@ -203,7 +298,7 @@ Pages                  528.0             541.0
 @pytest.mark.xfail()
 def test_author_overlay() -> None:
     """Creating an overlay for the author metadata."""
-    store = Store("t/data/overlays/")
+    store = Store("t/data/overlays/", columnar=False)
 
     got = _stringify_df(
         _author_overlay(store.goodreads, store.authors, pd.DataFrame()),  # noqa: F821
@@ -228,7 +323,7 @@ Nationality    us      no    jp       ht
 @pytest.mark.xfail()
 def test_author_overlay_fixed() -> None:
     """Creating an overlay from the author metadata, plus manual fixes."""
-    store = Store("t/data/overlays/")
+    store = Store("t/data/overlays/", columnar=False)
 
     author_fixes = [
         {"AuthorId": 1377, "Gender": "male"},  # missing value
@@ -328,8 +423,8 @@ def test_duplicate_fixes() -> None:
 
 def test_fixes() -> None:
     """Test fix application."""
-    c_with = Collection.from_dir("t/data/2019-12-04", metadata=False, fixes=True)
-    c_wout = Collection.from_dir("t/data/2019-12-04", metadata=False, fixes=False)
+    c_with = Collection.from_dir("t/data/2019-12-04", metadata=False, fixes=True, cache=False)
+    c_wout = Collection.from_dir("t/data/2019-12-04", metadata=False, fixes=False, cache=False)
 
     assert c_with.all.shape == c_wout.all.shape, "The shape hasn't changed"
     assert not c_with.all.equals(c_wout.all), "But they're not the same"
@@ -359,8 +454,8 @@ def test_fixes() -> None:
 
 def test_metadata() -> None:
     """Test metadata application."""
-    c_with = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=True)
-    c_wout = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=False)
+    c_with = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=True, cache=False)
+    c_wout = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=False, cache=False)
 
     assert c_with.all.shape == c_wout.all.shape, "The shape hasn't changed"
     assert not c_with.all.equals(c_wout.all), "But they're not the same"
@@ -374,8 +469,8 @@ def test_metadata() -> None:
 
 
 def test_fix_metadata_precedence() -> None:
-    c_with = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=True)
-    c_fixes = Collection.from_dir("t/data/2019-12-04", fixes=True, metadata=True)
+    c_with = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=True, cache=False)
+    c_fixes = Collection.from_dir("t/data/2019-12-04", fixes=True, metadata=True, cache=False)
 
     # Fixes take precedence over metadata
     assert c_with.all.loc["short-stories/Les_soirees_de_Medan.pdf"].Pages == 290  # from metadata
@@ -387,9 +482,31 @@ def test_fix_metadata_precedence() -> None:
 # merging guts
 
 
+def test_ebook_split_titles() -> None:
+    """The vectorised title-splitting is the same as the per-title version."""
+    titles = pd.concat(
+        [
+            Store("t/data/merging", columnar=False).ebooks.Title,
+            Store("t/data/2019-12-04", columnar=False).ebooks.Title,
+            pd.Series(
+                [
+                    "  Les   Misérables, TOME II. ",  # only matches case-insensitively
+                    "Hester, Volume 2 (of 3) / A Story, Tome I.",  # multiple patterns
+                    "The Title; A subtitle",
+                ]
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    # missing volumes are None in one and NaN in the other
+    expected = titles.apply(_ebook_parse_title).fillna("")
+    assert_frame_equal(_ebook_split_titles(titles).fillna(""), expected)
+
+
 def test_merged() -> None:
     """General tests of the guts of the merge process."""
-    c = Collection.from_dir("t/data/merging/")
+    c = Collection.from_dir("t/data/merging/", cache=False)
 
     df_clean = c._df.copy()
     df = c._merged()
@@ -402,7 +519,7 @@ def test_merged() -> None:
 
 def test_merged_goodreads() -> None:
     """Simple case: a goodreads book."""
-    c = Collection.from_dir("t/data/merging/")
+    c = Collection.from_dir("t/data/merging/", cache=False)
     df = c._merged()
 
     book = df.loc[956320]
@@ -420,7 +537,7 @@ def test_merged_goodreads() -> None:
 
 def test_merged_kindle() -> None:
     """Simple case: a kindle book."""
-    c = Collection.from_dir("t/data/merging/")
+    c = Collection.from_dir("t/data/merging/", cache=False)
     df = c._merged()
 
     book = df.loc["novels/pg13947.mobi"]
@@ -431,9 +548,72 @@ def test_merged_kindle() -> None:
     assert book["_Mask"], "Mask has been retained"
 
 
+def test_merged_cached() -> None:
+    """The merged books are only recalculated when necessary."""
+    c = Collection.from_dir("t/data/merging/", cache=False)
+    merged = c._merge()[0]
+
+    c.categories("non-fiction")
+    assert c._merge()[0] is merged, "Filtering doesn't require re-merging"
+    assert c._merged()["_Mask"].any(), "But the mask is still updated"
+    assert not c._merged()["_Mask"].all()
+
+    c.reset()
+    assert c._merge()[0] is not merged, "Resetting re-merges"
+
+    merged = c._merge()[0]
+    c.set_schedules([{"author": "Alexandre Dumas"}])
+    assert c._merge()[0] is not merged, "Scheduling re-merges"
+    assert c._merge()[0].Scheduled.notna().any(), "The schedules are included"
+
+
+def test_merge_info() -> None:
+    """The information used to merge the books."""
+    c = Collection.from_dir("t/data/merging/", cache=False)
+    info = c.merge_info()
+
+    assert list(info.columns) == df_columns("volumes"), "It can be saved in the store"
+    assert info.index.equals(c._df.index.astype(str)), "BookIds are strings"
+
+    book = info.loc["956323"]  # Le Comte de Monte-Cristo I
+    assert book.Volume == "I"
+    assert book.MergeId == "Alexandre Dumas|Le Comte de Monte-Cristo"
+    assert book.MergedTitle == "Le Comte de Monte-Cristo"
+
+    book = info.loc["956325"]  # Vingt ans après
+    assert pd.isna(book.Volume), "Not a multi-volume book"
+    assert pd.isna(book.MergeId), "So it's not merged"
+
+
+def test_merge_info_stored() -> None:
+    """Stored merge information is used if it's up-to-date."""
+    c = Collection.from_dir("t/data/merging/", cache=False)
+    volumes = c.merge_info()
+    volumes.loc["956320", "MergedTitle"] = "Stored Title"
+
+    df = c._df
+    c = Collection(df.copy(), volumes=volumes)
+    assert c._merged().loc[956320].Title == "Stored Title", "The stored information was used"
+
+    volumes.loc["956320", "Title"] = "Old Title"
+    c = Collection(df.copy(), volumes=volumes)
+    assert c._merged().loc[956320].Title != "Stored Title", "Stale information is ignored"
+
+
+def test_merge_info_saved(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Saved merge information is still up-to-date, including for books with empty fields."""
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
+    assert (c._df.Author == "").any()
+    save_df("volumes", c.merge_info(), tmp_path / "volumes.csv")
+    volumes = load_df("volumes", fname=str(tmp_path / "volumes.csv"), columnar=False)
+
+    monkeypatch.setattr(reading.collection, "_merge_info", lambda _: pytest.fail("Stale"))
+    assert same_contents(Collection(c._df.copy(), volumes=volumes).merge_info(), volumes)
+
+
 def test_merged_added() -> None:
     """The earliest Added date is used."""
-    c = Collection.from_dir("t/data/merging/")
+    c = Collection.from_dir("t/data/merging/", cache=False)
     df = c._merged()
 
     book = df.loc[21124]
@@ -447,10 +627,10 @@ def test_merged_added() -> None:
 
 def test_merge() -> None:
     """General merging tests."""
-    c_un = Collection.from_dir("t/data/merging")
+    c_un = Collection.from_dir("t/data/merging", cache=False)
     assert c_un.dedup is False, "No merging by default"
 
-    c = Collection.from_dir("t/data/merging", merge=True)
+    c = Collection.from_dir("t/data/merging", merge=True, cache=False)
     assert c.merge is True, "Enabled merging"
 
     assert_frame_equal(c._df, c_un._df)  # underlying dataframes are identical
@@ -458,14 +638,14 @@ def test_merge() -> None:
 
 def test_merge_all() -> None:
     """Test merging."""
-    c = Collection.from_dir("t/data/merging", merge=True)
+    c = Collection.from_dir("t/data/merging", merge=True, cache=False)
 
     assert c.all is not None, "it didn't explode"
 
 
 def test_merge_df() -> None:
     """Test merging."""
-    c = Collection.from_dir("t/data/merging", merge=True)
+    c = Collection.from_dir("t/data/merging", merge=True, cache=False)
 
     assert c.df is not None, "it didn't explode"
 
@@ -482,18 +662,70 @@ def test_merge_df() -> None:
 
 def test_dedup() -> None:
     """Test deduplication."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     assert c.dedup is False, "No dedup by default"
 
-    c = Collection.from_dir("t/data/2019-12-04", merge=True, dedup=True)
+    c = Collection.from_dir("t/data/2019-12-04", merge=True, dedup=True, cache=False)
     assert c.merge is True, "Enabled merging"
     assert c.dedup is True, "Enabled dedup"
 
 
+def test_dedup_keys() -> None:
+    """Test working out which books are copies of the same work."""
+    df = pd.DataFrame(
+        {
+            "Author": ["Iain Banks", "iain banks", "Iain Banks", "Iain Banks", None, None],
+            "Title": ["The Crow Road", "The Crow-Road", "Whit", "The Crow Road", None, None],
+            "Work": [950451, np.nan, np.nan, 123, np.nan, np.nan],
+        },
+        index=[1, 2, 3, 4, 5, 6],
+    )
+
+    keys = _dedup_keys(df)
+    assert keys[0] == keys[1], "Copy without a Work matched by author and title"
+    assert keys[0] != keys[2], "Different title"
+    assert keys[0] != keys[3], "Different Work"
+    assert keys[4] != keys[5], "Books without titles are never duplicates"
+
+
+def test_dedup_copies() -> None:
+    """Test deduplication removes unread copies."""
+    c = Collection.from_dir("t/data/2019-12-04", merge=True, cache=False)
+    c_dd = Collection.from_dir("t/data/2019-12-04", merge=True, dedup=True, cache=False)
+
+    assert {12021, 17242485} < set(c.all.index), "Unread copies are there without dedup"
+    assert not {12021, 17242485} & set(c_dd.all.index), "Unread copies of a read book removed"
+    assert {12022, 12023} < set(c_dd.all.index), "Entries for each reading are kept"
+    assert len(c_dd.all) == len(c.all) - 2, "Nothing else removed"
+
+    assert_frame_equal(c_dd.all, c.all[~c.all.index.isin([12021, 17242485])])
+
+    # deduplication happens before filtering, so the shelf of a removed copy
+    # doesn't select it
+    assert c.all.loc[12021, "Shelf"] == "pending"
+    c_dd.shelves("pending")
+    assert 12021 not in c_dd.df.index, "Filters apply to the remaining copy"
+    assert set(c_dd.df.Shelf) == {"pending"}
+    assert set(c_dd.df.index) < set(c.shelves("pending").df.index)
+
+
+@pytest.mark.filterwarnings("error::pandas.errors.SettingWithCopyWarning")
+@pytest.mark.parametrize("dedup", (False, True))
+def test_merged_df_is_a_copy(dedup: bool) -> None:
+    """Changing the selected books doesn't affect the merged ones cached by the collection."""
+    c = Collection.from_dir("t/data/2019-12-04", merge=True, dedup=dedup, cache=False).shelves(
+        "kindle"
+    )
+
+    df = c.df
+    df["wpp"] = df.Words / df.Pages
+    assert "wpp" not in c.df.columns
+
+
 def test_dedup_requires_merge() -> None:
     """Deduplication currently requires merge to be enabled."""
     with pytest.raises(ValueError, match="merge"):
-        Collection.from_dir("t/data/2019-12-04", merge=False, dedup=True)
+        Collection.from_dir("t/data/2019-12-04", merge=False, dedup=True, cache=False)
 
 
 ### Scheduling #################################################################
@@ -503,14 +735,14 @@ def test_dedup_requires_merge() -> None:
 
 def test_set_empty_schedule() -> None:
     """It's fine if there are no schedules configured."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     c.set_schedules([])
     assert c
 
 
 def test_set_schedules_changed_something() -> None:
     """When there's something to do, it has an effect on the Collection."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     config = Config.from_file("t/data/2019-12-04/config.yml")
 
     assert config("scheduled")
@@ -522,7 +754,7 @@ def test_set_schedules_changed_something() -> None:
 
 def test_set_schedules() -> None:
     """It doesn't change the config."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     config = Config.from_file("t/data/2019-12-04/config.yml")
 
     c.set_schedules(config("scheduled"))
@@ -534,19 +766,19 @@ def test_set_schedules() -> None:
 def test_schedule_without_matches() -> None:
     """It still works even if a schedule doesn't match anything."""
     # FIXME should lint for this and/or fully-read ones?
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     c.set_schedules([{"author": "blabla"}])
 
 
 def test_schedule_without_selection() -> None:
     """A schedule requires something to schedule."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     with pytest.raises(ValueError, match="must specify at least one"):
         c.set_schedules([{"per_year": 4}])
 
 
 def test_schedule_duplicated() -> None:
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     old = c.df.Scheduled.copy()
 
@@ -564,7 +796,7 @@ def test_schedule_duplicated() -> None:
 
 
 def test_scheduled_filter_in() -> None:
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     assert c.df.Scheduled.notna().any(), "Some books are scheduled"
     assert c.df.Scheduled.isna().any(), "Some books are unscheduled"
@@ -572,7 +804,7 @@ def test_scheduled_filter_in() -> None:
 
 
 def test_scheduled_filter_out() -> None:
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     assert c.df.Scheduled.isna().any(), "Some books are unscheduled"
     assert (
@@ -581,7 +813,7 @@ def test_scheduled_filter_out() -> None:
 
 
 def test_scheduled_filter_comprehensive() -> None:
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     all_books = set(c.df.index)
 
@@ -602,7 +834,7 @@ def test_scheduled_filter_comprehensive() -> None:
 
 
 def test_scheduled_at() -> None:
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     config = Config.from_file("t/data/2019-12-04/config.yml")
 
     c.set_schedules(config("scheduled"))
@@ -622,7 +854,7 @@ def test_scheduled_at() -> None:
 
 def test_scheduled_at_later() -> None:
     """Try again, this time later on in the year."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     config = Config.from_file("t/data/2019-12-04/config.yml")
 
     c.set_schedules(config("scheduled"))
@@ -637,7 +869,7 @@ def test_scheduled_at_later() -> None:
 
 def test_scheduled_at_different_year() -> None:
     """It still works when the date is in a different year."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
     config = Config.from_file("t/data/2019-12-04/config.yml")
 
     c.set_schedules(config("scheduled"))
@@ -657,7 +889,7 @@ def test_scheduled_at_different_year() -> None:
 
 def test_df() -> None:
     """Test the .df property."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     assert c.df is not None
 
@@ -666,7 +898,7 @@ def test_df() -> None:
 
 def test_all() -> None:
     """Test the .all property."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     assert_frame_equal(c.df, c.all)  # .df and .all are the same when no filters applied
 
@@ -676,7 +908,7 @@ def test_all() -> None:
 
 def test_read() -> None:
     """Test the .read property."""
-    c = Collection.from_dir("t/data/2019-12-04/")
+    c = Collection.from_dir("t/data/2019-12-04/", cache=False)
 
     df = c.read
 
@@ -701,14 +933,14 @@ def test_read() -> None:
 def test_shelves_filter_noop() -> None:
     """Using shelves() without any selection is a noop."""
     assert_frame_equal(
-        Collection.from_dir("t/data/2019-12-04").shelves().df,
-        Collection.from_dir("t/data/2019-12-04").df,
+        Collection.from_dir("t/data/2019-12-04", cache=False).shelves().df,
+        Collection.from_dir("t/data/2019-12-04", cache=False).df,
     )
 
 
 def test_shelves_filter_in() -> None:
     """Use shelves() to filter books in."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.shelves("library")
 
@@ -718,7 +950,7 @@ def test_shelves_filter_in() -> None:
 
 def test_shelves_filter_out() -> None:
     """Use shelves() to filter books out."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.shelves("library", exclude=True)
 
@@ -729,11 +961,13 @@ def test_shelves_filter_out() -> None:
 
 def test_shelves_filter_comprehensive() -> None:
     """All the books are either included or excluded."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     df = pd.concat(
         [
-            Collection.from_dir("t/data/2019-12-04").shelves("library", exclude=True).df,
-            Collection.from_dir("t/data/2019-12-04").shelves("library").df,
+            Collection.from_dir("t/data/2019-12-04", cache=False)
+            .shelves("library", exclude=True)
+            .df,
+            Collection.from_dir("t/data/2019-12-04", cache=False).shelves("library").df,
         ]
     )
     assert_frame_equal(df, c.df, check_like=True)  # the rows get mixed up
@@ -745,14 +979,14 @@ def test_shelves_filter_comprehensive() -> None:
 def test_languages_filter_noop() -> None:
     """Using languages() without any selection is a noop."""
     assert_frame_equal(
-        Collection.from_dir("t/data/2019-12-04").languages().df,
-        Collection.from_dir("t/data/2019-12-04").df,
+        Collection.from_dir("t/data/2019-12-04", cache=False).languages().df,
+        Collection.from_dir("t/data/2019-12-04", cache=False).df,
     )
 
 
 def test_languages_filter_in() -> None:
     """Use languages() to filter books in."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.languages("fr")
 
@@ -762,7 +996,7 @@ def test_languages_filter_in() -> None:
 
 def test_languages_filter_out() -> None:
     """Use languages() to filter books out."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.languages("fr", exclude=True)
 
@@ -773,11 +1007,11 @@ def test_languages_filter_out() -> None:
 
 def test_languages_filter_comprehensive() -> None:
     """All the books are either included or excluded."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     df = pd.concat(
         [
-            Collection.from_dir("t/data/2019-12-04").languages("fr", exclude=True).df,
-            Collection.from_dir("t/data/2019-12-04").languages("fr").df,
+            Collection.from_dir("t/data/2019-12-04", cache=False).languages("fr", exclude=True).df,
+            Collection.from_dir("t/data/2019-12-04", cache=False).languages("fr").df,
         ]
     )
     assert_frame_equal(df, c.df, check_like=True)  # the rows get mixed up
@@ -789,14 +1023,14 @@ def test_languages_filter_comprehensive() -> None:
 def test_categories_filter_noop() -> None:
     """Using categories() without any selection is a noop."""
     assert_frame_equal(
-        Collection.from_dir("t/data/2019-12-04").categories().df,
-        Collection.from_dir("t/data/2019-12-04").df,
+        Collection.from_dir("t/data/2019-12-04", cache=False).categories().df,
+        Collection.from_dir("t/data/2019-12-04", cache=False).df,
     )
 
 
 def test_categories_filter_in() -> None:
     """Use categories() to filter books in."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.categories("novels")
 
@@ -806,7 +1040,7 @@ def test_categories_filter_in() -> None:
 
 def test_categories_filter_out() -> None:
     """Use categories() to filter books out."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.categories("novels", exclude=True)
 
@@ -817,11 +1051,13 @@ def test_categories_filter_out() -> None:
 
 def test_categories_filter_comprehensive() -> None:
     """All the books are either included or excluded."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
     df = pd.concat(
         [
-            Collection.from_dir("t/data/2019-12-04").categories("novels", exclude=True).df,
-            Collection.from_dir("t/data/2019-12-04").categories("novels").df,
+            Collection.from_dir("t/data/2019-12-04", cache=False)
+            .categories("novels", exclude=True)
+            .df,
+            Collection.from_dir("t/data/2019-12-04", cache=False).categories("novels").df,
         ]
     )
     assert_frame_equal(df, c.df, check_like=True)  # the rows get mixed up
@@ -832,7 +1068,7 @@ def test_categories_filter_comprehensive() -> None:
 
 def test_borrowed_filter_noop() -> None:
     """Using borrowed() without any selection is a noop."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.borrowed()
 
@@ -842,7 +1078,7 @@ def test_borrowed_filter_noop() -> None:
 
 def test_borrowed_filter_in() -> None:
     """Use borrowed() to filter books in."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.borrowed(True)
 
@@ -852,7 +1088,7 @@ def test_borrowed_filter_in() -> None:
 
 def test_borrowed_filter_out() -> None:
     """Use borrowed() to filter books out."""
-    c = Collection.from_dir("t/data/2019-12-04")
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
     c.borrowed(False)
 
@@ -860,6 +1096,16 @@ def test_borrowed_filter_out() -> None:
     assert remaining == {False}
 
 
+def test_borrowed_filter_merged() -> None:
+    """Filtering on a nullable column works when the books are merged."""
+    c = Collection.from_dir("t/data/2019-12-04", merge=True, cache=False)
+
+    c.borrowed(False)
+
+    assert c._df["_Mask"].dtype == bool
+    assert set(c.df.Borrowed) == {False}
+
+
 # chaining filters
 
 
@@ -867,7 +1113,7 @@ def test_chaining() -> None:
     """Test that filters chain correctly."""
     # fmt: off
     c = (
-        Collection.from_dir("t/data/2019-12-04")
+        Collection.from_dir("t/data/2019-12-04", cache=False)
         .shelves("pending")
         .borrowed(True)
         .languages("fr")
@@ -880,7 +1126,7 @@ def test_chaining() -> None:
 
     # again with different filters
     c = (
-        Collection.from_dir("t/data/2019-12-04")
+        Collection.from_dir("t/data/2019-12-04", cache=False)
         .shelves("pending")
         .categories("graphic")
         .languages("fr", exclude=True)
@@ -896,3 +1142,64 @@ def test_chaining() -> None:
             & ~c.all.Borrowed
         ],
     )
+
+
+# views
+
+
+def test_view() -> None:
+    """Views filter like the collection, without changing it."""
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
+    view = c.view().shelves("pending").borrowed(True).languages("fr")
+
+    assert_frame_equal(view.df, c.shelves("pending").borrowed(True).languages("fr").df)
+
+    c.reset()
+    assert_frame_equal(c.df, c.all)  # the collection isn't filtered by the view
+    assert_frame_equal(view.all, c.all)
+
+
+def test_view_fork() -> None:
+    """Views can be forked without affecting each other."""
+    c = Collection.from_dir("t/data/2019-12-04", merge=True, cache=False)
+    base = c.view().categories("novels")
+    pending = base.shelves("pending")
+    read = base.shelves("read")
+
+    assert set(base.df.Shelf) > {"pending", "read"}
+    assert set(pending.df.Shelf) == {"pending"}
+    assert set(read.df.Shelf) == {"read"}
+    assert set(base.df.Category) == {"novels"}
+
+
+def test_view_lazy() -> None:
+    """Views are evaluated when accessed, so see later changes to the collection."""
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
+    view = c.view().shelves("library")
+
+    assert 10374 not in view.df.index
+    c._df.loc[10374, "Shelf"] = "library"
+    assert 10374 in view.df.index
+
+
+def test_view_snapshot() -> None:
+    """Views keep the selection the collection had when they were created."""
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
+    view = c.languages("fr").view()
+    expected = c.df
+
+    c.shelves("pending")
+    assert_frame_equal(view.df, expected)  # later filters don't apply
+    c.reset()
+    assert_frame_equal(view.df, expected)  # and neither does resetting
+
+
+def test_view_read() -> None:
+    """Views filter the books that have been read."""
+    c = Collection.from_dir("t/data/2019-12-04", cache=False)
+    view = c.view().languages("fr")
+
+    assert set(c.read.Language) > {"fr"}
+    assert set(view.read.Language) == {"fr"}
+    assert set(view.read.Shelf) <= {"read", "currently-reading"}
+    assert_frame_equal(view.read, c.read[c.read.Language == "fr"])
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
+import io
+import json
 from typing import Any
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -19,14 +22,17 @@ from reading.compare import (
     ValueFormats,
     _added,
     _changed,
+    _changed_fields,
     _compare,
+    _events,
     _finished,
     _removed,
     _started,
+    write_changes,
 )
 
 
-c = Collection.from_dir("t/data/2019-12-04")
+c = Collection.from_dir("t/data/2019-12-04", cache=False)
 
 # an unread book
 BOOK_UNREAD = c.df.loc[9556]
@@ -588,6 +594,25 @@ def test_compare_column_order() -> None:
     assert True, "Comparison completed ok"
 
 
+def test_compare_unchanged() -> None:
+    """Books with matching hashes are skipped, as are changes to ignored columns."""
+
+    df = c.df.copy()
+    df.loc[9556, "AvgRating"] = 1.0
+    assert not list(_compare(Collection(c.df), Collection(df))), "Only an ignored column changed"
+
+    df = c.df.astype({"Title": object})
+    df.loc[9556, "Title"] = "One Of Our Elephants Is Missing"
+    changes = list(_compare(Collection(c.df), Collection(df)))
+    assert len(changes) == 1
+    assert changes[0].changes() == [
+        ChangedField("Title", old="The Elephant Vanishes", new="One Of Our Elephants Is Missing")
+    ]
+
+    # merged collections are compared without using the hashes
+    assert not list(_compare(Collection(c.df, merge=True), Collection(c.df, merge=True)))
+
+
 def test_added_removed() -> None:
     """A single book being added/removed."""
 
@@ -599,6 +624,7 @@ def test_added_removed() -> None:
     assert [styler.render(change) for change in _compare(c_old, c_new)] == [
         "Removed The Crow Road by Iain Banks from shelf 'pending'",
     ]
+    assert [change.asdict()["Id"] for change in _compare(c_old, c_new)] == [950451], "Work ID"
 
     # swap them round
     c_old, c_new = c_new, c_old
@@ -639,10 +665,112 @@ def test_duplicate_work_added_removed() -> None:
     ]
 
 
+def test_changed_fields() -> None:
+    """Finding the fields which differ between two aligned frames."""
+
+    old = c.df.loc[[9556, 12021]]
+    new = old.copy()
+    new.loc[9556, "Title"] = "One Of Our Elephants Is Missing"
+    new["Shelf"] = new.Shelf.astype(object)  # categorical vs. object
+
+    changed = _changed_fields(old, new)
+    assert changed.loc[9556].sum() == 1, "Only one field has changed"
+    assert changed.loc[9556, "Title"]
+    assert not changed.loc[12021].any(), "Nulls and categoricals compare equal"
+
+
+def test_changed_fields_mismatched_dtypes() -> None:
+    """Columns can be compared even when their dtypes differ on each side."""
+
+    new = c.df.astype({"Nationality": object}).convert_dtypes()
+    old = c.df.assign(Nationality=np.nan).convert_dtypes()
+    assert old.Nationality.dtype != new.Nationality.dtype, "The column is all null on one side"
+
+    changed = _changed_fields(old, new)
+    assert changed.Nationality.sum() == new.Nationality.notna().sum()
+    assert changed.drop(columns="Nationality").sum().sum() == 0, "Nothing else has changed"
+
+
+def test_events() -> None:
+    """Classifying shelf changes."""
+
+    old = pd.Series(["pending", "pending", "pending", "read"])
+    new = pd.Series(["currently-reading", "read", "pending", "read"])
+
+    assert list(_events(old, new)) == [
+        ChangeEvent.STARTED,
+        ChangeEvent.FINISHED,
+        ChangeEvent.MODIFIED,
+        ChangeEvent.MODIFIED,
+    ]
+    assert list(_events(None, new)) == [
+        ChangeEvent.STARTED,
+        ChangeEvent.FINISHED,
+        ChangeEvent.ADDED,
+        ChangeEvent.FINISHED,
+    ]
+    assert list(_events(old, None)) == [ChangeEvent.REMOVED] * 4
+
+    # the precomputed events match the ones worked out by each Change (for
+    # books whose shelf has changed, since the others are assumed to have
+    # changed in some other field)
+    old, new = old[:2], new[:2]
+    for event, (_, book_old), (_, book_new) in zip(
+        _events(old, new),
+        pd.DataFrame({"Shelf": old}).iterrows(),
+        pd.DataFrame({"Shelf": new}).iterrows(),
+    ):
+        assert Change(book_old, book_new).event == event
+
+
+def test_change_asdict() -> None:
+    """Changes can be described as JSON."""
+
+    record = Change(old=BOOK_UNREAD, new=BOOK_MODIFIED).asdict()
+    assert record == {
+        "event": "modified",
+        "Id": 9556,
+        "Author": "Haruki Murakami",
+        "Title": "One Of Our Elephants Is Missing",
+        "changes": {"Title": ["The Elephant Vanishes", "One Of Our Elephants Is Missing"]},
+    }
+
+    record = Change(old=None, new=BOOK_UNREAD).asdict()
+    assert record["event"] == "added"
+    assert record["book"]["Series"] is None, "Nulls are converted"
+    assert record["book"]["Added"] == "2016-04-18T00:00:00", "Dates are converted"
+    json.dumps(record)  # doesn't raise
+
+
+def test_write_changes() -> None:
+    """Changes are rendered as they're produced, in each of the formats."""
+
+    styler = ChangeStyler(BookFormatter(c.df.dtypes, ValueFormats()))
+    text, jsonl = io.StringIO(), io.StringIO()
+
+    def changes():
+        yield Change(old=BOOK_UNREAD, new=BOOK_MODIFIED)
+        assert text.getvalue(), "The first change was written before the second was produced"
+        yield Change(old=None, new=BOOK_UNREAD)
+
+    count = write_changes(changes(), (styler.render, text), (styler.render_json, jsonl))
+
+    assert count == 2
+    assert text.getvalue().startswith(
+        "Haruki Murakami, One Of Our Elephants Is Missing\n"
+        "  * Title changed from 'The Elephant Vanishes'\n"
+        "Added The Elephant Vanishes by Haruki Murakami"
+    )
+    assert [json.loads(line)["event"] for line in jsonl.getvalue().splitlines()] == [
+        "modified",
+        "added",
+    ]
+
+
 #################################################################################
 
 
-df = c.df.fillna("")
+df = c.df.astype(object).fillna("")
 
 
 def test__added() -> None:
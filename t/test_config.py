@@ -5,6 +5,7 @@ from __future__ import annotations
 from reading.config import (
     Config,
     category_patterns,
+    column_dtypes,
     date_columns,
     df_columns,
     merge_preferences,
@@ -33,6 +34,7 @@ def test_df_colums() -> None:
         "Read",
         "Rating",
         "AvgRating",
+        "Updated",
     ], "Columns for goodreads.csv"
 
     assert df_columns("books") == [
@@ -71,9 +73,24 @@ def test_date_columns() -> None:
         "Added",
         "Started",
         "Read",
+        "Updated",
     ], "Date columns for goodreads"
 
 
+def test_column_dtypes() -> None:
+    assert column_dtypes("ebooks") == {
+        "Author": "category",
+        "Category": "category",
+        "Language": "category",
+    }, "dtypes for ebooks"
+
+    dtypes = column_dtypes()
+    assert dtypes["Work"] == "Int64", "Nullable integers"
+    assert dtypes["Borrowed"] == "boolean", "Nullable booleans"
+    assert "Title" not in dtypes, "Untyped columns are left alone"
+    assert "Added" not in dtypes, "Dates are handled separately"
+
+
 ################################################################################
 
 
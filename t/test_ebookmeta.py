@@ -0,0 +1,178 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+import zipfile
+
+import pytest
+
+from reading.ebookmeta import _author, _authors, _pdf_string, read_metadata
+
+
+################################################################################
+
+
+@pytest.mark.parametrize(
+    "name, metadata",
+    (
+        (
+            "supernatural.mobi",
+            {
+                "Authors": ["H. P. Lovecraft"],
+                "Languages": ["en"],
+                "Title": "Supernatural Horror in Literature",
+            },
+        ),
+        (
+            "pg6838.mobi",
+            {
+                "Authors": ["Victor Hugo"],
+                "Languages": ["fr"],
+                "Title": "Le Dernier Jour d'un Condamné",
+            },
+        ),
+        ("pg6838.txt", {"Authors": ["Unknown"], "Languages": [], "Title": "pg6838"}),
+    ),
+)
+def test_read_metadata(name: str, metadata: dict[str, Any]) -> None:
+    assert read_metadata(Path("t/data/ebooks", name)) == metadata
+
+
+def test_read_metadata_errors(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    path = tmp_path / "book.docx"
+    path.write_bytes(b"blah")
+    assert read_metadata(path) is None, "Unsupported format"
+
+    for name in ["book.mobi", "book.epub", "book.pdf", "book.azw3"]:
+        path = tmp_path / name
+        path.write_bytes(b"blah" * 100)
+        assert read_metadata(path) is None, f"Invalid {path.suffix}"
+
+
+def test__author() -> None:
+    assert _author("Lovecraft, H. P.") == "H. P. Lovecraft"
+    assert _author("H. P. Lovecraft") == "H. P. Lovecraft"
+    assert _author(" Victor Hugo ") == "Victor Hugo"
+    assert _author("Smith, Jones, and Brown") == "Smith, Jones, and Brown", "Not a name"
+    assert _author("Martin Luther King, Jr.") == "Martin Luther King, Jr.", "Suffix"
+    assert _author("Dumas, père") == "Dumas, père", "Suffix"
+
+
+def test__authors() -> None:
+    assert _authors(["Lovecraft, H. P."]) == ["H. P. Lovecraft"]
+    assert _authors(["Terry Pratchett & Neil Gaiman", "Dumas, Alexandre"]) == [
+        "Terry Pratchett",
+        "Neil Gaiman",
+        "Alexandre Dumas",
+    ]
+    assert _authors(["Someone &"]) == ["Someone"]
+    assert _authors([]) == []
+
+
+################################################################################
+
+_CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+_OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">
+    <dc:title>Poil de Carotte</dc:title>
+    <dc:creator opf:role="aut" opf:file-as="Renard, Jules">Jules Renard</dc:creator>
+    <dc:creator opf:role="ill">Félix Vallotton</dc:creator>
+    <dc:creator>Someone Else</dc:creator>
+    <dc:language>fr</dc:language>
+  </metadata>
+</package>
+"""
+
+
+def test_read_metadata_epub(tmp_path: Path) -> None:
+    path = tmp_path / "book.epub"
+    with zipfile.ZipFile(path, "w") as epub:
+        epub.writestr("mimetype", "application/epub+zip")
+        epub.writestr("META-INF/container.xml", _CONTAINER)
+        epub.writestr("OEBPS/content.opf", _OPF)
+
+    assert read_metadata(path) == {
+        "Title": "Poil de Carotte",
+        "Authors": ["Jules Renard", "Someone Else"],
+        "Languages": ["fr"],
+    }
+
+
+################################################################################
+
+
+def _pdf(info: bytes, catalog: bytes = b"/Type /Catalog", extra: bytes = b"") -> bytes:
+    return b"\n".join(
+        [
+            b"%PDF-1.4",
+            b"1 0 obj\n<< " + catalog + b" >>\nendobj",
+            b"2 0 obj\n<< " + info + b" >>\nendobj",
+            extra,
+            b"trailer\n<< /Size 4 /Root 1 0 R /Info 2 0 R >>",
+            b"%%EOF",
+        ]
+    )
+
+
+def test_read_metadata_pdf(tmp_path: Path) -> None:
+    path = tmp_path / "book.pdf"
+
+    path.write_bytes(
+        _pdf(
+            b"/Title (Supernatural Horror \\(in\\) Literature) /Author (H. P. Lovecraft)",
+            b"/Type /Catalog /Lang (en-GB)",
+        )
+    )
+    assert read_metadata(path) == {
+        "Title": "Supernatural Horror (in) Literature",
+        "Authors": ["H. P. Lovecraft"],
+        "Languages": ["en-GB"],
+    }
+
+    title = "Le Dernier Jour d'un Condamné".encode("utf-16-be")
+    path.write_bytes(
+        _pdf(
+            b"/Author 3 0 R /Title <FEFF" + title.hex().encode() + b">",
+            extra=b"3 0 obj\n(Victor Hugo & Someone Else)\nendobj",
+        )
+    )
+    assert read_metadata(path) == {
+        "Title": "Le Dernier Jour d'un Condamné",
+        "Authors": ["Victor Hugo", "Someone Else"],
+        "Languages": [],
+    }, "Hex strings, Unicode, and indirect objects"
+
+    path.write_bytes(_pdf(b"/Producer (Something)"))
+    assert read_metadata(path) == {
+        "Title": "book",
+        "Authors": ["Unknown"],
+        "Languages": [],
+    }, "Missing metadata"
+
+    path.write_bytes(b"%PDF-1.5\ntrailer\n<< /Root 1 0 R /Info 2 0 R >>")
+    assert read_metadata(path) is None, "Compressed objects can't be read"
+
+    path.write_bytes(_pdf(b"/Title (Secret)", extra=b"/Encrypt 4 0 R"))
+    assert read_metadata(path) is None, "Encrypted strings can't be read"
+
+
+def test__pdf_string() -> None:
+    assert _pdf_string(b"(plain)", 0) == b"plain"
+    assert _pdf_string(b"/Title (nested (parens) here)", 7) == b"nested (parens) here"
+    assert _pdf_string(b"(esc\\naped\\051 \\\\)", 0) == b"esc\naped) \\"
+    assert _pdf_string(b"(split \\\nline)", 0) == b"split line"
+    assert _pdf_string(b"<48 65 6C6C 6F>", 0) == b"Hello"
+    assert _pdf_string(b"<4865 7>", 0) == b"Hep", "A missing final digit is zero"
+    assert _pdf_string(b"/Name", 0) is None, "Not a string"
+    with pytest.raises(ValueError, match="Unterminated"):
+        _pdf_string(b"(never ends", 0)
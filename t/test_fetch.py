@@ -0,0 +1,160 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+import pytest
+import requests
+
+from reading.fetch import Fetcher, TokenBucket
+
+
+################################################################################
+
+
+class _StubServer(ThreadingHTTPServer):
+    """Keeps track of the requests it receives."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Stub)
+        self.lock = threading.Lock()
+        # the paths requested, and the client ports they came from
+        self.requests: list[str] = []
+        self.ports: set[int] = set()
+        # the number of requests being handled, now and at most
+        self.active = 0
+        self.max_active = 0
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Respond to /ok, and to /flaky/N with a 503 for the first N requests."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so the session can be checked
+    server: _StubServer
+
+    def do_GET(self) -> None:
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.ports.add(self.client_address[1])
+            count = server.requests.count(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+
+        if self.path.startswith("/ok/"):
+            time.sleep(0.01)  # so concurrent requests overlap
+        if self.path.startswith("/flaky/") and count <= int(self.path.split("/")[2]):
+            status, body = 503, b"try again"
+        elif self.path == "/redirect":
+            status, body = 302, b""
+        else:
+            status, body = 200, self.path.encode()
+
+        with server.lock:
+            server.active -= 1
+
+        self.send_response(status)
+        if status == 302:
+            self.send_header("Location", "/redirect")
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stub() -> Iterator[_StubServer]:
+    """Return a local HTTP server to fetch from."""
+    srv = _StubServer()
+
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.start()
+    try:
+        yield srv
+    finally:
+        srv.shutdown()
+        srv.server_close()
+        thread.join()
+
+
+def _url(srv: _StubServer, path: str) -> str:
+    return f"http://127.0.0.1:{srv.server_address[1]}{path}"
+
+
+################################################################################
+
+
+def test_token_bucket() -> None:
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds: float) -> None:
+        waits.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+
+    bucket.acquire()
+    bucket.acquire()
+    assert not waits, "A burst up to the capacity is allowed"
+
+    bucket.acquire()
+    bucket.acquire()
+    assert waits == [0.5, 0.5], "Then it's limited to the rate"
+
+    now[0] += 10
+    for _ in range(3):
+        bucket.acquire()
+    assert waits == [0.5, 0.5, 0.5], "Tokens only accumulate up to the capacity"
+
+
+def test_fetcher_get(stub: _StubServer) -> None:
+    fetcher = Fetcher(rate=1000, backoff=0)
+
+    assert fetcher.get(_url(stub, "/ok")).content == b"/ok"
+    assert fetcher.get(_url(stub, "/ok")).content == b"/ok"
+    assert len(stub.ports) == 1, "The connection was reused"
+
+    assert fetcher.get(_url(stub, "/flaky/2")).status_code == 200, "Retried"
+    assert stub.requests.count("/flaky/2") == 3
+
+    with pytest.raises(requests.HTTPError):
+        fetcher.get(_url(stub, "/flaky/10"))
+    assert stub.requests.count("/flaky/10") == 4, "Gave up after the retries"
+
+    fetcher.session.max_redirects = 3
+    with pytest.raises(requests.TooManyRedirects):
+        fetcher.get(_url(stub, "/redirect"))
+
+
+def test_fetcher_backoff(stub: _StubServer) -> None:
+    waits: list[float] = []
+    fetcher = Fetcher(rate=1000, burst=100, backoff=1, sleep=waits.append)
+    fetcher.session.max_redirects = 3
+
+    with pytest.raises(requests.TooManyRedirects):
+        fetcher.get(_url(stub, "/redirect"))
+    assert waits == [1, 2, 4], "The wait doubles each time"
+
+    waits.clear()
+    fetcher.get(_url(stub, "/flaky/1"))
+    assert waits == [0], "Retry-After is respected"
+
+
+def test_fetcher_map(stub: _StubServer) -> None:
+    fetcher = Fetcher(rate=1000, burst=100, workers=3)
+
+    paths = [f"/ok/{i}" for i in range(12)]
+    results = list(fetcher.map(lambda path: fetcher.get(_url(stub, path)).text, paths))
+
+    assert results == paths, "Results are in order"
+    assert 1 < stub.max_active <= 3, "Requests were concurrent, but bounded"
+    assert len(stub.ports) <= 3, "Each worker reused its connection"
@@ -2,19 +2,41 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+import os
+from pathlib import Path
+import re
+import shutil
+import threading
+import time
+from typing import Any
 from xml.etree import ElementTree
 
+import attr
 import pandas as pd
+import pytest
+import requests
 
+from reading.cache import ResponseCache
+from reading.fetch import Fetcher
 import reading.goodreads
 from reading.goodreads import (
+    SeriesMemo,
+    _ColumnBuilder,
+    _fetch_book_api,
     _get_authors,
     _get_category,
     _get_entry,
+    _iter_reviews,
     _parse_book_series,
     _parse_entries,
     _parse_series,
+    fetch_book,
+    get_books,
+    high_water_mark,
     interesting,
+    merge_books,
+    prefetch_series,
 )
 
 
@@ -28,6 +50,7 @@ def test_process_review() -> None:
         "BookId": 13629345,
         "Borrowed": False,
         "Added": pd.Timestamp("2016-05-04"),
+        "Updated": pd.Timestamp("2016-05-04"),
         "Read": pd.Timestamp(None),
         "Started": pd.Timestamp(None),
         "Shelf": "pending",
@@ -46,6 +69,7 @@ def test_process_review() -> None:
         "BookId": 38290,
         "Borrowed": False,
         "Added": pd.Timestamp("2017-02-27"),
+        "Updated": pd.Timestamp("2017-12-20"),
         "Read": pd.Timestamp(None),
         "Started": pd.Timestamp(None),
         "Shelf": "pending",
@@ -64,6 +88,7 @@ def test_process_review() -> None:
         "BookId": 34910673,
         "Borrowed": True,
         "Added": pd.Timestamp("2017-04-20"),
+        "Updated": pd.Timestamp("2017-04-25"),
         "Read": pd.Timestamp(None),
         "Started": pd.Timestamp(None),
         "Shelf": "pending",
@@ -74,6 +99,241 @@ def test_process_review() -> None:
     }
 
 
+_DATA = Path("t/data").resolve()
+
+
+@attr.s
+class _FakeFetcher(Fetcher):
+    """Serve responses from the files in t/data, by the type and ID in the URL.
+
+    Series that aren't there are replaced by the one that is, and pages of
+    reviews come from $reviews.  URLs containing any of $fail raise an error.
+    """
+
+    directory: Path = attr.ib(default=_DATA)
+    fail: set[str] = attr.ib(factory=set)
+    reviews: list[bytes] = attr.ib(factory=list)
+    urls: list[str] = attr.ib(factory=list)
+    lock: threading.Lock = attr.ib(factory=threading.Lock)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        with self.lock:
+            self.urls.append(url)
+        if any(part in url for part in self.fail):
+            raise requests.ConnectionError(url)
+        if "/review/list/" in url:
+            content = self.reviews[kwargs["params"]["page"] - 1]
+        else:
+            kind, _, name = url.split("/")[3:]
+            if kind == "series":
+                name = "397249.xml"
+            content = (self.directory / kind / name).read_bytes()
+
+        response = requests.Response()
+        response._content = content  # pylint: disable=protected-access
+        return response
+
+
+def test_fetch_book_api_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fetcher = _FakeFetcher()
+    monkeypatch.chdir(tmp_path)
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+
+    # old-style cache files are moved into the cache
+    Path("tmp_cache/books").mkdir(parents=True)
+    for book_id in (115069, 68041):
+        shutil.copy(fetcher.directory / f"book/{book_id}.xml", f"tmp_cache/books/{book_id}.xml")
+    # keeping when they were fetched
+    os.utime("tmp_cache/books/115069.xml", (0, time.time() - 24 * 60 * 60))
+    os.utime("tmp_cache/books/68041.xml", (0, time.time() - 365 * 24 * 60 * 60))
+
+    assert _fetch_book_api(115069, "key", fetcher, cache).find("book/id").text == "115069"
+    assert not fetcher.urls, "Used the old cache file"
+    assert cache.get("book", 115069) is not None
+
+    _fetch_book_api(68041, "key", fetcher, cache)
+    assert fetcher.urls == [
+        "https://www.goodreads.com/book/show/68041.xml"
+    ], "The old cache file had expired"
+    fetcher.urls.clear()
+
+    # a missing one is fetched and then cached
+    book_id = 38290
+    _fetch_book_api(book_id, "key", fetcher, cache)
+    _fetch_book_api(book_id, "key", fetcher, cache)
+    assert fetcher.urls == [f"https://www.goodreads.com/book/show/{book_id}.xml"]
+
+
+def test_series_memo() -> None:
+    memo = SeriesMemo()
+    calls = []
+
+    def load(series_id: int) -> dict[str, Any]:
+        calls.append(series_id)
+        time.sleep(0.01)
+        return {"Series": str(series_id)}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda series_id: memo.get(series_id, load), [1, 2, 1, 1, 2]))
+
+    assert [r["Series"] for r in results] == ["1", "2", "1", "1", "2"]
+    assert sorted(calls) == [1, 2], "Each series was only loaded once"
+
+    def fail(_series_id: int) -> dict[str, Any]:
+        raise requests.ConnectionError
+
+    with pytest.raises(requests.ConnectionError):
+        memo.get(3, fail)
+    assert memo.get(3, load) == {"Series": "3"}, "Failures aren't remembered"
+
+
+def test_fetch_book_series(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fetcher = _FakeFetcher()
+    monkeypatch.chdir(tmp_path)
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    memo = SeriesMemo()
+
+    prefetch_series([40441, 55486], "key", fetcher, cache, memo)
+    for series_id in (40441, 55486):
+        assert memo.get(series_id, lambda _: pytest.fail("Not prefetched"))
+    assert len(fetcher.urls) == 2
+
+    for book_id in (115069, 21124, 38290, 68041):
+        fetch_book(book_id, "key", [], fetcher, cache, memo)
+    series_urls = [url for url in fetcher.urls if "/series/" in url]
+    assert len(set(series_urls)) == len(series_urls) == 4, "Each series was only fetched once"
+
+    # a new run, using the cache
+    fetcher.urls.clear()
+    memo = SeriesMemo()
+    for book_id in (115069, 21124, 38290, 68041):
+        fetch_book(book_id, "key", [], fetcher, cache, memo)
+    assert not fetcher.urls
+
+
+def _review_page(*review_ids: int, total: int = 0) -> bytes:
+    """Return a page of reviews in the format returned by the API."""
+    reviews = "".join(
+        re.sub(r"^<\?xml.*?\?>", "", (_DATA / f"review/{review_id}.xml").read_text())
+        for review_id in review_ids
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<GoodreadsResponse><Request/>'
+        f'<reviews start="1" end="{len(review_ids)}" total="{total or len(review_ids)}">'
+        f"{reviews}</reviews></GoodreadsResponse>"
+    ).encode()
+
+
+def test_iter_reviews() -> None:
+    review_ids = (1629171100, 1926519212, 1977161022)
+    page: dict[str, int] = {}
+    reviews = _iter_reviews(_review_page(*review_ids, total=50), page)
+
+    assert not page, "Nothing's parsed until it's needed"
+    assert list(reviews) == [
+        reading.goodreads.process_review(ElementTree.parse(f"t/data/review/{review_id}.xml"))
+        for review_id in review_ids
+    ]
+    assert page == {"start": 1, "end": 3, "total": 50}
+
+
+def test_column_builder() -> None:
+    rows: list[dict[str, Any]] = [
+        {"a": 1, "b": "x"},
+        {"a": 2},
+        {"c": pd.Timestamp("2020-01-01"), "b": "y"},
+    ]
+    builder = _ColumnBuilder()
+    for row in rows:
+        builder.append(row)
+
+    assert len(builder) == 3
+    pd.testing.assert_frame_equal(builder.frame(), pd.DataFrame(rows))
+
+
+def test_get_books(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fetcher = _FakeFetcher()
+    monkeypatch.chdir(tmp_path)
+    Path("tmp_cache/reviews").mkdir(parents=True)
+    Path("tmp_cache/reviews/001.xml").write_bytes(_review_page(1926519212))
+
+    df = get_books(
+        1234,
+        "key",
+        "2000-01-01",
+        [],
+        fetcher=fetcher,
+        cache=ResponseCache(tmp_path / "cache.sqlite"),
+    )
+
+    assert list(df.index) == [38290]
+    assert df.loc[38290, "Title"] == "The Pioneers", "From the review"
+    assert df.loc[38290, "Published"] == 1823, "From the book API"
+    assert df.loc[38290, "SeriesId"] == 55486, "From the series API"
+
+
+def test_get_books_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    Path("tmp_cache/reviews").mkdir(parents=True)
+    Path("tmp_cache/reviews/001.xml").write_bytes(_review_page(1926519212))
+
+    fetcher = _FakeFetcher(fail={"/series/"})
+    df = get_books(1234, "key", "2000-01-01", [], fetcher, ResponseCache("one.sqlite"))
+    assert df.loc[38290, "Published"] == 1823, "The book was still fetched"
+    assert "SeriesId" not in df
+    assert "Error fetching series 55486" in capsys.readouterr().out
+
+    fetcher = _FakeFetcher(fail={"/book/"})
+    df = get_books(1234, "key", "2000-01-01", [], fetcher, ResponseCache("two.sqlite"))
+    assert df.loc[38290, "Title"] == "The Pioneers", "The review was kept"
+    assert "Published" not in df
+    assert "Error fetching 38290" in capsys.readouterr().out
+
+
+def test_get_books_since(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # most recently updated first, with more pages to come
+    fetcher = _FakeFetcher(reviews=[_review_page(1926519212, 1629171100, total=200)])
+    monkeypatch.chdir(tmp_path)
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+
+    df = get_books(
+        1234,
+        "key",
+        "2000-01-01",
+        [],
+        fetcher=fetcher,
+        cache=cache,
+        since=pd.Timestamp("2017-01-01"),
+    )
+
+    assert list(df.index) == [38290], "Stopped at the first review that had already been seen"
+    assert len([url for url in fetcher.urls if "/review/" in url]) == 1, "No more pages"
+
+    assert get_books(
+        1234, "key", "2000-01-01", [], fetcher=fetcher, cache=cache, since=pd.Timestamp("2018")
+    ).empty, "Nothing has changed"
+    assert len([url for url in fetcher.urls if "/review/" in url]) == 2, "Fetched again"
+    assert cache.get("reviews", "1234/1") is None, "Not cached"
+
+
+def test_high_water_mark() -> None:
+    assert high_water_mark(pd.DataFrame({"Added": [pd.Timestamp("2020-01-01")]})) is None
+    assert high_water_mark(pd.DataFrame({"Updated": [pd.NaT]})) is None
+    assert high_water_mark(
+        pd.DataFrame({"Updated": [pd.Timestamp("2020-01-01"), pd.Timestamp("2021-02-03"), pd.NaT]})
+    ) == pd.Timestamp("2021-02-03")
+
+
+def test_merge_books() -> None:
+    old = pd.DataFrame({"Title": ["a", "b", "c"]}, index=[1, 2, 3])
+    new = pd.DataFrame({"Title": ["B", "d"]}, index=[2, 4])
+
+    assert merge_books(old, new).sort_index().Title.to_dict() == {1: "a", 2: "B", 3: "c", 4: "d"}
+    assert merge_books(old, new.iloc[:0]) is old
+
+
 def test__parse_book_api() -> None:
     r = ElementTree.parse("t/data/book/115069.xml")
     assert reading.goodreads._parse_book_api(r) == {
@@ -0,0 +1,63 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import pytest
+
+
+# slow-to-import packages, which shouldn't be imported unless they're needed
+_HEAVY = {"pandas", "numpy", "matplotlib", "jinja2", "requests", "bs4", "google"}
+
+################################################################################
+
+
+def _imported(code: str) -> set[str]:
+    """Run $code in a fresh interpreter and return the top-level packages it imported."""
+    run = subprocess.run(
+        (sys.executable, "-c", f"{code}\nimport sys\nprint(*sys.modules, file=sys.stderr)"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {name.partition(".")[0] for name in run.stderr.split()}
+
+
+@pytest.mark.parametrize(
+    "module, allowed",
+    (
+        ("reading.cmds", set()),
+        ("reading.server", set()),
+        ("reading.suggestions", {"pandas", "numpy"}),
+        ("reading.metadata", {"pandas", "numpy", "jinja2"}),
+        ("reading.update", {"pandas", "numpy", "jinja2"}),
+    ),
+)
+def test_import(module: str, allowed: set[str]) -> None:
+    """Importing $module mustn't import anything unnecessary."""
+    assert not (_imported(f"import {module}") & _HEAVY) - allowed
+
+
+@pytest.mark.parametrize(
+    "argv, allowed",
+    (
+        (["config", "kindle.words_per_page"], set()),
+        # with a daemon, which is faked
+        (["suggest"], set()),
+    ),
+    ids=" ".join,
+)
+def test_import_command(argv: list[str], allowed: set[str]) -> None:
+    """Starting up $argv mustn't import anything unnecessary."""
+    code = f"""
+import sys
+import reading.server
+from reading.cmds import main
+
+reading.server.query = lambda *_: 0
+sys.argv = ["ook", *{argv!r}]
+main()
+"""
+    assert not (_imported(code) & _HEAVY) - allowed
@@ -0,0 +1,93 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from reading.kindle import Entry, KindleIndex
+
+
+################################################################################
+
+
+def _populate(root: Path, files: list[str]) -> None:
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if name.endswith("/"):
+            path.mkdir()
+        else:
+            path.write_text(name)
+
+
+def test_entry_ignored(tmp_path: Path) -> None:
+    assert not Entry(tmp_path / "item.mobi", is_dir=False).ignored, "Interesting path"
+    assert Entry(tmp_path / ".hidden.mobi", is_dir=False).ignored, "Hidden files are ignored"
+    assert Entry(tmp_path / "dir", is_dir=True).ignored, "Directories are ignored"
+    assert Entry(tmp_path / "My Clippings.txt", is_dir=False).ignored, "Ignored filename"
+    assert Entry(tmp_path / "item.kfx", is_dir=False).ignored, "Ignored extension"
+
+
+def test_scan(tmp_path: Path) -> None:
+    _populate(tmp_path, ["books/novel.mobi", "books/novel.sdr/", "article.azw3", "item.kfx"])
+    (tmp_path / "books" / "broken.pdf").symlink_to(tmp_path / "nowhere")
+    os.utime(tmp_path / "books/novel.mobi", ns=(0, 1_500_000_000_123_456_789))
+
+    index = KindleIndex.scan(tmp_path)
+
+    assert {entry.name for entry in index.entries["books"]} == {"novel.mobi", "novel.sdr"}
+    assert index.entries["short-stories"] == [], "Missing directories are empty"
+    assert sorted((c, n) for c, _, n in index.ebooks()) == [
+        ("articles", "articles/article.azw3"),
+        ("novels", "novels/novel.mobi"),
+    ]
+
+    (novel,) = (entry for _, entry, name in index.ebooks() if name == "novels/novel.mobi")
+    assert novel == Entry(
+        tmp_path / "books/novel.mobi",
+        is_dir=False,
+        size=len("books/novel.mobi"),
+        mtime_ns=1_500_000_000_123_456_789,
+    ), "The stat data is kept"
+
+
+def test_scan_missing(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        KindleIndex.scan(tmp_path / "not-mounted")
+
+    (tmp_path / "file").touch()
+    with pytest.raises(FileNotFoundError):
+        KindleIndex.scan(tmp_path / "file")
+
+
+def test_orphans(tmp_path: Path) -> None:
+    _populate(
+        tmp_path,
+        [
+            "books/novel.mobi",
+            "books/novel.sdr/",
+            "books/gone.sdr/",
+            "books/gone.sdr.mobi.sdr/",
+            "books/[bracketed] name.azw3",
+            "books/[bracketed] name.sdr/",
+            "books/prefix.sdr/",
+            "books/prefix-not.mobi",
+            "books/.hidden.sdr/",
+            "articles/article.sdr/",
+            "article.pdf",
+            "removed.sdr/",
+        ],
+    )
+
+    assert sorted(
+        str(entry.path.relative_to(tmp_path)) for entry in KindleIndex.scan(tmp_path).orphans()
+    ) == [
+        "articles/article.sdr",
+        "books/gone.sdr",
+        "books/gone.sdr.mobi.sdr",
+        "books/prefix.sdr",
+        "removed.sdr",
+    ]
@@ -0,0 +1,85 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import shlex
+import sys
+import threading
+from typing import Callable
+
+import pytest
+
+from reading.cmds import arg_parser, run, socket_path
+from reading.config import Config
+import reading.server
+from reading.server import handle, query, server
+
+
+def _argv(data_dir: Path) -> list[str]:
+    return shlex.split(f"--data-dir {data_dir} --date 2020-01-01 suggest --size 3")
+
+
+def test_socket_path() -> None:
+    args = arg_parser().parse_args(["suggest"])
+    assert socket_path(args) == Path("data/.ook.sock"), "In the data directory by default"
+
+    args = arg_parser().parse_args(["--socket", "/tmp/ook.sock", "suggest"])
+    assert socket_path(args) == Path("/tmp/ook.sock")
+
+
+def test_handle(data_dir: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    argv = _argv(data_dir)
+    run(arg_parser().parse_args(argv), Config.from_file())
+    expected = capsys.readouterr().out
+
+    response = handle({"cwd": os.getcwd(), "argv": argv})
+    assert response == {"status": 0, "stdout": expected, "stderr": ""}, "Same as in-process"
+
+    response = handle({"cwd": os.getcwd(), "argv": ["suggest", "--shelves", "badshelf"]})
+    assert response["status"] == 2, "Bad arguments"
+    assert "invalid choice" in response["stderr"]
+
+    response = handle({"cwd": os.getcwd(), "argv": ["update", "--goodreads"]})
+    assert response["status"] == 2, "Only some commands are served"
+    assert "isn't available" in response["stderr"]
+
+
+def test_handle_exit(monkeypatch: pytest.MonkeyPatch) -> None:
+    def exit_(code: str | int | None) -> Callable[..., None]:
+        def run(*_args: object) -> None:
+            sys.exit(code)
+
+        return run
+
+    for code, status in ((None, 0), (0, 0), (3, 3), ("message", 1)):
+        monkeypatch.setattr(reading.server, "run", exit_(code))
+        assert handle({"cwd": os.getcwd(), "argv": ["suggest"]})["status"] == status
+
+
+def test_query_no_daemon(tmp_path: Path) -> None:
+    assert query(_argv(tmp_path), tmp_path / "missing.sock") is None, "Nothing listening"
+
+
+def test_query(tmp_path: Path, data_dir: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    path = tmp_path / "ook.sock"
+    argv = _argv(data_dir)
+
+    with server(path) as srv:
+        thread = threading.Thread(target=srv.serve_forever)
+        thread.start()
+        try:
+            assert query(argv, path) == 0
+            assert capsys.readouterr().out.count("\n") == 3, "Got the suggestions"
+
+            with pytest.raises(RuntimeError, match="Already"):
+                server(path)
+        finally:
+            srv.shutdown()
+            thread.join()
+
+    # left behind
+    assert query(argv, path) is None, "No longer listening"
+    with server(path):
+        pass
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import os
 from pathlib import Path
+import shutil
 
 import pandas as pd
+from pandas.testing import assert_frame_equal
 
 from reading.collection import Collection
-from reading.storage import Store, load_df, save_df
+from reading.storage import Store, load_df, same_contents, save_df, set_dtypes
 
 
 def test_load_df() -> None:
@@ -18,8 +21,54 @@ def test_load_df() -> None:
     assert df.empty, "Loaded a dataframe from a missing file"
 
 
+def test_load_df_dtypes() -> None:
+    df = load_df("goodreads", dirname="t/data/2019-12-04", columnar=False)
+    assert df.Work.dtype == "Int64", "IDs are nullable integers"
+    assert df.Borrowed.dtype == "boolean"
+    assert df.Shelf.dtype == object, "Strings aren't categorical, so can be edited"
+    assert df.Read.dtype == "datetime64[ns]", "Dates are parsed"
+    assert "Updated" not in df, "Even though the file doesn't have all the date columns"
+
+    df.loc[df.index[0], "Shelf"] = "new-shelf"
+
+
+def test_set_dtypes() -> None:
+    df = set_dtypes(load_df("goodreads", dirname="t/data/2019-12-04", columnar=False))
+    assert isinstance(df.Shelf.dtype, pd.CategoricalDtype), "Categorical when requested"
+
+
+def test_load_df_columnar(tmp_path: Path) -> None:
+    csv = tmp_path / "goodreads.csv"
+    shutil.copy("t/data/2019-12-04/goodreads.csv", csv)
+
+    plain = load_df("goodreads", fname=str(csv), columnar=False)
+    assert list(tmp_path.iterdir()) == [csv], "No columnar copy without columnar=True"
+
+    df = load_df("goodreads", fname=str(csv))
+    assert (tmp_path / ".cache/goodreads.feather").exists(), "Created a columnar copy"
+    assert not (tmp_path / "goodreads.feather").exists(), "Not alongside the CSV"
+    assert_frame_equal(df, plain)  # the CSV was used the first time
+
+    df = load_df("goodreads", fname=str(csv))
+    assert_frame_equal(df, plain)  # the columnar copy is identical
+
+
+def test_load_df_columnar_stale(tmp_path: Path) -> None:
+    csv = tmp_path / "goodreads.csv"
+    shutil.copy("t/data/2019-12-04/goodreads.csv", csv)
+    load_df("goodreads", fname=str(csv))
+
+    # edit the CSV, making sure it looks newer than the columnar copy
+    lines = csv.read_text().splitlines(keepends=True)
+    csv.write_text("".join(lines[:3]))
+    mtime = (tmp_path / ".cache/goodreads.feather").stat().st_mtime
+    os.utime(csv, (mtime + 1, mtime + 1))
+
+    assert len(load_df("goodreads", fname=str(csv))) == 2, "The edited CSV was used"
+
+
 def test_save_df(tmp_path: Path) -> None:
-    df = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=False).df
+    df = Collection.from_dir("t/data/2019-12-04", fixes=False, metadata=False, cache=False).df
 
     # pick out a few books
     df = df[df.AuthorId == 9121]
@@ -75,7 +124,7 @@ def test_empty_store(tmp_path: Path) -> None:
 
 def test_existing_store() -> None:
     """When there is already data in the store."""
-    store = Store("t/data/2019-12-04")
+    store = Store("t/data/2019-12-04", columnar=False)
 
     ebooks = store.ebooks
     assert isinstance(ebooks, pd.DataFrame), "Got a dataframe"
@@ -83,7 +132,7 @@ def test_existing_store() -> None:
 
 
 def test_store_overwrite() -> None:
-    store = Store("t/data/2019-12-04")
+    store = Store("t/data/2019-12-04", columnar=False)
 
     assert not store.ebooks.empty
     store.ebooks = pd.DataFrame()
@@ -118,3 +167,77 @@ def test_store_save_changed(tmp_path: Path) -> None:
 
     store = Store(tmp_path)
     assert store.ebooks.empty, "On reload the table is still empty"
+
+
+def test_store_load_once() -> None:
+    """Tables are only loaded once."""
+    store = Store("t/data/2019-12-04", columnar=False)
+
+    assert store.ebooks is store.ebooks, "The table was cached"
+    assert not store.changed, "Loading a table doesn't count as changing it"
+
+
+def test_store_changed() -> None:
+    store = Store("t/data/2019-12-04", columnar=False)
+
+    store.ebooks = store.ebooks.head()
+    assert store.changed == {"ebooks"}, "Setting a table marks it as changed"
+
+
+def test_store_invalidate() -> None:
+    store = Store("t/data/2019-12-04", columnar=False)
+
+    ebooks = store.ebooks
+    goodreads = store.goodreads
+    store.ebooks = pd.DataFrame()
+
+    store.invalidate("ebooks")
+    assert not store.changed, "Changes were discarded"
+    assert not store.ebooks.empty, "The table was reloaded from disk"
+    assert store.ebooks is not ebooks, "A new copy was loaded"
+    assert store.goodreads is goodreads, "Other tables are still cached"
+
+    store.invalidate()
+    assert store.goodreads is not goodreads, "All the tables were discarded"
+
+
+def test_store_save_clears_changed(tmp_path: Path) -> None:
+    store = Store(tmp_path / "store")
+    (tmp_path / "store").mkdir()
+    (tmp_path / "elsewhere").mkdir()
+
+    store.ebooks = Store("t/data/2019-12-04", columnar=False).ebooks
+    store.save(tmp_path / "elsewhere")
+    assert store.changed == {"ebooks"}, "Still changed after saving elsewhere"
+
+    store.save(tmp_path / "store")
+    assert not store.changed, "Saving to the store's directory clears the changes"
+    assert [p.name for p in (tmp_path / "store").iterdir()] == ["ebooks.csv"], "It was saved"
+
+
+def test_store_save_everything(tmp_path: Path) -> None:
+    store = Store("t/data/2019-12-04", columnar=False)
+    store.ebooks = store.ebooks
+    assert not store.goodreads.empty
+
+    store.save(tmp_path)
+    assert [p.name for p in tmp_path.iterdir()] == ["ebooks.csv"], "Only the changed tables"
+
+    store.save(tmp_path, everything=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ebooks.csv", "goodreads.csv"]
+    assert store.changed == {"ebooks"}
+
+
+def test_same_contents(tmp_path: Path) -> None:
+    df = Collection.from_dir(
+        "t/data/2019-12-04", fixes=False, metadata=False, cache=False
+    ).merge_info()
+    assert (df.Author == "").any(), "Has an empty string"
+
+    save_df("volumes", df, tmp_path / "volumes.csv")
+    saved = load_df("volumes", fname=str(tmp_path / "volumes.csv"), columnar=False)
+    assert not df.equals(saved)
+    assert same_contents(df, saved), "Reading it back in doesn't change it"
+
+    saved.iloc[0, 0] = "Someone Else"
+    assert not same_contents(df, saved)
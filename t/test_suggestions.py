@@ -0,0 +1,64 @@
+# vim: ts=4 : sw=4 : et
+
+from __future__ import annotations
+
+from pathlib import Path
+import shlex
+
+import pytest
+
+from reading.cmds import arg_parser
+from reading.config import Config
+from reading.suggestions import _spec_args, batch, main, scheduled
+
+
+def _run(capsys: pytest.CaptureFixture[str], data_dir: Path, line: str) -> str:
+    args = arg_parser().parse_args(shlex.split(f"--data-dir {data_dir} --date 2020-01-01 {line}"))
+    config = Config.from_file(data_dir / "config.yml")
+    (scheduled if args.mode == "scheduled" else main)(args, config)
+    return capsys.readouterr().out
+
+
+def test_spec_args() -> None:
+    assert _spec_args({}) == []
+    assert _spec_args({"width": 50, "categories": ["novels", "non-fiction"]}) == [
+        "--width",
+        "50",
+        "--categories",
+        "novels",
+        "non-fiction",
+    ]
+    assert _spec_args({"alpha": True, "words": False}) == ["--alpha"], "Flags"
+    assert _spec_args({"new_authors": True}) == ["--new-authors"]
+
+
+def test_batch(tmp_path: Path, data_dir: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    spec = tmp_path / "spec.yml"
+    spec.write_text(
+        """
+files:
+  suggestions.txt:
+    - name: Scheduled
+      mode: scheduled
+    - name: French novels
+      options: {width: 50, languages: [fr], categories: [novels]}
+  alpha.txt:
+    - name: Kindle
+      options: {alpha: true, shelves: [kindle], all: true}
+"""
+    )
+
+    args = arg_parser().parse_args(
+        shlex.split(f"--data-dir {data_dir} --date 2020-01-01 batch {spec} --output-dir {tmp_path}")
+    )
+    batch(args, Config.from_file(data_dir / "config.yml"))
+
+    assert (tmp_path / "suggestions.txt").read_text() == (
+        "Scheduled\n\n"
+        + _run(capsys, data_dir, "scheduled")
+        + "----\nFrench novels\n\n"
+        + _run(capsys, data_dir, "suggest --width 50 --languages fr --categories novels")
+    ), "Same as running each of the lists separately"
+    assert (tmp_path / "alpha.txt").read_text() == (
+        "Kindle\n\n" + _run(capsys, data_dir, "suggest --alpha --shelves kindle --all")
+    )
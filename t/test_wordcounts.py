@@ -2,45 +2,33 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable, Iterator
+import multiprocessing
 from pathlib import Path
+from subprocess import CalledProcessError
+from typing import Any, BinaryIO
 
+import pandas as pd
 import pytest
 
+from reading.cache import ResponseCache
+from reading.kindle import KindleIndex
+import reading.wordcounts
 from reading.wordcounts import (
     Metadata,
-    _as_text,
-    _count_words,
-    _ignore_item,
+    _count_chunk_words,
     _read_metadata,
+    _scan_all,
+    _text_chunks,
+    _word_count,
     get_ebooks,
+    process,
 )
 
 
 ################################################################################
 
 
-def test__ignore_item(tmp_path: Path) -> None:
-    p = tmp_path / "item.mobi"
-    p.touch()
-    assert not _ignore_item(p), "Interesting path"
-
-    p = tmp_path / ".hidden.mobi"
-    p.touch()
-    assert _ignore_item(p), "Hidden files are ignored"
-
-    p = tmp_path / "dir"
-    p.mkdir()
-    assert _ignore_item(p), "Directories are ignored"
-
-    p = tmp_path / "My Clippings.txt"
-    p.touch()
-    assert _ignore_item(p), "Ignored filename"
-
-    p = tmp_path / "item.kfx"
-    p.touch()
-    assert _ignore_item(p), "Ignored extension"
-
-
 def _populate_dir(basedir: Path, dirname: str, files: list[str]) -> None:
     directory = basedir / dirname
 
@@ -80,34 +68,62 @@ ebook_names = [path.name for path in Path("t/data/ebooks").iterdir()]
 
 @pytest.mark.slow()
 @pytest.mark.parametrize("path", ebook_paths, ids=ebook_names)
-def test__as_text(path: Path) -> None:
-    assert _as_text(path) == path.with_suffix(".txt").read_bytes()
+def test__text_chunks(path: Path) -> None:
+    assert b"".join(_text_chunks(path)) == path.with_suffix(".txt").read_bytes()
 
 
 def test_missing_ebook_convert(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setenv("PATH", "/no/such/path")
     path = Path("t/data/ebooks/supernatural.mobi")
-    assert _as_text(path) is None, "Missing ebook-convert command"
+    assert _word_count(path) is None, "Missing ebook-convert command"
 
 
 def test_ebook_invalid(tmp_path: Path) -> None:
     path = tmp_path / "blah.mobi"
     path.write_bytes(b"blah")
-    assert _as_text(path) is None, "Error converting the ebook"
+    assert _word_count(path) is None, "Error converting the ebook"
+
+
+def test__word_count_error(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    def text_chunks(path: Path) -> Iterator[bytes]:
+        yield b"some words"
+        raise CalledProcessError(1, ["pdftotext", str(path), "-"], stderr=b"Syntax Error\n")
+
+    monkeypatch.setattr(reading.wordcounts, "_text_chunks", text_chunks)
+    assert _word_count(Path("blah.pdf")) is None
+
+    (out, _) = capsys.readouterr()
+    assert "returned non-zero exit status 1" in out
+    assert "Syntax Error" in out, "The error message from the converter"
+
+
+def test__count_chunk_words() -> None:
+    text = b"  Some words, split\tacross\n\nseveral  chunks.\n"
+    for size in range(1, len(text) + 1):
+        chunks = [text[start : start + size] for start in range(0, len(text), size)]
+        assert _count_chunk_words(chunks) == 6, f"Chunks of {size} bytes"
 
+    assert _count_chunk_words([]) == 0
+    assert _count_chunk_words([b""]) == 0
+    assert _count_chunk_words([b"word"]) == 1
+    assert _count_chunk_words([b"two words"]) == 2
+    assert _count_chunk_words([b"one", b"word"]) == 1
 
-def test__count_words() -> None:
-    assert _count_words(None) is None, "Works when there was a problem converting"
-    assert _count_words("") == 0
-    assert _count_words("word") == 1
-    assert _count_words("two words") == 2
-    assert _count_words(b"two words") == 2, "Works with bytestrings too"
+
+def test__word_count(tmp_path: Path) -> None:
+    path = Path("t/data/ebooks/supernatural.txt")
+    assert _word_count(path) == len(path.read_bytes().split())
+
+    path = tmp_path / "blah.mobi"
+    path.write_bytes(b"blah")
+    assert _word_count(path) is None, "Error converting the ebook"
 
 
 ################################################################################
 
 
-@pytest.mark.xfail(raises=ModuleNotFoundError)
 def test__read_metadata() -> None:
     path = Path("t/data/ebooks/supernatural.mobi")
     assert _read_metadata(path) == {
@@ -131,6 +147,29 @@ def test__read_metadata() -> None:
     }, "Metadata with diacritical marks"
 
 
+def test__read_metadata_fallback(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "book.rtf"
+    path.write_bytes(b"blah")
+
+    monkeypatch.setattr(reading.wordcounts, "_calibre", lambda: None)
+    assert _read_metadata(path) == {
+        "Authors": ["Unknown"],
+        "Languages": [],
+        "Title": "book",
+    }, "Placeholders when calibre isn't installed"
+
+    opened = []
+
+    def get_metadata(fh: BinaryIO, ext: str, **_: Any) -> dict[str, str]:
+        opened.append((fh, ext))
+        return {"title": "Calibre"}
+
+    monkeypatch.setattr(reading.wordcounts, "_calibre", lambda: get_metadata)
+    assert _read_metadata(path)["Title"] == "Calibre", "Calibre reads unsupported formats"
+    assert opened[0][1] == "mobi"
+    assert opened[0][0].closed
+
+
 def test_metadata() -> None:
     m = Metadata(
         {
@@ -162,3 +201,183 @@ def test_metadata() -> None:
     assert m.author == "Victor Hugo"
     assert m.language == "fr"
     assert m.title == "Le Dernier Jour d'un Condamné"
+
+
+################################################################################
+
+
+def _recording_chunks(converted: list[str]) -> Callable[[Path], Iterator[bytes]]:
+    def text_chunks(path: Path) -> Iterator[bytes]:
+        converted.append(path.name)
+        return iter([path.read_bytes()])
+
+    return text_chunks
+
+
+def _fake_metadata(path: Path) -> dict[str, Any]:
+    return {"Authors": ["Author"], "Languages": ["fr"], "Title": path.stem}
+
+
+def _kindle_dir(basedir: Path, books: dict[str, str]) -> Path:
+    kindle_dir = basedir / "kindle"
+    kindle_dir.mkdir()
+    for dirname in ["articles", "non-fiction", "short-stories", "books"]:
+        _populate_dir(kindle_dir, dirname, [])
+    for name, text in books.items():
+        (kindle_dir / name).write_text(text)
+    return kindle_dir
+
+
+@pytest.mark.parametrize(
+    "workers",
+    (
+        1,
+        pytest.param(
+            2,
+            # the patched _read_metadata is only inherited by forked workers
+            marks=pytest.mark.skipif(
+                multiprocessing.get_start_method() != "fork", reason="Needs fork"
+            ),
+        ),
+    ),
+)
+def test_process(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, workers: int) -> None:
+    monkeypatch.setattr(reading.wordcounts, "_read_metadata", _fake_metadata)
+    kindle_dir = _kindle_dir(
+        tmp_path, {f"books/novel{i}.txt": "word " * i * 1000 for i in range(1, 5)}
+    )
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+
+    old = pd.DataFrame(
+        [
+            {
+                "BookId": "novels/novel2.txt",
+                "Author": "Someone",
+                "Title": "Old",
+                "Language": "en",
+                "Added": pd.Timestamp("2020-01-01"),
+                "Words": 7,
+            }
+        ]
+    ).set_index("BookId")
+
+    df = process(old, kindle_dir, workers=workers, cache=cache)
+    mtime = (kindle_dir / "books/novel3.txt").stat().st_mtime_ns
+
+    assert sorted(df.index) == sorted(f"novels/novel{i}.txt" for i in range(1, 5))
+    assert list(df.index) == [name for _, _, name in get_ebooks(kindle_dir)], "In a stable order"
+    assert df.loc["novels/novel2.txt"].Title == "Old", "Existing ebooks are reused"
+    assert df.loc["novels/novel3.txt"].to_dict() == {
+        "Title": "novel3",
+        "Words": 3000,
+        "Author": "Author",
+        "Category": "novels",
+        "Language": "fr",
+        "Added": pd.Timestamp(mtime, unit="ns").floor("D"),
+    }
+
+    df = process(old, kindle_dir, force=True, workers=workers, cache=cache)
+    assert df.loc["novels/novel2.txt"].Words == 2000, "Unless forced"
+
+
+def test__scan_all(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(reading.wordcounts, "_read_metadata", _fake_metadata)
+    monkeypatch.setattr(reading.wordcounts, "ProcessPoolExecutor", None)  # must not be used
+    kindle_dir = _kindle_dir(tmp_path, {"books/a.txt": "one"})
+    entries = [entry for _, entry, _ in KindleIndex.scan(kindle_dir).ebooks()]
+
+    assert [i for i, _ in _scan_all(entries, workers=8)] == [0], "No more workers than files"
+    assert list(_scan_all([], workers=None)) == []
+
+
+def test_process_fingerprints(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(reading.wordcounts, "_read_metadata", _fake_metadata)
+    converted: list[str] = []
+    monkeypatch.setattr(
+        reading.wordcounts,
+        "_text_chunks",
+        _recording_chunks(converted),
+    )
+    kindle_dir = _kindle_dir(tmp_path, {"books/a.txt": "one", "books/b.txt": "two words"})
+    cache_path = tmp_path / "cache.sqlite"
+    empty = pd.DataFrame(columns=["Author", "Title", "Language", "Added", "Words"])
+
+    df = process(empty, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+    assert sorted(converted) == ["a.txt", "b.txt"]
+    assert df.Words.to_dict() == {"novels/a.txt": 1, "novels/b.txt": 2}
+
+    converted.clear()
+    df = process(empty, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+    assert not converted, "Nothing has changed"
+    assert df.Words.to_dict() == {"novels/a.txt": 1, "novels/b.txt": 2}
+
+    (kindle_dir / "books/b.txt").rename(kindle_dir / "short-stories/c.txt")
+    (kindle_dir / "books/a.txt").write_text("now three words")
+    df = process(empty, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+    assert converted == ["a.txt"], "Only the edited ebook was converted"
+    assert df.Words.to_dict() == {"short-stories/c.txt": 2, "novels/a.txt": 3}
+    assert df.loc["short-stories/c.txt"].Title == "b", "The moved ebook kept its details"
+    assert df.loc["short-stories/c.txt"].Category == "short-stories"
+
+    with pytest.raises(FileNotFoundError):
+        process(empty, tmp_path / "not-mounted", cache=ResponseCache(cache_path))
+
+
+def test_process_added(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(reading.wordcounts, "_read_metadata", _fake_metadata)
+    kindle_dir = _kindle_dir(tmp_path, {"books/a.txt": "one", "books/b.txt": "two words"})
+    cache_path = tmp_path / "cache.sqlite"
+    old = pd.DataFrame(
+        [
+            {
+                "BookId": "novels/a.txt",
+                "Author": "Someone",
+                "Title": "Old",
+                "Language": "en",
+                "Added": pd.Timestamp("2020-01-01"),
+                "Words": 1,
+            }
+        ]
+    ).set_index("BookId")
+
+    df = old
+    for _ in range(2):
+        df = process(df, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+        assert df.loc["novels/a.txt", "Added"] == pd.Timestamp("2020-01-01"), "From before"
+
+    (kindle_dir / "books/a.txt").write_text("edited")
+    df = process(df, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+    assert df.loc["novels/a.txt", "Title"] == "a", "Converted again"
+    assert df.loc["novels/a.txt", "Added"] == pd.Timestamp("2020-01-01"), "But not re-added"
+
+    (kindle_dir / "books/a.txt").rename(kindle_dir / "short-stories/c.txt")
+    df = process(df, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+    assert df.loc["short-stories/c.txt", "Added"] == pd.Timestamp("2020-01-01"), "Moved"
+
+
+def test_process_failure(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def read_metadata(path: Path) -> dict[str, Any]:
+        if path.name == "b.txt":
+            raise RuntimeError("calibre fell over")
+        return _fake_metadata(path)
+
+    converted: list[str] = []
+    monkeypatch.setattr(reading.wordcounts, "_read_metadata", read_metadata)
+    monkeypatch.setattr(
+        reading.wordcounts,
+        "_text_chunks",
+        _recording_chunks(converted),
+    )
+    kindle_dir = _kindle_dir(tmp_path, {"books/a.txt": "one", "books/b.txt": "two words"})
+    (kindle_dir / "books/a.txt").write_text("one " * 1000)  # larger, so it's done first
+    cache_path = tmp_path / "cache.sqlite"
+    empty = pd.DataFrame(columns=["Author", "Title", "Language", "Added", "Words"])
+
+    with pytest.raises(RuntimeError):
+        process(empty, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+
+    converted.clear()
+    monkeypatch.setattr(reading.wordcounts, "_read_metadata", _fake_metadata)
+    df = process(empty, kindle_dir, workers=1, cache=ResponseCache(cache_path))
+    assert converted == ["b.txt"], "The successful conversion was remembered"
+    assert df.Words.to_dict() == {"novels/a.txt": 1000, "novels/b.txt": 2}